@@ -0,0 +1,94 @@
+"""
+Green Energy Sentinel - Benchmark: coarse-to-fine vs exhaustive site search
+Times the exhaustive native-resolution scoring (score_native) against the
+pyramid search (pyramid_search) and checks that both return the same top
+sites. Besides the real lightning risk map, random smooth risk maps (some
+quantized to force ties) are tried so the equality is not a lucky accident.
+
+Run from the repository root (needs the wind GeoTIFF, the Galicia GeoJSON
+and the strike archive):
+    python benchmarks/bench_pyramid_search.py --trials 20
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+from scipy.ndimage import gaussian_filter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import optimal_placement as op  # noqa: E402
+
+
+def best_time(fn, repeats):
+    """Fastest of `repeats` calls (seconds) and the result of the last one."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def random_risk_map(rng, shape, quantize):
+    """Smooth random risk surface normalized to 0-1, optionally rounded to 0.1 steps."""
+    risk = gaussian_filter(rng.random(shape), sigma=rng.uniform(0.5, 4.0))
+    risk = (risk - risk.min()) / (risk.max() - risk.min())
+    return np.round(risk, 1) if quantize else risk
+
+
+def same_sites(a, b):
+    return a[['row', 'col', 'score']].equals(b[['row', 'col', 'score']])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the coarse-to-fine site search.")
+    parser.add_argument("--top-k", type=int, default=op.TOP_K)
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per method (best is reported)")
+    parser.add_argument("--trials", type=int, default=10, help="Random risk maps checked for equality")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    galicia_shape = op.load_boundary(op.GALICIA_GEOJSON)
+    risk_map, x_edges, y_edges = op.calculate_historical_risk_map()
+    cache_dir = tempfile.mkdtemp(prefix="wind_pyramid_")
+    try:
+        exhaustive, (_, expected, _, _) = best_time(
+            lambda: op.score_native(galicia_shape, risk_map, x_edges, y_edges, top_k=args.top_k), args.repeats)
+
+        # Cold: the pyramid is built (one pass over the raster) before searching
+        def cold_search():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            return op.pyramid_search(galicia_shape, risk_map, x_edges, y_edges, args.top_k, cache_dir=cache_dir)
+        cold, _ = best_time(cold_search, args.repeats)
+        warm, (found, _, _, stats) = best_time(
+            lambda: op.pyramid_search(galicia_shape, risk_map, x_edges, y_edges, args.top_k, cache_dir=cache_dir),
+            args.repeats)
+
+        if not same_sites(expected, found):
+            sys.exit("❌ Pyramid search disagrees with the exhaustive search on the lightning risk map")
+
+        rng = np.random.default_rng(args.seed)
+        for trial in range(args.trials):
+            risk = random_risk_map(rng, risk_map.shape, quantize=trial % 3 == 0)
+            _, a, _, _ = op.score_native(galicia_shape, risk, x_edges, y_edges, top_k=args.top_k)
+            b, _, _, _ = op.pyramid_search(galicia_shape, risk, x_edges, y_edges, args.top_k, cache_dir=cache_dir)
+            if not same_sites(a, b):
+                sys.exit(f"❌ Pyramid search disagrees with the exhaustive search on random risk map {trial}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"\n📊 Top-{args.top_k} site search over {stats['pixels_total']} raster pixels (best of {args.repeats})")
+    print(f"   Exhaustive (score_native):      {exhaustive * 1000:8.1f} ms")
+    print(f"   Pyramid, cold (build + search): {cold * 1000:8.1f} ms  ({exhaustive / cold:.1f}x)")
+    print(f"   Pyramid, warm (cached):         {warm * 1000:8.1f} ms  ({exhaustive / warm:.1f}x)")
+    print(f"   Pixels scored: {stats['pixels_scored']} ({stats['pixels_scored'] / stats['pixels_total']:.2%}) "
+          f"in {stats['tiles_scored']} tiles")
+    print(f"✅ Identical top sites on the lightning risk map and {args.trials} random risk maps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Green Energy Sentinel - Benchmark: scoring service latency under load
+Starts src/score_service.py (or targets one already running with --url),
+then opens --clients concurrent keep-alive connections that each send
+--requests batched queries of --points random points (plus, with
+--polygons, small square polygons) inside the Galicia bounding box.
+Reports p50/p90/p99 request latency and throughput.
+
+Run from the repository root (needs the wind GeoTIFF, the Galicia GeoJSON
+and the strike archive):
+    python benchmarks/bench_score_service.py --clients 16 --requests 50 --points 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC_DIR)
+from config import GALICIA_BOUNDS  # noqa: E402
+from score_service import HOST  # noqa: E402
+
+BENCH_PORT = 8766
+POLYGON_SIZE_DEG = 0.02  # Edge of the random square polygons (~2 km)
+STARTUP_TIMEOUT_S = 300
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    """One HTTP/1.1 request on an open keep-alive connection. Returns (status, body)."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+def random_points(rng, n):
+    lons = rng.uniform(GALICIA_BOUNDS["lon_min"], GALICIA_BOUNDS["lon_max"], n)
+    lats = rng.uniform(GALICIA_BOUNDS["lat_min"], GALICIA_BOUNDS["lat_max"], n)
+    return lons, lats
+
+
+def random_polygons(rng, n):
+    lons, lats = random_points(rng, n)
+    d = POLYGON_SIZE_DEG
+    return [{"type": "Polygon", "coordinates": [[[x, y], [x + d, y], [x + d, y + d], [x, y + d], [x, y]]]}
+            for x, y in zip(lons.tolist(), lats.tolist())]
+
+
+async def client(host, port, seed, args, latencies):
+    """Send args.requests queries on one connection, appending each latency (seconds)."""
+    rng = np.random.default_rng(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(args.requests):
+            lons, lats = random_points(rng, args.points)
+            queries = [("/score/points", {"lon": lons.tolist(), "lat": lats.tolist()})]
+            if args.polygons:
+                queries.append(("/score/polygons", {"geometries": random_polygons(rng, args.polygons)}))
+            for path, payload in queries:
+                start = time.perf_counter()
+                status, body = await request(reader, writer, host, "POST", path, payload)
+                latencies.setdefault(path, []).append(time.perf_counter() - start)
+                if status != 200:
+                    raise RuntimeError(f"{path}: HTTP {status} {body}")
+    finally:
+        writer.close()
+
+
+async def wait_ready(host, port, process):
+    """Wait for /health to answer (the service loads its layers first)."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT_S
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Scoring service exited with code {process.returncode}")
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(0.5)
+            continue
+        try:
+            return (await request(reader, writer, host, "GET", "/health"))[1]
+        finally:
+            writer.close()
+    raise TimeoutError(f"Scoring service not ready after {STARTUP_TIMEOUT_S}s")
+
+
+async def run(host, port, args, process=None):
+    health = await wait_ready(host, port, process)
+    print(f"🛰️ Service ready: raster {health['raster_shape'][1]}x{health['raster_shape'][0]}, "
+          f"layers loaded in {health['load_seconds']}s")
+
+    latencies = {}
+    start = time.perf_counter()
+    await asyncio.gather(*[client(host, port, args.seed + i, args, latencies) for i in range(args.clients)])
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.clients} clients x {args.requests} requests, {args.points} points"
+          f"{f' + {args.polygons} polygons' if args.polygons else ''} per request, {elapsed:.2f}s total")
+    for path, values in latencies.items():
+        ms = np.array(values) * 1000
+        p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+        print(f"  {path:<16} n={len(ms):<6} p50 {p50:7.2f} ms   p90 {p90:7.2f} ms   p99 {p99:7.2f} ms   "
+              f"max {ms.max():7.2f} ms   {len(ms) / elapsed:7.1f} req/s")
+    points_per_s = args.clients * args.requests * args.points / elapsed
+    print(f"  Throughput: {points_per_s:,.0f} points/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scoring service under concurrent clients.")
+    parser.add_argument("--url", default=None, help="Running service to target (default: start one)")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per client")
+    parser.add_argument("--points", type=int, default=500, help="Points per /score/points request")
+    parser.add_argument("--polygons", type=int, default=0, help="Also send this many polygons per request")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        asyncio.run(run(url.hostname, url.port or 80, args))
+        return
+
+    process = subprocess.Popen([sys.executable, os.path.join(SRC_DIR, 'score_service.py'),
+                                '--host', HOST, '--port', str(BENCH_PORT)])
+    try:
+        asyncio.run(run(HOST, BENCH_PORT, args, process))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
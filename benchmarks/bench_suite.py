@@ -0,0 +1,322 @@
+"""
+Green Energy Sentinel - Benchmark suite on synthetic strike datasets
+Times the hot paths of the project on synthetic lightning (see
+synthetic_strikes.py) at several scales, so their cost can be followed as
+the archive grows and compared between commits:
+    ingest                 raw JSON -> partitioned strike archive (strike_store)
+    risk_map.histogram     blurred lat/lon histogram (optimal_placement.risk_density)
+    risk_map.kde           Gaussian KDE in meters (strike_density)
+    grid_scoring           wind x risk scoring of an N-node grid (optimal_placement.evaluate_grid)
+    dbscan                 risk clusters of legacy/analyze_risk.py (capped at 100k strikes)
+    turbine_exposure       strikes within 1 km / 5 km of each turbine (spatial_index.count_within)
+    timelapse_payload      sampled GeoJSON features of create_timelapse.py, serialized
+
+Datasets are generated once per (scale, seed, generator version) under
+benchmarks/data/ and reused. Every run saves its timings to
+benchmarks/results/<commit>.json together with the machine and dataset
+details; --compare prints the ratio between two such files.
+
+Run from the repository root (needs no real data):
+    python benchmarks/bench_suite.py --scales 10k,100k,1m
+    python benchmarks/bench_suite.py --bench risk_map --scales 10m
+    python benchmarks/bench_suite.py --compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+import numpy as np
+from affine import Affine
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src', 'legacy'))
+from synthetic_strikes import (GALICIA_BOUNDS, GENERATOR_VERSION, SCALES, generate_strikes,  # noqa: E402
+                               generate_turbines, parse_scale, write_strikes_json)
+
+# Configuration
+DATA_DIR = os.path.join(BENCH_DIR, "data")          # Cached synthetic datasets
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")    # One JSON of timings per run
+DEFAULT_SCALES = "10k,100k,1m"                      # 10m is opt-in (several GB of JSON and RAM)
+DEFAULT_REPEATS = 3
+CHANGE_THRESHOLD = 0.10                             # --compare flags ratios beyond +-10%
+WIND_SHAPE = (800, 1000)                            # Synthetic wind raster over GALICIA_BOUNDS
+EXPOSURE_RADII_M = (1000, 5000)
+
+# A prepared benchmark: run() is timed, reset() (untimed) runs before each repeat
+Case = namedtuple("Case", ["run", "items", "unit", "reset"], defaults=[None])
+BENCHMARKS = {}
+
+
+def benchmark(name, max_n=None):
+    """Register a benchmark: fn(dataset) -> Case. Scales above max_n are skipped."""
+    def register(fn):
+        BENCHMARKS[name] = {"setup": fn, "max_n": max_n}
+        return fn
+    return register
+
+
+class Dataset:
+    """Synthetic strikes of one scale, with their raw JSON and archive built on demand.
+
+    The dataset directory mirrors the repository layout (data/strikes_*.json,
+    data/strike_store) so the store functions find it as the working directory.
+    """
+
+    def __init__(self, scale, seed):
+        self.scale = scale
+        self.n = parse_scale(scale)
+        self.seed = seed
+        self.dir = os.path.join(DATA_DIR, f"v{GENERATOR_VERSION}-seed{seed}-{scale}")
+        self.json_path = os.path.join(self.dir, "data", "strikes_synthetic.json")
+        self.store_dir = os.path.join(self.dir, "data", "strike_store")
+        self._strikes = None
+
+    @property
+    def strikes(self):
+        if self._strikes is None:
+            self._strikes = generate_strikes(self.n, self.seed)
+        return self._strikes
+
+    def raw_json(self):
+        if not os.path.exists(self.json_path):
+            write_strikes_json(self.json_path + ".tmp", self.strikes)
+            os.replace(self.json_path + ".tmp", self.json_path)
+        return self.json_path
+
+    def store(self):
+        """Absolute store_dir of the ingested dataset (the working directory must be self.dir)."""
+        from strike_store import build_store
+        self.raw_json()
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_store(store_dir=self.store_dir)
+        return self.store_dir
+
+
+@benchmark("ingest")
+def bench_ingest(ds):
+    from strike_store import ingest_source
+    source = ds.raw_json()
+    scratch = os.path.join(ds.dir, "ingest_scratch")
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            ingest_source(source, scratch)
+    return Case(run, ds.n, "strikes", reset=lambda: shutil.rmtree(scratch, ignore_errors=True))
+
+
+@benchmark("risk_map.histogram")
+def bench_risk_histogram(ds):
+    from optimal_placement import risk_density
+    lats, lons = ds.strikes["lat"], ds.strikes["lon"]
+    return Case(lambda: risk_density(lats, lons), ds.n, "strikes")
+
+
+@benchmark("risk_map.kde")
+def bench_risk_kde(ds):
+    from strike_density import strike_density
+    lats, lons = ds.strikes["lat"], ds.strikes["lon"]
+    return Case(lambda: strike_density(lons, lats, bbox=GALICIA_BOUNDS), ds.n, "strikes")
+
+
+def synthetic_wind(seed):
+    """Smooth wind field (m/s) with nodata patches over GALICIA_BOUNDS. Returns (wind, transform, nodata)."""
+    from scipy.ndimage import gaussian_filter
+    rng = np.random.default_rng(seed)
+    wind = gaussian_filter(rng.random(WIND_SHAPE), sigma=20)
+    wind = (4.0 + 6.0 * (wind - wind.min()) / (wind.max() - wind.min())).astype("float32")
+    nodata = -999.0
+    wind[rng.random(WIND_SHAPE) < 0.01] = nodata
+    transform = Affine.translation(GALICIA_BOUNDS["lon_min"], GALICIA_BOUNDS["lat_max"]) * Affine.scale(
+        (GALICIA_BOUNDS["lon_max"] - GALICIA_BOUNDS["lon_min"]) / WIND_SHAPE[1],
+        -(GALICIA_BOUNDS["lat_max"] - GALICIA_BOUNDS["lat_min"]) / WIND_SHAPE[0])
+    return wind, transform, nodata
+
+
+@benchmark("grid_scoring")
+def bench_grid_scoring(ds):
+    """Score a side x side grid with as many nodes as the dataset has strikes."""
+    from optimal_placement import evaluate_grid, risk_density
+    wind, transform, nodata = synthetic_wind(ds.seed)
+    risk_map, x_edges, y_edges = risk_density(ds.strikes["lat"], ds.strikes["lon"])
+    side = int(np.sqrt(ds.n))
+    grid_lats = np.linspace(GALICIA_BOUNDS["lat_min"], GALICIA_BOUNDS["lat_max"], side)
+    grid_lons = np.linspace(GALICIA_BOUNDS["lon_min"], GALICIA_BOUNDS["lon_max"], side)
+    on_land = np.random.default_rng(ds.seed).random((side, side)) < 0.7
+    valid = wind[wind != nodata]
+
+    def run():
+        evaluate_grid(grid_lats, grid_lons, on_land, wind, transform, nodata,
+                      valid.min(), valid.max(), risk_map, x_edges, y_edges)
+    return Case(run, side * side, "nodes")
+
+
+@benchmark("dbscan", max_n=100_000)
+def bench_dbscan(ds):
+    from sklearn.cluster import DBSCAN
+    from analyze_risk import EPS_DEGREES, MIN_SAMPLES
+    X = np.column_stack((ds.strikes["lat"], ds.strikes["lon"])).astype(float)
+    return Case(lambda: DBSCAN(eps=EPS_DEGREES, min_samples=MIN_SAMPLES, metric='euclidean').fit(X), ds.n, "strikes")
+
+
+@benchmark("turbine_exposure")
+def bench_turbine_exposure(ds):
+    """Strikes near each synthetic turbine at every EXPOSURE_RADII_M (warm spatial index)."""
+    from spatial_index import count_within
+    store_dir = ds.store()
+    turbines = generate_turbines(seed=ds.seed)
+    points = np.column_stack((turbines["lon"], turbines["lat"]))
+
+    def run():
+        for radius in EXPOSURE_RADII_M:
+            count_within(radius, points, store_dir=store_dir)
+    run()  # Builds the spatial index outside the timing
+    return Case(run, ds.n, "strikes")
+
+
+@benchmark("timelapse_payload")
+def bench_timelapse_payload(ds):
+    from create_timelapse import timelapse_features, timelapse_sample
+    strikes = ds.strikes
+
+    def run():
+        json.dumps(timelapse_features(strikes, timelapse_sample(ds.n)))
+    return Case(run, ds.n, "strikes")
+
+
+def time_case(case, repeats):
+    """Wall times (seconds) of `repeats` runs of a case."""
+    times = []
+    for _ in range(repeats):
+        if case.reset:
+            case.reset()
+        start = time.perf_counter()
+        case.run()
+        times.append(time.perf_counter() - start)
+    if case.reset:
+        case.reset()
+    return times
+
+
+def git_revision():
+    """(short commit hash, dirty flag) of the working tree, ('unknown', False) outside git."""
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=BENCH_DIR, capture_output=True, text=True, check=True).stdout
+    try:
+        commit = git("rev-parse", "--short", "HEAD").strip()
+        dirty = bool(git("status", "--porcelain", "--untracked-files=no").strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def machine_info():
+    return {"platform": platform.platform(), "machine": platform.machine(), "processor": platform.processor(),
+            "cpus": os.cpu_count(), "python": platform.python_version(), "numpy": np.__version__}
+
+
+def run_suite(scales, selected, repeats, seed):
+    """Time every selected benchmark at every scale. Returns the result records."""
+    results = []
+    cwd = os.getcwd()
+    for scale in scales:
+        ds = Dataset(scale, seed)
+        os.makedirs(ds.dir, exist_ok=True)
+        print(f"📦 {scale} synthetic strikes ({ds.n:,}, seed {seed}) in {ds.dir}")
+        os.chdir(ds.dir)  # Store functions resolve data/ against the working directory
+        try:
+            for name in selected:
+                spec = BENCHMARKS[name]
+                if spec["max_n"] is not None and ds.n > spec["max_n"]:
+                    print(f"   {name:<20} skipped (above {spec['max_n']:,})")
+                    continue
+                case = spec["setup"](ds)
+                times = time_case(case, repeats)
+                best, median = min(times), statistics.median(times)
+                results.append({"benchmark": name, "scale": scale, "n": ds.n, "items": case.items,
+                                "unit": case.unit, "times_s": [round(t, 6) for t in times],
+                                "min_s": round(best, 6), "median_s": round(median, 6)})
+                print(f"   {name:<20} min {best * 1000:10.1f} ms   median {median * 1000:10.1f} ms   "
+                      f"{case.items / best:14,.0f} {case.unit}/s")
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def save_results(results, seed, repeats, out_dir=RESULTS_DIR):
+    """Write the run to <commit>.json, keeping earlier results of the commit for other benchmarks/scales."""
+    commit, dirty = git_revision()
+    record = {"commit": commit, "dirty": dirty, "date": datetime.now().isoformat(timespec="seconds"),
+              "seed": seed, "generator_version": GENERATOR_VERSION, "repeats": repeats,
+              "machine": machine_info(), "results": results}
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{commit}{'-dirty' if dirty else ''}.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            previous = json.load(f)
+        same_setup = all(previous.get(k) == record[k] for k in ("seed", "generator_version", "machine"))
+        if same_setup:
+            ran = {(r["benchmark"], r["scale"]) for r in results}
+            record["results"] = [r for r in previous["results"] if (r["benchmark"], r["scale"]) not in ran] + results
+    with open(path, 'w') as f:
+        json.dump(record, f, indent=2)
+    return path
+
+
+def compare(old_path, new_path, threshold=CHANGE_THRESHOLD):
+    """Print new/old median time ratios of the benchmarks both result files ran."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"📊 {old['commit']} -> {new['commit']} (median time ratio, < 1 is faster)")
+    for label in ("seed", "generator_version"):
+        if old.get(label) != new.get(label):
+            print(f"   ⚠️ Different {label}: {old.get(label)} vs {new.get(label)} (timings are not comparable)")
+    if old["machine"] != new["machine"]:
+        print("   ⚠️ Different machines")
+    before = {(r["benchmark"], r["scale"]): r for r in old["results"]}
+    for r in new["results"]:
+        base = before.get((r["benchmark"], r["scale"]))
+        if base is None:
+            continue
+        ratio = r["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        flag = "  slower" if ratio > 1 + threshold else "  faster" if ratio < 1 - threshold else ""
+        print(f"   {r['benchmark']:<20} {r['scale']:>5}   {base['median_s'] * 1000:10.1f} ms -> "
+              f"{r['median_s'] * 1000:10.1f} ms   x{ratio:5.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline hot paths on synthetic strike datasets.")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help=f"Comma-separated scales ({', '.join(SCALES)} or counts)")
+    parser.add_argument("--bench", default=None, help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), default=None,
+                        help="Compare two result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    selected = [name for name in BENCHMARKS if args.bench is None or args.bench in name]
+    if not selected:
+        parser.error(f"no benchmark matches {args.bench!r} (have: {', '.join(BENCHMARKS)})")
+    scales = [scale.strip().lower() for scale in args.scales.split(",") if scale.strip()]
+    results = run_suite(scales, selected, args.repeats, args.seed)
+    print(f"💾 Results saved to: {save_results(results, args.seed, args.repeats)}")
+
+
+if __name__ == "__main__":
+    main()
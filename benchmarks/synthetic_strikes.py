@@ -0,0 +1,155 @@
+"""
+Green Energy Sentinel - Synthetic Lightning Generator
+Deterministic, realistic-looking strike datasets of any size for the
+benchmarks. The strikes are clustered and seasonal, like the real archive:
+    - storms with heavy-tailed sizes (a few produce most strikes), more
+      frequent in the Atlantic autumn/winter season and in summer afternoons
+    - each storm drifts from the west/south-west for a few hours, and its
+      strikes scatter around the moving cell
+    - ~5% background strikes spread uniformly over the area and the year
+    - peak currents: ~88% negative, log-normal magnitudes, ~1% missing
+
+Same (n, seed) -> same strikes on any machine, so benchmark runs on
+different commits score the same data. Output is either store columns
+(lat, lon, time, peak, polarity) or raw JSON in the API schema
+({fecha, lat, lon, peakCurrent}) that strike_store ingests.
+
+    python benchmarks/synthetic_strikes.py --n 1m --out data/strikes_synthetic.json
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from config import GALICIA_BOUNDS  # noqa: E402
+from strike_store import COLUMNS, format_fecha  # noqa: E402
+from strike_stream import write_json_array  # noqa: E402
+
+# Configuration
+GENERATOR_VERSION = 1      # Bump when the generated data changes (cached datasets are keyed on it)
+YEAR = 2023
+STRIKES_PER_STORM = 250    # Mean storm size
+STORM_SIZE_SHAPE = 1.3     # Pareto shape of storm sizes (lower = heavier tail)
+BACKGROUND_FRACTION = 0.05
+MONTH_WEIGHTS = [12, 9, 6, 6, 8, 9, 7, 9, 10, 12, 13, 14]   # Relative storm frequency Jan..Dec
+NEGATIVE_FRACTION = 0.88
+MISSING_PEAK_FRACTION = 0.01
+KM_PER_DEGREE = 111.32
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+
+def parse_scale(value):
+    """'100k' / '1m' / '250000' -> strike count."""
+    value = str(value).strip().lower()
+    return SCALES[value] if value in SCALES else int(float(value))
+
+
+def _random_times(rng, n, year):
+    """Epoch seconds of n storm starts: month by MONTH_WEIGHTS, afternoon-heavy hour of day."""
+    weights = np.array(MONTH_WEIGHTS, dtype=float)
+    months = rng.choice(12, n, p=weights / weights.sum())
+    month_starts = np.array([f"{year}-{m:02d}" for m in range(1, 13)] + [f"{year + 1}-01"], dtype="datetime64[M]")
+    month_starts = month_starts.astype("datetime64[s]").astype(np.int64)
+    days = np.floor(rng.random(n) * (month_starts[months + 1] - month_starts[months]) / 86400)
+    afternoon = rng.random(n) < 0.6
+    hours = np.where(afternoon, rng.normal(16.0, 3.0, n) % 24, rng.random(n) * 24)
+    return month_starts[months] + days * 86400 + hours * 3600
+
+
+def _peak_currents(rng, n):
+    negative = rng.random(n) < NEGATIVE_FRACTION
+    magnitude = np.where(negative, rng.lognormal(np.log(15.0), 0.6, n), rng.lognormal(np.log(30.0), 0.7, n))
+    peak = np.where(negative, -magnitude, magnitude)
+    peak[rng.random(n) < MISSING_PEAK_FRACTION] = np.nan
+    return peak
+
+
+def generate_strikes(n, seed=0, bbox=GALICIA_BOUNDS, year=YEAR):
+    """n synthetic strikes as time-sorted store columns (see COLUMNS)."""
+    rng = np.random.default_rng(seed)
+    n_storms = max(1, n // STRIKES_PER_STORM)
+    sizes = rng.pareto(STORM_SIZE_SHAPE, n_storms) + 1.0
+
+    # Storm cells: center, start, duration, drift velocity and radius
+    center_lat = rng.uniform(bbox["lat_min"], bbox["lat_max"], n_storms)
+    center_lon = rng.uniform(bbox["lon_min"], bbox["lon_max"], n_storms)
+    start = _random_times(rng, n_storms, year)
+    duration_h = np.clip(rng.lognormal(np.log(2.0), 0.6, n_storms), 0.25, 12.0)
+    speed_kmh = rng.uniform(15.0, 60.0, n_storms)
+    heading = np.radians(rng.normal(60.0, 30.0, n_storms))   # Toward the east-north-east
+    radius_km = rng.uniform(2.0, 10.0, n_storms)
+
+    # Storm strikes move with their cell and scatter around it
+    n_background = int(round(n * BACKGROUND_FRACTION))
+    storm = rng.choice(n_storms, n - n_background, p=sizes / sizes.sum())
+    elapsed_h = rng.random(len(storm)) * duration_h[storm]
+    east_km = np.sin(heading[storm]) * speed_kmh[storm] * elapsed_h + rng.normal(0, 1, len(storm)) * radius_km[storm]
+    north_km = np.cos(heading[storm]) * speed_kmh[storm] * elapsed_h + rng.normal(0, 1, len(storm)) * radius_km[storm]
+    lat = center_lat[storm] + north_km / KM_PER_DEGREE
+    lon = center_lon[storm] + east_km / (KM_PER_DEGREE * np.cos(np.radians(lat)))
+    times = start[storm] + elapsed_h * 3600
+
+    # Background strikes, which also replace storm strikes that drifted out of the area
+    outside = ((lat < bbox["lat_min"]) | (lat > bbox["lat_max"]) |
+               (lon < bbox["lon_min"]) | (lon > bbox["lon_max"]))
+    lat, lon, times = lat[~outside], lon[~outside], times[~outside]
+    n_background = n - len(lat)
+    lat = np.concatenate([lat, rng.uniform(bbox["lat_min"], bbox["lat_max"], n_background)])
+    lon = np.concatenate([lon, rng.uniform(bbox["lon_min"], bbox["lon_max"], n_background)])
+    year_start = np.datetime64(f"{year}-01-01", "s").astype(np.int64)
+    year_end = np.datetime64(f"{year + 1}-01-01", "s").astype(np.int64)
+    times = np.concatenate([times, rng.uniform(year_start, year_end, n_background)])
+    times = np.clip(np.floor(times), year_start, year_end - 1)
+
+    peak = _peak_currents(rng, n)
+    order = np.argsort(times, kind="stable")
+    columns = {"lat": lat[order], "lon": lon[order], "time": times[order], "peak": peak,
+               "polarity": np.sign(np.nan_to_num(peak))}
+    return {name: columns[name].astype(dtype) for name, dtype in COLUMNS.items()}
+
+
+def generate_turbines(n_parks=80, per_park=12, seed=0, bbox=GALICIA_BOUNDS):
+    """Synthetic turbine inventory: parks of turbines in a row along a ridge. Returns {lon, lat} arrays."""
+    rng = np.random.default_rng(seed + 1)
+    park_lat = rng.uniform(bbox["lat_min"], bbox["lat_max"], n_parks)
+    park_lon = rng.uniform(bbox["lon_min"], bbox["lon_max"], n_parks)
+    ridge = rng.uniform(0, np.pi, n_parks)
+    offset_km = (np.arange(per_park) - (per_park - 1) / 2) * 0.35   # ~350 m between turbines
+    east_km = np.cos(ridge)[:, None] * offset_km
+    north_km = np.sin(ridge)[:, None] * offset_km
+    lat = park_lat[:, None] + north_km / KM_PER_DEGREE
+    lon = park_lon[:, None] + east_km / (KM_PER_DEGREE * np.cos(np.radians(lat)))
+    return {"lon": lon.ravel(), "lat": lat.ravel()}
+
+
+def iter_records(columns):
+    """Raw API records ({fecha, lat, lon, peakCurrent}) of store columns."""
+    fechas = format_fecha(columns["time"])
+    peaks = columns["peak"].astype(float)
+    for fecha, lat, lon, peak in zip(fechas.tolist(), columns["lat"].astype(float).tolist(),
+                                     columns["lon"].astype(float).tolist(), peaks.tolist()):
+        yield {"fecha": fecha, "lat": lat, "lon": lon, "peakCurrent": None if peak != peak else peak}
+
+
+def write_strikes_json(path, columns):
+    """Write store columns as a raw JSON array in the API schema. Returns the count."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return write_json_array(path, iter_records(columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic lightning dataset in the API JSON schema.")
+    parser.add_argument("--n", default="100k", help=f"Strike count ({', '.join(SCALES)} or a number)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="JSON file to write (default: data/strikes_synthetic_<n>.json)")
+    args = parser.parse_args()
+
+    n = parse_scale(args.n)
+    out = args.out or f"data/strikes_synthetic_{args.n}.json"
+    start = time.perf_counter()
+    columns = generate_strikes(n, args.seed)
+    count = write_strikes_json(out, columns)
+    print(f"⚡ {count} synthetic strikes written to {os.path.abspath(out)} ({time.perf_counter() - start:.1f}s)")
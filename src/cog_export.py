@@ -0,0 +1,74 @@
+"""
+Green Energy Sentinel - Cloud-Optimized GeoTIFF Export
+Writes analysis layers as one multi-band Cloud-Optimized GeoTIFF: internally
+tiled, deflate-compressed, with overviews and the band names stored as band
+descriptions. Consumers can window-read just the area (and zoom level) they
+need, locally or over HTTP range requests, e.g.
+
+    with rasterio.open("reports/suitability_layers.tif") as src:
+        score = src.read(src.descriptions.index("score") + 1, window=window)
+
+Bands are streamed in blocks into a temporary tiled GeoTIFF, which GDAL's
+COG driver then rewrites with overviews in COG layout. On GDAL builds older
+than 3.1 (no COG driver) the overviews are built on the temporary file and
+copied into a tiled GeoTIFF, which readers can window-read the same way.
+"""
+
+import os
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.shutil import copy as copy_dataset
+
+# Configuration
+COG_BLOCK_SIZE = 512           # Internal tile edge (pixels)
+COG_COMPRESSION = "DEFLATE"
+OVERVIEW_RESAMPLING = "AVERAGE"  # Land mask overviews become the land fraction
+
+
+def overview_factors(width, height, block_size=COG_BLOCK_SIZE):
+    """Decimation factors 2, 4, 8... until the overview fits in one tile."""
+    factors, factor = [], 2
+    while max(width, height) / (factor // 2) > block_size:
+        factors.append(factor)
+        factor *= 2
+    return factors
+
+
+def write_cog(path, blocks, band_names, width, height, transform, crs, dtype="float32", nodata=np.nan,
+              block_size=COG_BLOCK_SIZE):
+    """Write a multi-band COG from an iterable of (window, array[band, rows, cols]) blocks.
+
+    The blocks must cover the width x height grid; they are written as they
+    arrive, so only one is in memory at a time. Band i gets band_names[i]
+    as its description. The file is replaced atomically.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.tif"
+    profile = {"driver": "GTiff", "width": width, "height": height, "count": len(band_names),
+               "dtype": dtype, "crs": crs, "transform": transform, "nodata": nodata,
+               "tiled": True, "blockxsize": block_size, "blockysize": block_size,
+               "compress": COG_COMPRESSION, "BIGTIFF": "IF_SAFER"}
+    with rasterio.open(tmp_path, "w", **profile) as dst:
+        for i, name in enumerate(band_names, 1):
+            dst.set_band_description(i, name)
+        for window, values in blocks:
+            dst.write(np.asarray(values, dtype=dtype), window=window)
+
+    predictor = 3 if np.dtype(dtype).kind == "f" else 2
+    cog_path = f"{path}.cog.tif"
+    with rasterio.Env() as env:
+        has_cog = "COG" in env.drivers()
+    if has_cog:
+        copy_dataset(tmp_path, cog_path, driver="COG", COMPRESS=COG_COMPRESSION, PREDICTOR=predictor,
+                     BLOCKSIZE=block_size, OVERVIEW_RESAMPLING=OVERVIEW_RESAMPLING, BIGTIFF="IF_SAFER")
+    else:
+        with rasterio.open(tmp_path, "r+") as src:
+            src.build_overviews(overview_factors(width, height, block_size),
+                                Resampling[OVERVIEW_RESAMPLING.lower()])
+        copy_dataset(tmp_path, cog_path, driver="GTiff", COPY_SRC_OVERVIEWS="YES", TILED="YES",
+                     BLOCKXSIZE=block_size, BLOCKYSIZE=block_size, COMPRESS=COG_COMPRESSION,
+                     PREDICTOR=predictor, BIGTIFF="IF_SAFER")
+    os.remove(tmp_path)
+    os.replace(cog_path, path)
+    return path
@@ -0,0 +1,41 @@
+"""
+Green Energy Sentinel - Shared Configuration
+Study period, area, input files, archive paths and external services used by
+the scripts and the sentinel CLI. Plain constants only: importing this module
+costs nothing, so the CLI can build its help from it without loading numpy.
+"""
+
+# Study period (dd/mm/YYYY, inclusive)
+START_DATE = "01/01/2023"
+END_DATE = "31/12/2023"
+YEAR = 2023
+
+# Study area
+GALICIA_BOUNDS = {
+    "lat_min": 41.8, "lat_max": 43.8,
+    "lon_min": -9.3, "lon_max": -6.7
+}
+GALICIA_CENTER = [42.8, -8.0]
+
+# Input files (relative to the repository root)
+WIND_TIFF = "galicia_wind-speed_100m.tif"
+GALICIA_GEOJSON = "ESP.15_1.geojson"
+MUNICIPALITIES_GEOJSON = "data/galicia_municipalities.geojson"   # Built by fetch_municipalities.py
+
+# Strike archive
+LIGHTNING_GLOB = "data/strikes_*.json"   # Yearly caches written by the fetcher
+STORE_DIR = "data/strike_store"
+
+# Placement model
+GRID_RESOLUTION = 80              # Lat/lon grid nodes per axis of the default suitability map
+NATIVE_BLOCK_ROWS = 256           # Raster rows scored per block (bounds memory use)
+MIN_SITE_SPACING_M = 5000         # Top sites closer than this are the same hill: keep only the best
+LAYERS_COG = "reports/suitability_layers.tif"   # Native-resolution layers for GIS tools
+TILES_DIR = "maps/tiles"
+
+# External services
+API_LIGHTNING_URL = "https://servizos.meteogalicia.gal/mgrss/observacion/jsonRaios.action"
+OVERPASS_URL = "http://overpass-api.de/api/interpreter"
+GADM_MUNICIPALITIES_URL = "https://geodata.ucdavis.edu/gadm/gadm4.1/json/gadm41_ESP_4.json.zip"
+WMS_PARKS_URL = "https://ideg.xunta.gal/servizos/services/PBA/Afeccions_Enerxia/MapServer/WMSServer"
+WMS_WIND_URL = "https://mandeo.meteogalicia.es/thredds/wms/modelos/wasp/wasp_hist/wasp_hist_best.ncd"
@@ -5,90 +5,98 @@ A stunning visual representation of 2023 lightning activity over Galicia's wind
 With smooth opacity and glow animations (NO position/scale changes).
 """
 
+import argparse
 import folium
 from folium import plugins
-import json
+import numpy as np
 import os
 from datetime import datetime
+from config import END_DATE, GALICIA_CENTER, START_DATE, WMS_PARKS_URL, WMS_WIND_URL
+from profiling import add_profile_arguments, profile_run, span
+from strike_store import strikes_between, strike_count, format_fecha
 
 # Configuration
-LIGHTNING_FILE = "data/strikes_2023.json"
-WMS_PARKS_URL = "https://ideg.xunta.gal/servizos/services/PBA/Afeccions_Enerxia/MapServer/WMSServer"
-WMS_WIND_URL = "https://mandeo.meteogalicia.es/thredds/wms/modelos/wasp/wasp_hist/wasp_hist_best.ncd"
-GALICIA_CENTER = [42.8, -8.0]
+MAX_TIMELAPSE_POINTS = 5000  # Sampled strikes in the animation
+
+def timelapse_sample(count, max_points=MAX_TIMELAPSE_POINTS):
+    """Every step-th strike, so that about max_points are animated."""
+    return slice(None, None, max(1, count // max_points))
+
+def timelapse_features(strikes, sampled):
+    """Styled GeoJSON point features (TimestampedGeoJson) of the sampled strikes, in time order."""
+    lats = strikes['lat'][sampled].astype(float)
+    lons = strikes['lon'][sampled].astype(float)
+    peaks = np.nan_to_num(strikes['peak'][sampled]).astype(float)
+    fechas = format_fecha(strikes['time'][sampled])
+
+    # Build GeoJSON features with enhanced styling
+    features = []
+
+    for lat, lon, peak, timestamp in zip(lats.tolist(), lons.tolist(), peaks.tolist(), fechas.tolist()):
+        peak = int(peak) if peak.is_integer() else peak
+
+        # Color based on polarity (negative = more common/dangerous)
+        if peak < -100:
+            color = '#ff0040'  # Intense red for strong negative
+            radius = 8
+        elif peak < 0:
+            color = '#ff4d4d'  # Red for negative
+            radius = 6
+        elif peak > 100:
+            color = '#ffd700'  # Gold for strong positive
+            radius = 8
+        else:
+            color = '#ffaa00'  # Orange for weak positive
+            radius = 5
+
+        feature = {
+            'type': 'Feature',
+            'geometry': {
+                'type': 'Point',
+                'coordinates': [lon, lat],
+            },
+            'properties': {
+                'time': timestamp,
+                'popup': f"<b>⚡ {abs(peak)} kA</b><br>{timestamp}",
+                'style': {'color': color},
+                'icon': 'circle',
+                'iconstyle': {
+                    'fillColor': color,
+                    'fillOpacity': 0.9,
+                    'stroke': 'true',
+                    'color': '#ffffff',
+                    'weight': 1,
+                    'radius': radius
+                }
+            }
+        }
+        features.append(feature)
+    return features
 
 def create_premium_timelapse():
     print("🌩️ Green Energy Sentinel - Creating Premium Animated Timelapse...")
     
-    if not os.path.exists(LIGHTNING_FILE):
-        print(f"❌ Error: File {LIGHTNING_FILE} not found.")
+    try:
+        # Already in time order (the archive keeps partitions sorted)
+        with span("load strikes") as s:
+            strikes = strikes_between(START_DATE, END_DATE)
+            s.count(strike_count(strikes))
+    except FileNotFoundError as e:
+        print(f"❌ Error: {e}")
         return
 
-    with open(LIGHTNING_FILE, 'r') as f:
-        strikes = json.load(f)
-
-    print(f"⚡ Loaded {len(strikes)} lightning strikes from 2023.")
-
-    # Sort by timestamp
-    strikes.sort(key=lambda x: x['fecha'])
+    print(f"⚡ Loaded {strike_count(strikes)} lightning strikes from 2023.")
 
     # Sample for performance (max 5000 points for smooth animation)
-    max_points = 5000
-    step = max(1, len(strikes) // max_points)
-    sampled_strikes = strikes[::step]
+    sampled = timelapse_sample(strike_count(strikes))
     
-    print(f"📊 Sampled {len(sampled_strikes)} strikes for visualization.")
+    print(f"📊 Sampled {len(strikes['time'][sampled])} strikes for visualization.")
 
-    # Build GeoJSON features with enhanced styling
-    timelapse_features = []
-    
-    for s in sampled_strikes:
-        try:
-            lat = float(s['lat'])
-            lon = float(s['lon'])
-            timestamp = s['fecha']
-            peak = s.get('peakCurrent', 0)
-            
-            # Color based on polarity (negative = more common/dangerous)
-            if peak < -100:
-                color = '#ff0040'  # Intense red for strong negative
-                radius = 8
-            elif peak < 0:
-                color = '#ff4d4d'  # Red for negative
-                radius = 6
-            elif peak > 100:
-                color = '#ffd700'  # Gold for strong positive
-                radius = 8
-            else:
-                color = '#ffaa00'  # Orange for weak positive
-                radius = 5
-            
-            feature = {
-                'type': 'Feature',
-                'geometry': {
-                    'type': 'Point',
-                    'coordinates': [lon, lat],
-                },
-                'properties': {
-                    'time': timestamp,
-                    'popup': f"<b>⚡ {abs(peak)} kA</b><br>{timestamp}",
-                    'style': {'color': color},
-                    'icon': 'circle',
-                    'iconstyle': {
-                        'fillColor': color,
-                        'fillOpacity': 0.9,
-                        'stroke': 'true',
-                        'color': '#ffffff',
-                        'weight': 1,
-                        'radius': radius
-                    }
-                }
-            }
-            timelapse_features.append(feature)
-        except:
-            continue
+    with span("build features") as s:
+        features = timelapse_features(strikes, sampled)
+        s.count(len(features))
 
-    print(f"✅ Generated {len(timelapse_features)} animated features.")
+    print(f"✅ Generated {len(features)} animated features.")
 
     # Create Premium Dark Map
     m = folium.Map(
@@ -137,7 +145,7 @@ def create_premium_timelapse():
 
     # Timelapse Animation
     plugins.TimestampedGeoJson(
-        {'type': 'FeatureCollection', 'features': timelapse_features},
+        {'type': 'FeatureCollection', 'features': features},
         period='PT6H',  # 6-hour intervals
         add_last_point=False,
         auto_play=False,
@@ -311,9 +319,14 @@ def create_premium_timelapse():
     # Save
     output_file = "maps/lightning_activity_timelapse.html"
     output_path = os.path.abspath(output_file)
-    m.save(output_path)
+    with span("save html") as s:
+        m.save(output_path)
+        s.set(bytes=os.path.getsize(output_path))
     print(f"🎉 Premium animated timelapse saved to: {output_path}")
     print("📱 Open in browser and use Fullscreen for best experience!")
 
 if __name__ == "__main__":
-    create_premium_timelapse()
+    parser = argparse.ArgumentParser(description="Animated timelapse map of the year's lightning strikes.")
+    args = add_profile_arguments(parser).parse_args()
+    with profile_run("create_timelapse", args.profile, profiler=args.profile_dump):
+        create_premium_timelapse()
@@ -0,0 +1,75 @@
+"""
+Green Energy Sentinel - Municipal Boundaries
+Builds the municipality GeoJSON that reverse_geocode (and so final_audit)
+names turbines with: the GADM 4.1 level-4 boundaries of Spain, filtered to
+Galicia (GID_1 ESP.15_1, the same GADM region as ESP.15_1.geojson).
+
+    python src/fetch_municipalities.py                         download from GADM
+    python src/fetch_municipalities.py --source gadm41_ESP_4.json.zip   use a local copy
+
+--source also accepts an unzipped GADM JSON, or any municipality GeoJSON
+(features without a GID_1 property are all kept).
+
+Layout:
+    data/galicia_municipalities.geojson   FeatureCollection, one feature per municipality (NAME_4)
+"""
+
+import argparse
+import io
+import json
+import os
+import zipfile
+import requests
+
+from config import GADM_MUNICIPALITIES_URL, MUNICIPALITIES_GEOJSON
+
+# Configuration
+GALICIA_GID = "ESP.15_1"
+REQUEST_TIMEOUT = 120
+
+
+def _read_source(source):
+    """Parsed GeoJSON of a .zip (first .json member), .json or .geojson file, or of the GADM download."""
+    if source is None:
+        print(f"🌐 Downloading GADM municipal boundaries from {GADM_MUNICIPALITIES_URL}...")
+        try:
+            response = requests.get(GADM_MUNICIPALITIES_URL, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise RuntimeError(f"Could not download {GADM_MUNICIPALITIES_URL} ({e}). "
+                               "Download it by hand and pass it with --source.") from e
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+    elif zipfile.is_zipfile(source):
+        archive = zipfile.ZipFile(source)
+    else:
+        with open(source, 'r') as f:
+            return json.load(f)
+    member = next(name for name in archive.namelist() if name.endswith((".json", ".geojson")))
+    with archive.open(member) as f:
+        return json.load(f)
+
+
+def fetch_municipalities(out=MUNICIPALITIES_GEOJSON, source=None, region=GALICIA_GID):
+    """Write the municipalities of GADM region `region` to `out`. Returns the feature count."""
+    data = _read_source(source)
+    features = [feature for feature in data.get('features', [data])
+                if feature.get('properties', {}).get('GID_1', region) == region]
+    if not features:
+        raise ValueError(f"No municipality of {region} in {source or GADM_MUNICIPALITIES_URL}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    tmp_path = f"{out}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+    os.replace(tmp_path, out)
+    print(f"✅ {len(features)} municipalities saved to: {os.path.abspath(out)}")
+    return len(features)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the Galicia municipal boundaries used to name turbines.")
+    parser.add_argument("--source", default=None,
+                        help="Local GADM .zip/.json (or any municipality GeoJSON) instead of downloading")
+    parser.add_argument("--out", default=MUNICIPALITIES_GEOJSON)
+    args = parser.parse_args()
+    fetch_municipalities(args.out, args.source)
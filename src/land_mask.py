@@ -0,0 +1,113 @@
+"""
+Green Energy Sentinel - Cached Land Mask
+Rasterizes the Galicia boundary once onto an analysis grid and caches the
+boolean result, so land checks become array lookups instead of per-point
+point-in-polygon tests against the full MultiPolygon. Masks are keyed by a
+hash of the geometry and the grid specification (transform + shape), so a
+changed boundary file or grid produces a new mask automatically.
+
+Layout:
+    data/land_mask/<key>.npy   boolean mask, north-up rows unless built from nodes
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+import shapely
+from rasterio.features import rasterize
+from rasterio.transform import Affine
+from shapely.geometry import shape
+
+from config import GALICIA_GEOJSON
+
+# Configuration
+LAND_MASK_CACHE_DIR = "data/land_mask"
+
+_loaded = {}  # cache key -> mask, kept warm between calls
+
+
+def load_boundary(path=GALICIA_GEOJSON):
+    """Shapely geometry of a GeoJSON Feature (or the union of a FeatureCollection)."""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if 'features' in data:
+        return shapely.union_all([shape(feature['geometry']) for feature in data['features']])
+    return shape(data['geometry'])
+
+
+def geometry_hash(geometry):
+    """Stable digest of a geometry (its normalized WKB)."""
+    return hashlib.sha1(shapely.to_wkb(shapely.normalize(geometry))).hexdigest()
+
+
+def mask_key(geometry, transform, out_shape, all_touched=False):
+    spec = json.dumps({"transform": list(transform)[:6], "shape": list(out_shape), "all_touched": all_touched})
+    return hashlib.sha1((geometry_hash(geometry) + spec).encode("utf-8")).hexdigest()[:16]
+
+
+def land_mask(geometry, transform, out_shape, all_touched=False, cache_dir=LAND_MASK_CACHE_DIR):
+    """Boolean mask of the pixels of a (transform, out_shape) grid whose centers lie in `geometry`.
+
+    The geometry must be in the grid's CRS. With all_touched=True every pixel
+    touched by the boundary counts as land. Results are cached on disk.
+    """
+    out_shape = tuple(int(n) for n in out_shape)
+    key = mask_key(geometry, transform, out_shape, all_touched)
+    if key in _loaded:
+        return _loaded[key]
+
+    path = os.path.join(cache_dir, f"{key}.npy")
+    if os.path.exists(path):
+        mask = np.load(path)
+    else:
+        mask = rasterize([(geometry, 1)], out_shape=out_shape, transform=transform,
+                         fill=0, all_touched=all_touched, dtype="uint8").astype(bool)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp.npy"
+        np.save(tmp_path, mask)
+        os.replace(tmp_path, path)
+    _loaded[key] = mask
+    return mask
+
+
+def node_grid_transform(lons, lats):
+    """North-up transform whose pixel centers are the nodes of an evenly spaced lon/lat grid."""
+    lons, lats = np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)
+    if len(lons) < 2 or len(lats) < 2:
+        raise ValueError("A node grid needs at least two nodes per axis")
+    dx = (lons[-1] - lons[0]) / (len(lons) - 1)
+    dy = (lats[-1] - lats[0]) / (len(lats) - 1)
+    if not (np.allclose(np.diff(lons), dx) and np.allclose(np.diff(lats), dy)):
+        raise ValueError("Node grid must be evenly spaced")
+    west = min(lons[0], lons[-1]) - abs(dx) / 2
+    north = max(lats[0], lats[-1]) + abs(dy) / 2
+    return Affine(abs(dx), 0.0, west, 0.0, -abs(dy), north)
+
+
+def land_mask_for_nodes(geometry, lons, lats, cache_dir=LAND_MASK_CACHE_DIR):
+    """Land mask for the nodes of a np.linspace lon/lat grid.
+
+    Rows follow `lats` and columns follow `lons` in the order given, like
+    np.meshgrid(lons, lats), so the mask lines up with grids built that way.
+    """
+    transform = node_grid_transform(lons, lats)
+    mask = land_mask(geometry, transform, (len(lats), len(lons)), cache_dir=cache_dir)
+    # The raster is north-up; flip to match ascending or descending node order
+    if lats[-1] > lats[0]:
+        mask = mask[::-1]
+    if lons[-1] < lons[0]:
+        mask = mask[:, ::-1]
+    return mask
+
+
+def sample_mask(mask, transform, lons, lats):
+    """Mask value at many lon/lat points (False outside the grid)."""
+    lons, lats = np.broadcast_arrays(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+    cols, rows = ~transform * (lons, lats)
+    rows = np.floor(rows).astype(int)
+    cols = np.floor(cols).astype(int)
+    inside = (rows >= 0) & (rows < mask.shape[0]) & (cols >= 0) & (cols < mask.shape[1])
+    values = np.zeros(lons.shape, dtype=bool)
+    values[inside] = mask[rows[inside], cols[inside]]
+    return values
@@ -4,121 +4,75 @@ Green Energy Sentinel - Historical Risk Analysis
 Uses DBSCAN Clustering to identify high-risk lightning zones based on January 2023 data.
 """
 
-import requests
-import json
 import os
-import time
+import sys
 import numpy as np
 import folium
 from folium import plugins
 from sklearn.cluster import DBSCAN
-from datetime import datetime, timedelta
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from config import END_DATE, START_DATE, WMS_PARKS_URL
+from strike_store import load_strikes, records_to_columns, strike_count
+from lightning_api import API_LIGHTNING_URL, MAX_CONCURRENCY
+from window_cache import sync_windows, iter_window_strikes, read_window_strikes
+from strike_stream import write_json_array
 
-# Configuration
-API_LIGHTNING_URL = "https://servizos.meteogalicia.gal/mgrss/observacion/jsonRaios.action"
-WMS_PARKS_URL = "https://ideg.xunta.gal/servizos/services/PBA/Afeccions_Enerxia/MapServer/WMSServer"
-# Targeting known active winter period - UPDATED TO FULL YEAR 2023
-START_DATE = "01/01/2023"
-END_DATE = "31/12/2023"
 
 # DBSCAN settings
 EPS_DEGREES = 0.05  # Approx 5km radius for clustering
 MIN_SAMPLES = 50    # Minimum strikes to form a "Cluster" (Increased for annual density)
 
-def fetch_historical_data():
-    all_strikes = []
-    
+def yearly_cache_files():
+    """One JSON cache per calendar year in [START_DATE, END_DATE] (ingested by strike_store)."""
+    first_year, last_year = int(START_DATE[-4:]), int(END_DATE[-4:])
+    return {year: os.path.abspath(f"data/strikes_{year}.json") for year in range(first_year, last_year + 1)}
+
+def fetch_historical_data(max_workers=MAX_CONCURRENCY, api_url=API_LIGHTNING_URL, refresh=False):
+    """Return the strikes in [START_DATE, END_DATE], downloading only the date windows not cached yet.
+
+    With refresh=True the window cache is synced (delta fetch) even if the
+    yearly JSON caches already exist.
+    """
     # CACHING LOGIC
-    CACHE_FILE = os.path.abspath("data/strikes_2023.json")
-    if os.path.exists(CACHE_FILE):
-        print(f"Loading cached data from {CACHE_FILE}...")
+    cache_files = yearly_cache_files()
+    if all(os.path.exists(path) for path in cache_files.values()) and not refresh:
+        print(f"Loading cached data from {', '.join(cache_files.values())}...")
         try:
-            with open(CACHE_FILE, 'r') as f:
-                return json.load(f)
+            return load_strikes(START_DATE, END_DATE)
         except:
-            print("Cache corrupted, re-fetching...")
+            print("Cache corrupted, rebuilding from window cache...")
 
-    # We can request chunks of days (e.g. 7 days as per PDF hint, but let's try monthly if possible or loop weekly)
-    # The user example showed a 5-day range. Let's do 5-day chunks to be safe.
-    current_date = datetime.strptime(START_DATE, "%d/%m/%Y")
-    final_end_date = datetime.strptime(END_DATE, "%d/%m/%Y")
-    
-    print(f"Fetching REAL historical data from {START_DATE} to {END_DATE}...")
-    
-    while current_date < final_end_date:
-        next_date = min(current_date + timedelta(days=6), final_end_date) # Increased chunk size slightly to speed up
-        
-        d_ini = f"{current_date.day}/{current_date.month}/{current_date.year}"
-        d_fin = f"{next_date.day}/{next_date.month}/{next_date.year}"
-        
-        params = {
-            "dataIni": d_ini,
-            "dataFin": d_fin
-        }
-        
-        try:
-            print(f"  Requesting {d_ini} - {d_fin}...", end=" ")
-            r = requests.get(API_LIGHTNING_URL, params=params, timeout=10)
-            
-            if r.status_code == 200:
-                data = r.json()
-                # Correct parsing logic based on confirmed structure:
-                # {"raios": [{"data": "...", "listaRaios": [...]}, ...]}
-                
-                days_list = data.get('raios', [])
-                chunk_strikes = 0
-                
-                for day_data in days_list:
-                    strikes = day_data.get('listaRaios', [])
-                    all_strikes.extend(strikes)
-                    chunk_strikes += len(strikes)
-                
-                print(f"Found {chunk_strikes} strikes.")
-            else:
-                print(f"Failed ({r.status_code})")
-                
-        except Exception as e:
-            print(f"Error: {e}")
-            
-        current_date = next_date + timedelta(days=1)
-        time.sleep(0.2) # Reduced sleep to speed up annual fetch
-
-    # Save to Cache
+    # 6-day windows are downloaded concurrently over a pooled session, rate-limited and retried.
+    # Every window is persisted in data/windows/ as it arrives, so reruns only fetch what is missing.
+    print(f"Fetching REAL historical data from {START_DATE} to {END_DATE} ({max_workers} concurrent)...")
+    fetched, failed = sync_windows(START_DATE, END_DATE, url=api_url, max_workers=max_workers)
+    if failed:
+        print(f"Warning: {failed} windows could not be downloaded (they will be retried on the next run).")
+
+    # Save to Cache (one file per year, picked up by the partitioned strike archive)
+    # Window partitions are streamed into the yearly file without materializing the year
     try:
         if not os.path.exists("data"): os.makedirs("data")
-        with open(CACHE_FILE, 'w') as f:
-            json.dump(all_strikes, f)
-        print(f"Data cached to {CACHE_FILE}")
+        for year, cache_file in cache_files.items():
+            count = write_json_array(cache_file, iter_window_strikes(f"01/01/{year}", f"31/12/{year}"))
+            print(f"Data cached to {cache_file} ({count} strikes)")
+        return load_strikes(START_DATE, END_DATE)
     except Exception as e:
         print(f"Could not save cache: {e}")
         
-    return all_strikes
+    return records_to_columns(read_window_strikes(START_DATE, END_DATE))[0]
 
 def analyze_risk(strikes):
-    if not strikes:
+    if not strike_count(strikes):
         print("No data found. Check internet connection or API availability.")
         return
 
-    print(f"Analyzing {len(strikes)} total REAL strikes for 2023...")
+    print(f"Analyzing {strike_count(strikes)} total REAL strikes for 2023...")
     
     # Extract coordinates
-    coords = []
-    valid_strikes = [] # Keep metadata
-    
-    for s in strikes:
-        try:
-            # Structure: {"fecha":..., "lat":..., "lon":..., "peakCurrent":...}
-            lat = float(s['lat'])
-            lon = float(s['lon'])
-            # Filter for Galicia bounds approx (sometimes API returns broad area)
-            if 41.5 < lat < 44.5 and -9.5 < lon < -6.5:
-                coords.append([lat, lon])
-                valid_strikes.append(s)
-        except:
-            pass
-            
-    X = np.array(coords)
+    # (Strikes outside the Galicia bounds were already quarantined at ingest by strike_validation)
+    X = np.column_stack((strikes['lat'], strikes['lon'])).astype(float)
     
     if len(X) < 10:
         print("Not enough points for clustering.")
@@ -132,7 +86,7 @@ def analyze_risk(strikes):
     n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
     print(f"Found {n_clusters} High Risk Zones (Clusters).")
     
-    generate_map(X, labels, valid_strikes)
+    generate_map(X, labels, strikes)
 
 def generate_map(X, labels, strikes_meta):
     print("Generating Sentinel Annual Risk Map...")
@@ -5,9 +5,9 @@ Downloads Wind Parks vector data and intersects it with Lightning Clusters (2023
 to generate a quantitative risk report.
 """
 
-import requests
 import json
 import os
+import sys
 import numpy as np
 import pandas as pd
 import geopandas as gpd
@@ -17,54 +17,27 @@ from datetime import datetime, timedelta
 
 # Re-use fetch logic or import from analyze_risk if refactored.
 # For simplicity, self-contained here.
-from analyze_risk import fetch_historical_data, EPS_DEGREES, MIN_SAMPLES
+from analyze_risk import fetch_historical_data, EPS_DEGREES, MIN_SAMPLES, START_DATE, END_DATE
 
-# Using OpenStreetMap Overpass API as a reliable open source for Wind Turbines
-WFS_PARKS_URL = "http://overpass-api.de/api/interpreter"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from spatial_index import count_within
+from turbine_inventory import load_turbines
+
+# Local exposure radius reported for every flagged park (matches the DBSCAN eps)
+EXPOSURE_RADIUS_M = 5000
 
 def download_wind_parks_vector():
-    print("Downloading Wind Turbines from OpenStreetMap (Overpass API)...")
-    
-    # Query for wind turbines in Galicia Bounding Box approx (South, West, North, East)
-    overpass_query = """
-    [out:json];
-    (
-      node["power"="generator"]["generator:source"="wind"](41.8,-9.3,43.8,-6.7);
-      way["power"="generator"]["generator:source"="wind"](41.8,-9.3,43.8,-6.7);
-      relation["power"="generator"]["generator:source"="wind"](41.8,-9.3,43.8,-6.7);
-    );
-    out center;
-    """
-    
-    try:
-        r = requests.post(WFS_PARKS_URL, data=overpass_query, timeout=25)
-        if r.status_code == 200:
-            data = r.json()
-            elements = data.get('elements', [])
-            
-            # Convert to GeoDataFrame
-            points = []
-            names = []
-            
-            for el in elements:
-                lat, lon = None, None
-                if 'lat' in el and 'lon' in el:
-                    lat, lon = el['lat'], el['lon']
-                elif 'center' in el:
-                    lat, lon = el['center']['lat'], el['center']['lon']
-                
-                if lat and lon:
-                    points.append(Point(lon, lat))
-                    names.append(el.get('tags', {}).get('name', 'Aerogenerador Desconocido'))
-            
-            gdf = gpd.GeoDataFrame({'NOME': names, 'geometry': points}, crs="EPSG:4326")
-            return gdf
-        else:
-            print(f"Error fetching OSM data: {r.status_code}")
-            return None
-    except Exception as e:
-        print(f"Error: {e}")
+    print("Loading Wind Turbines from the OpenStreetMap inventory (cached Overpass query)...")
+    turbines = load_turbines()
+    if turbines is None:
         return None
+    
+    # Convert to GeoDataFrame
+    return gpd.GeoDataFrame(
+        {'NOME': np.where(turbines['name'] != '', turbines['name'], 'Aerogenerador Desconocido')},
+        geometry=gpd.points_from_xy(turbines['lon'], turbines['lat']),
+        crs="EPSG:4326"
+    )
 
 def generate_risk_report():
     # 1. Get Parks
@@ -79,20 +52,12 @@ def generate_risk_report():
     # Note: verify if analyze_risk.py is accessible or copy function
     strikes = fetch_historical_data() 
     
-    # Quick conversion to coords
-    coords = []
-    for s in strikes:
-        try:
-             # Ensure lat/lon 
-             coords.append([float(s['lon']), float(s['lat'])]) # GeoPandas uses (x,y) = (lon, lat)
-        except:
-             pass
-    
-    if not coords:
+    if strikes is None or len(strikes['lat']) == 0:
         print("No lightning data.")
         return
 
-    X = np.array(coords) # lon, lat columns
+    # GeoPandas uses (x,y) = (lon, lat)
+    X = np.column_stack((strikes['lon'], strikes['lat'])).astype(float) # lon, lat columns
 
     # 3. Clustering
     # DBSCAN needs Euclidean distance. For accurate meters, we should project.
@@ -143,6 +108,11 @@ def generate_risk_report():
     # Which parks are WITHIN risk zones?
     high_risk_parks = gpd.sjoin(parks_gdf, risk_gdf, how="inner", predicate="intersects")
     
+    # Strikes around each flagged park, answered by the persistent spatial index
+    if not high_risk_parks.empty:
+        park_coords = np.column_stack((high_risk_parks.geometry.x, high_risk_parks.geometry.y))
+        high_risk_parks['rayos_5km'] = count_within(EXPOSURE_RADIUS_M, park_coords, START_DATE, END_DATE)
+    
     # 6. Output Report
     print("\n" + "="*50)
     print("AUDITORÍA DE RIESGO - PARQUES EÓLICOS GALICIA (2023)")
@@ -155,7 +125,7 @@ def generate_risk_report():
         
         # Clean columns to display (depends on WFS schema)
         # Usually 'nombre', 'denominacion', etc. Let's list available columns nicely
-        cols = [c for c in ['Denominaci', 'NOME', 'MUNICIPIO', 'PROVINCIA', 'strikes_count'] if c in high_risk_parks.columns or 'strikes' in c]
+        cols = [c for c in ['Denominaci', 'NOME', 'MUNICIPIO', 'PROVINCIA', 'strikes_count', 'rayos_5km'] if c in high_risk_parks.columns or 'strikes' in c]
         
         # If no clear name column, create simple report
         print(high_risk_parks[cols].to_string())
@@ -4,60 +4,51 @@ Green Energy Sentinel - Final Scientific Audit
 Validates the 'Lightning Attraction Hypothesis' and identifies vulnerable wind parks.
 """
 
-import requests
+import argparse
 import json
 import os
+import sys
 import numpy as np
 import pandas as pd
-import geopandas as gpd
-from shapely.geometry import Point
-from geopy.geocoders import Nominatim
-from analyze_risk import fetch_historical_data
+from analyze_risk import fetch_historical_data, START_DATE, END_DATE
 from datetime import datetime
-import time
 
-# Using OpenStreetMap Overpass API
-WFS_PARKS_URL = "http://overpass-api.de/api/interpreter"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from strike_store import strike_count
+from spatial_index import count_within, strikes_within
+from turbine_inventory import load_turbines, turbine_names, turbines_to_gdf
+from config import MUNICIPALITIES_GEOJSON
+from reverse_geocode import FALLBACK_NAME, reverse_geocode
+from profiling import add_profile_arguments, profile_run, span
+
+TOP_PRINTED = 5  # Turbines listed on screen (the CSV holds the full ranking)
+
+def warn_missing_municipalities(path):
+    """Loud warning that turbines cannot be named (the audit still runs)."""
+    print("=" * 70)
+    print(f"⚠️ WARNING: municipal boundaries not found ({path}).")
+    print(f"   Every turbine will be labelled '{FALLBACK_NAME}' in the ranking and the report.")
+    print("   Build them with: python src/fetch_municipalities.py  (or sentinel audit --municipalities <file>)")
+    print("=" * 70)
 
 def get_wind_parks_osm():
-    print("Downloading Wind Turbines from OpenStreetMap...")
-    query = """
-    [out:json];
-    (
-      node["power"="generator"]["generator:source"="wind"](41.8,-9.3,43.8,-6.7);
-      way["power"="generator"]["generator:source"="wind"](41.8,-9.3,43.8,-6.7);
-    );
-    out center;
-    """
-    try:
-        r = requests.post(WFS_PARKS_URL, data=query, timeout=30)
-        if r.status_code != 200: return None
+    print("Loading Wind Turbines from the OpenStreetMap inventory...")
+    with span("load turbines") as s:
+        turbines = load_turbines()
+        if turbines is None:
+            return None
         
-        data = r.json()
-        points = []
-        tags_list = []
-        
-        for el in data.get('elements', []):
-            lat, lon = None, None
-            if 'lat' in el: lat, lon = el['lat'], el['lon']
-            elif 'center' in el: lat, lon = el['center']['lat'], el['center']['lon']
-            
-            if lat:
-                points.append(Point(lon, lat))
-                # Try to find a name, or at least a 'farm' name
-                tags = el.get('tags', {})
-                name = tags.get('name', 'Unknown')
-                if name == 'Unknown':
-                    name = tags.get('wind_farm', 'Parque Desconocido')
-                tags_list.append({'name': name, 'id': el['id']})
-                
-        gdf = gpd.GeoDataFrame(tags_list, geometry=points, crs="EPSG:4326")
-        return gdf
-    except Exception as e:
-        print(f"Error OSM: {e}")
-        return None
+        # Name, or at least the 'farm' name
+        gdf = turbines_to_gdf(turbines)[['id', 'geometry']]
+        gdf.insert(0, 'name', turbine_names(turbines, 'Parque Desconocido'))
+        s.count(len(gdf))
+    return gdf
+
+def analyze_attraction_hypothesis(municipalities=MUNICIPALITIES_GEOJSON):
+    named = os.path.exists(municipalities)
+    if not named:
+        warn_missing_municipalities(municipalities)
 
-def analyze_attraction_hypothesis():
     # 1. Load Data
     print("--- FASE 1: Carga de Datos ---")
     parks = get_wind_parks_osm()
@@ -69,22 +60,16 @@ def analyze_attraction_hypothesis():
     
     # Fetch REAL 2023 data (cached or fetch)
     # Re-using the fetch logic but ensuring we have the data
-    strikes_raw = fetch_historical_data()
-    
-    coords = []
-    for s in strikes_raw:
-        try:
-             coords.append(Point(float(s['lon']), float(s['lat'])))
-        except: pass
-    
-    strikes_gdf = gpd.GeoDataFrame(geometry=coords, crs="EPSG:4326")
-    print(f"  > Rayos analizados (2023): {len(strikes_gdf)}")
+    with span("load strikes") as s:
+        strikes_raw = fetch_historical_data()
+        s.count(strike_count(strikes_raw))
+    print(f"  > Rayos analizados (2023): {strike_count(strikes_raw)}")
     
     # 2. Assign Name to Parks (Clustering + Reverse Geocoding)
     # Only nice-to-have, let's focus on the math first
     # We will project to meters for distance calculation (EPSG:25829 UTM 29N)
     parks_m = parks.to_crs("EPSG:25829")
-    strikes_m = strikes_gdf.to_crs("EPSG:25829")
+    turbines_xy = np.column_stack((parks_m.geometry.x, parks_m.geometry.y))
     
     # 3. Validation Hypothesis: "Attraction"
     print("\n--- FASE 2: Validación Científica (Efecto Atracción) ---")
@@ -93,17 +78,17 @@ def analyze_attraction_hypothesis():
     buffer_direct = parks_m.geometry.buffer(500)
     buffer_vicinity = parks_m.geometry.buffer(5000)
     
-    # Count strikes in Direct Hits (Union to avoid double counting overlaps)
-    direct_zone = buffer_direct.unary_union
-    vicinity_zone = buffer_vicinity.unary_union
+    # Union zones are only needed for their area (overlaps counted once)
+    with span("buffer unions") as s:
+        direct_zone = buffer_direct.unary_union
+        vicinity_zone = buffer_vicinity.unary_union
+        s.count(len(buffer_direct) + len(buffer_vicinity))
     
-    # Intersections
-    # Optimization: using spatial index
-    strikes_direct = strikes_m[strikes_m.geometry.within(direct_zone)]
-    strikes_vicinity = strikes_m[strikes_m.geometry.within(vicinity_zone)]
-    
-    count_direct = len(strikes_direct)
-    count_vicinity = len(strikes_vicinity)
+    # Strikes near any turbine, each counted once (persistent spatial index over the archive)
+    with span("strikes near turbines") as s:
+        count_direct = strike_count(strikes_within(500, turbines_xy, START_DATE, END_DATE, projected=True))
+        count_vicinity = strike_count(strikes_within(5000, turbines_xy, START_DATE, END_DATE, projected=True))
+        s.count(count_vicinity)
     
     # Calculate Areas (km2)
     area_direct_km2 = direct_zone.area / 1e6
@@ -129,54 +114,50 @@ def analyze_attraction_hypothesis():
     # 4. Identification of "Cursed" Parks
     print("\n--- FASE 3: Ranking de Parques Criticos ---")
     
-    # Spatial Join to link strikes to specific turbines
-    # We use a 1km buffer for "Attributed to Turbine"
-    turbines_risk = gpd.sjoin(parks_m, strikes_m, how="inner", predicate="dwithin", distance=1000)
-    
-    # Group by Turbine ID/Name
-    risk_counts = turbines_risk.groupby(turbines_risk.index).size().reset_index(name='rayos_1km')
-    
-    # Merge back to get names
-    parks_risk = parks_m.merge(risk_counts, left_index=True, right_on='index', how='left').fillna(0)
-    parks_risk = parks_risk.sort_values('rayos_1km', ascending=False)
-    
-    # Reverse Geocoding for Top 5 to get Municipality Name
-    geolocator = Nominatim(user_agent="green_energy_sentinel_audit")
-    
-    print("Top 5 Turbinas 'Pararrayos':")
-    top_5 = parks_risk.head(5)
-    
-    results = []
-    
-    for idx, row in top_5.iterrows():
-        # Reproject back to lat/lon for geocoding
-        pt_geo = parks.loc[row['index']].geometry
-        lat, lon = pt_geo.y, pt_geo.x
-        
-        location = "Desconocido"
-        try:
-            # Rate limit
-            time.sleep(1)
-            loc = geolocator.reverse(f"{lat}, {lon}")
-            if loc:
-                address = loc.raw.get('address', {})
-                location = address.get('municipality', address.get('town', 'Galicia Rural'))
-        except: pass
-        
-        print(f"  #{idx+1} [{location}]: {int(row['rayos_1km'])} impactos en 2023.")
-        results.append({
-            'Ranking': idx+1,
-            'Municipio': location,
-            'Rayos_Cercanos': int(row['rayos_1km']),
-            'Lat': lat,
-            'Lon': lon
-        })
+    # Strikes attributed to each turbine: 1km radius
+    parks_risk = parks_m.copy()
+    parks_risk['index'] = parks_m.index
+    with span("strikes per turbine") as s:
+        parks_risk['rayos_1km'] = count_within(1000, turbines_xy, START_DATE, END_DATE, projected=True)
+        s.count(len(turbines_xy))
+    parks_risk = parks_risk.sort_values('rayos_1km', ascending=False).reset_index(drop=True)
+    
+    # Municipality of every turbine in one offline point-in-polygon lookup
+    lonlat = parks.loc[parks_risk['index']].geometry
+    parks_risk['Lat'] = lonlat.y.to_numpy()
+    parks_risk['Lon'] = lonlat.x.to_numpy()
+    if named:
+        with span("reverse geocode") as s:
+            parks_risk['Municipio'] = reverse_geocode(parks_risk['Lon'], parks_risk['Lat'], path=municipalities)
+            s.count(len(parks_risk))
+    else:
+        parks_risk['Municipio'] = FALLBACK_NAME
+    
+    print(f"Top {TOP_PRINTED} Turbinas 'Pararrayos':")
+    for idx, row in parks_risk.head(TOP_PRINTED).iterrows():
+        print(f"  #{idx+1} [{row['Municipio']}]: {int(row['rayos_1km'])} impactos en 2023.")
+    
+    # Full ranking, every turbine named
+    results = pd.DataFrame({
+        'Ranking': np.arange(1, len(parks_risk) + 1),
+        'Municipio': parks_risk['Municipio'],
+        'Rayos_Cercanos': parks_risk['rayos_1km'].astype(int),
+        'Lat': parks_risk['Lat'],
+        'Lon': parks_risk['Lon']
+    })
         
     # Save Report
-    df_res = pd.DataFrame(results)
-    df_res.to_csv("reports/informe_final_cientifico.csv", index=False)
+    with span("save report"):
+        results.to_csv("reports/informe_final_cientifico.csv", index=False)
     print("\n Informe guardado en: reports/informe_final_cientifico.csv")
+    if not named:
+        warn_missing_municipalities(municipalities)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lightning attraction audit of the wind turbines.")
+    parser.add_argument("--municipalities", default=MUNICIPALITIES_GEOJSON,
+                        help="Municipal boundary GeoJSON used to name turbines (see fetch_municipalities.py)")
+    args = add_profile_arguments(parser).parse_args()
     if not os.path.exists("reports"): os.makedirs("reports")
-    analyze_attraction_hypothesis()
+    with profile_run("final_audit", args.profile, profiler=args.profile_dump):
+        analyze_attraction_hypothesis(args.municipalities)
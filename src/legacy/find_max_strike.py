@@ -1,19 +1,28 @@
 
-import json
-import pandas as pd
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from config import END_DATE, START_DATE
+from strike_store import load_strikes, format_fecha
 
 def find_max_strike():
-    with open('data/strikes_2023.json', 'r') as f:
-        data = json.load(f)
-    
-    df = pd.DataFrame(data)
+    strikes = load_strikes(START_DATE, END_DATE)
     
     # Handle potentially missing peakCurrent
-    df['peakCurrent'] = pd.to_numeric(df['peakCurrent'], errors='coerce').fillna(0)
+    peak = np.nan_to_num(strikes['peak'])
+    
+    def strike_at(idx):
+        return {
+            'peakCurrent': float(peak[idx]),
+            'fecha': format_fecha(strikes['time'][idx]),
+            'lat': round(float(strikes['lat'][idx]), 5),
+            'lon': round(float(strikes['lon'][idx]), 5),
+        }
     
     # Get the row with the maximum absolute intensity
-    max_idx = df['peakCurrent'].abs().idxmax()
-    max_strike = df.loc[max_idx]
+    max_strike = strike_at(np.abs(peak).argmax())
     
     print("-" * 30)
     print("⚡ MOST POWERFUL STRIKE ⚡")
@@ -24,8 +33,8 @@ def find_max_strike():
     print(f"Longitude: {max_strike['lon']}")
     
     # Also find max positive and max negative specifically
-    max_pos = df.loc[df['peakCurrent'].idxmax()]
-    max_neg = df.loc[df['peakCurrent'].idxmin()]
+    max_pos = strike_at(peak.argmax())
+    max_neg = strike_at(peak.argmin())
     
     print("\n--- Extremes by Polarity ---")
     print(f"Max Positive: {max_pos['peakCurrent']} kA on {max_pos['fecha']}")
@@ -10,11 +10,35 @@ import pandas as pd
 import numpy as np
 import folium
 import os
+import sys
+import shapely
 from shapely.geometry import Point
 from sklearn.cluster import DBSCAN
-from analyze_risk import fetch_historical_data, EPS_DEGREES, MIN_SAMPLES
+from analyze_risk import fetch_historical_data, EPS_DEGREES, MIN_SAMPLES, START_DATE, END_DATE
 from final_audit import get_wind_parks_osm
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from spatial_index import count_within, project
+from land_mask import land_mask, load_boundary, sample_mask
+from rasterio.transform import from_origin
+
+# Candidate search
+SAFETY_RADIUS_M = 2000   # No strike closer than this to a proposed turbine
+MAX_CANDIDATES = 20
+MAX_ATTEMPTS = 10000
+LAND_PIXEL_M = 100       # Land mask resolution (expansion rings around coastal parks reach the sea)
+
+def galicia_land_mask(bounds):
+    """Cached land mask (EPSG:25829, LAND_PIXEL_M pixels) covering `bounds`. Returns (mask, transform)."""
+    minx, miny, maxx, maxy = bounds
+    # Snap the grid to whole pixels so nearby extents share cached masks
+    west, north = np.floor(minx / LAND_PIXEL_M) * LAND_PIXEL_M, np.ceil(maxy / LAND_PIXEL_M) * LAND_PIXEL_M
+    width = int(np.ceil((maxx - west) / LAND_PIXEL_M))
+    height = int(np.ceil((north - miny) / LAND_PIXEL_M))
+    transform = from_origin(west, north, LAND_PIXEL_M, LAND_PIXEL_M)
+    galicia_m = gpd.GeoSeries([load_boundary()], crs="EPSG:4326").to_crs("EPSG:25829").iloc[0]
+    return land_mask(galicia_m, transform, (height, width)), transform
+
 def propose_sites():
     print("--- INICIANDO PROTOCOLO DE PROSPECCION ---")
     
@@ -41,33 +65,13 @@ def propose_sites():
     strikes_raw = fetch_historical_data()
     
     # Check if we have data
-    if not strikes_raw:
+    if strikes_raw is None or len(strikes_raw['lat']) == 0:
         print("Advertencia: No hay datos de rayos. Asumiendo riesgo cero (poco realista).")
         risk_coords = np.empty((0, 2))
     else:
-        # Extract coordinates directly for KDTree (lon, lat) -> Project to Meters
-        # We process manually to avoid heavy GeoPandas overhead for points
-        coords_ll = []
-        for s in strikes_raw:
-            try: coords_ll.append([float(s['lon']), float(s['lat'])])
-            except: pass
-        
-        # Project to EPSG:25829 (UTM Zone 29N) for meter accuracy
-        # Simple approximation or using transformer
-        from pyproj import Transformer
-        transformer = Transformer.from_crs("EPSG:4326", "EPSG:25829", always_xy=True)
-        
-        # Transform all points at once
-        if coords_ll:
-            coords_ll = np.array(coords_ll)
-            xx, yy = transformer.transform(coords_ll[:, 0], coords_ll[:, 1])
-            risk_coords = np.column_stack((xx, yy))
-        else:
-            risk_coords = np.empty((0, 2))
-
-    # Build KDTree for super-fast spatial queries
-    from scipy.spatial import cKDTree
-    risk_tree = cKDTree(risk_coords) if len(risk_coords) > 0 else None
+        # Lon/lat kept for the heatmap; distance checks go through the persistent spatial index
+        coords_ll = np.column_stack((strikes_raw['lon'], strikes_raw['lat'])).astype(float)
+        risk_coords = np.column_stack(project(coords_ll[:, 0], coords_ll[:, 1]))
 
     # 4. Generate Candidates & Filter
     print("  > Buscando micro-ubicaciones optimas (Algoritmo Rapido)...")
@@ -75,32 +79,24 @@ def propose_sites():
     # Get bounds of expansion zones
     minx, miny, maxx, maxy = expansion_zones.bounds
     
-    candidates = []
-    attempts = 0
-    max_attempts = 10000 
-    
-    while len(candidates) < 20 and attempts < max_attempts:
-        attempts += 1
-        # Random point in bounding box
-        rx = np.random.uniform(minx, maxx)
-        ry = np.random.uniform(miny, maxy)
-        pt = Point(rx, ry)
-        
-        # 1. Must be in Safe Expansion Zone (High Wind)
-        if not expansion_zones.contains(pt):
-            continue
-            
-        # 2. Must be away from Lightning (Low Risk)
-        # Check distance to nearest lightning strike
-        is_safe = True
-        if risk_tree:
-            # Query nearest neighbor. If distance < 2000m (2km), it's risky.
-            dist, _ = risk_tree.query([rx, ry], k=1)
-            if dist < 2000: # 2km safety buffer
-                is_safe = False
-        
-        if is_safe:
-            candidates.append(pt)
+    # Draw every random candidate at once and test them in bulk
+    rx = np.random.uniform(minx, maxx, MAX_ATTEMPTS)
+    ry = np.random.uniform(miny, maxy, MAX_ATTEMPTS)
+    
+    # 1. Must be in Safe Expansion Zone (High Wind), on land
+    in_zone = shapely.contains_xy(expansion_zones, rx, ry)
+    in_zone &= sample_mask(*galicia_land_mask(expansion_zones.bounds), rx, ry)
+    
+    # 2. Must be away from Lightning (Low Risk): no strike within the safety radius
+    is_safe = in_zone.copy()
+    if len(risk_coords) > 0 and in_zone.any():
+        zone_xy = np.column_stack((rx[in_zone], ry[in_zone]))
+        is_safe[in_zone] = count_within(SAFETY_RADIUS_M, zone_xy, START_DATE, END_DATE, projected=True) == 0
+    
+    # Keep the first MAX_CANDIDATES hits, as the sequential search would
+    hits = np.flatnonzero(is_safe)[:MAX_CANDIDATES]
+    attempts = int(hits[-1]) + 1 if len(hits) == MAX_CANDIDATES else MAX_ATTEMPTS
+    candidates = [Point(x, y) for x, y in zip(rx[hits], ry[hits])]
             
     # 5. Report & Map
     if not candidates:
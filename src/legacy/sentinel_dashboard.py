@@ -8,16 +8,14 @@ import folium
 import requests
 import json
 import os
+import sys
 from datetime import datetime, timedelta
 import folium.plugins as plugins
 
-# Configuration
-WMS_PARKS_URL = "https://ideg.xunta.gal/servizos/services/PBA/Afeccions_Enerxia/MapServer/WMSServer"
-WMS_WIND_URL = "https://mandeo.meteogalicia.es/thredds/wms/modelos/wasp/wasp_hist/wasp_hist_best.ncd"
-API_LIGHTNING_URL = "https://servizos.meteogalicia.gal/mgrss/observacion/jsonRaios.action"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from config import API_LIGHTNING_URL, GALICIA_CENTER, WMS_PARKS_URL, WMS_WIND_URL
 
 # Constants
-GALICIA_CENTER = [42.8, -8.0]
 RISK_RADIUS_METERS = 2000 # 2km warning zone
 
 def get_lightning_data(hours_back=24):
@@ -9,7 +9,6 @@ HOW IT LEARNS:
 3. Model: Learns to distinguish 'Strike Conditions' vs 'Calm Conditions'.
 """
 
-import json
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -18,31 +17,26 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix
 import os
+import sys
 
-# Configuration
-LIGHTNING_FILE = "data/strikes_2023.json"
-GALICIA_BOUNDS = {
-    "lat_min": 41.8, "lat_max": 43.8,
-    "lon_min": -9.3, "lon_max": -6.7
-}
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from config import END_DATE, GALICIA_BOUNDS, START_DATE
+from strike_store import load_strikes, strikes_to_frame
+from land_mask import land_mask_for_nodes, load_boundary
 
 def train_and_predict():
     print("🧠 Training Lightning Risk Model...")
 
     # 1. Load Data (Positive Class)
-    if not os.path.exists(LIGHTNING_FILE):
+    try:
+        strikes = load_strikes(START_DATE, END_DATE)
+    except FileNotFoundError:
         print("❌ Data file not found.")
         return
-
-    with open(LIGHTNING_FILE, 'r') as f:
-        data = json.load(f)
     
-    df_pos = pd.DataFrame(data)
-    df_pos['fecha'] = pd.to_datetime(df_pos['fecha'])
+    df_pos = strikes_to_frame(strikes)
     
     # Feature Engineering (Extract patterns)
-    df_pos['lat'] = df_pos['lat'].astype(float)
-    df_pos['lon'] = df_pos['lon'].astype(float)
     df_pos['month'] = df_pos['fecha'].dt.month
     df_pos['hour'] = df_pos['fecha'].dt.hour
     df_pos['day_of_year'] = df_pos['fecha'].dt.dayofyear
@@ -117,26 +111,27 @@ def train_and_predict():
     grid_lat = np.linspace(GALICIA_BOUNDS["lat_min"], GALICIA_BOUNDS["lat_max"], 100)
     grid_lon = np.linspace(GALICIA_BOUNDS["lon_min"], GALICIA_BOUNDS["lon_max"], 100)
     
-    prediction_grid = []
-    for lat in grid_lat:
-        for lon in grid_lon:
-            prediction_grid.append({
-                'lat': lat,
-                'lon': lon,
-                'month': 8,      # August
-                'hour': 16,      # 4 PM
-            })
-            
-    X_pred = pd.DataFrame(prediction_grid)
-    
-    # Ask the model for PROBABILITIES (Risk %)
-    risk_probs = clf.predict_proba(X_pred)[:, 1] # Probability of class 1 (Strike)
+    lon_grid, lat_grid = np.meshgrid(grid_lon, grid_lat)
+    
+    # Only land cells are predicted (cached rasterized Galicia boundary)
+    on_land = land_mask_for_nodes(load_boundary(), grid_lon, grid_lat)
+    
+    X_pred = pd.DataFrame({
+        'lat': lat_grid[on_land],
+        'lon': lon_grid[on_land],
+        'month': 8,      # August
+        'hour': 16,      # 4 PM
+    })
+    
+    # Ask the model for PROBABILITIES (Risk %), sea cells stay blank
+    risk_probs = np.full(on_land.shape, np.nan)
+    risk_probs[on_land] = clf.predict_proba(X_pred)[:, 1] # Probability of class 1 (Strike)
     
     # 5. Visualize Prediction
     plt.figure(figsize=(10, 8))
     
-    # Reshape for contour plot
-    risk_matrix = risk_probs.reshape(100, 100)
+    # Already shaped like the grid (rows = latitudes)
+    risk_matrix = risk_probs
     
     plt.imshow(risk_matrix, extent=[GALICIA_BOUNDS["lon_min"], GALICIA_BOUNDS["lon_max"], 
                                    GALICIA_BOUNDS["lat_min"], GALICIA_BOUNDS["lat_max"]],
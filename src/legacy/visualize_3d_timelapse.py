@@ -6,49 +6,44 @@ Lightning strikes appear as 3D columns that pop up and fade out over time.
 """
 
 import json
-import pandas as pd
 import os
+import sys
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from config import END_DATE, START_DATE
+from strike_store import strikes_between
+
 # Configuration
-LIGHTNING_FILE = "data/strikes_2023.json"
 OUTPUT_FILE = "maps/lightning_3d_timelapse.html"
+BATCH_SIZE = 10000  # Strikes serialized per write
+DATA_PLACEHOLDER = "__STRIKE_DATA__"
 
 def create_3d_timelapse():
     print("🌍 Preparing data for 3D Cinematic Timelapse...")
     
-    if not os.path.exists(LIGHTNING_FILE):
+    try:
+        strikes = strikes_between(START_DATE, END_DATE)
+    except FileNotFoundError:
         print("❌ Data file not found.")
         return
-        
-    with open(LIGHTNING_FILE, 'r') as f:
-        data = json.load(f)
     
     # Process data to be as light as possible for the browser
     # We only need lat, lon, peakCurrent, and timestamp (as epoch)
-    processed_data = []
-    for d in data:
-        try:
-            # Convert timestamp to milliseconds epoch
-            dt = pd.to_datetime(d['fecha'])
-            timestamp = int(dt.timestamp() * 1000)
-            
-            processed_data.append({
-                'p': [float(d['lon']), float(d['lat'])], # Position
-                'i': float(d['peakCurrent']),           # Intensity
-                't': timestamp                          # Time
-            })
-        except:
-            continue
+    selected = np.flatnonzero(np.isfinite(strikes['peak']))
             
     # Sample if too many for a smooth browser experience (100k is okay, but let's be safe)
-    if len(processed_data) > 50000:
-        print(f"⚠️ Sampling 50,000 strikes for browser performance (from {len(processed_data)})")
-        processed_data = processed_data[::len(processed_data)//50000]
+    if len(selected) > 50000:
+        print(f"⚠️ Sampling 50,000 strikes for browser performance (from {len(selected)})")
+        selected = selected[::len(selected)//50000]
+
+    if len(selected) == 0:
+        print("❌ No strikes with intensity data.")
+        return
 
-    # Min/Max time for the slider
-    min_time = min(p['t'] for p in processed_data)
-    max_time = max(p['t'] for p in processed_data)
+    # Min/Max time for the slider (milliseconds epoch)
+    min_time = int(strikes['time'][selected].min()) * 1000
+    max_time = int(strikes['time'][selected].max()) * 1000
 
     # HTML Template with Deck.gl and custom JS for animation
     html_template = f"""
@@ -146,7 +141,7 @@ def create_3d_timelapse():
     <script>
         const {{DeckGL, ColumnLayer, HeatmapLayer}} = deck;
 
-        const data = {json.dumps(processed_data)};
+        const data = {DATA_PLACEHOLDER};
         
         let currentTime = {min_time};
         let isPlaying = false;
@@ -242,8 +237,31 @@ def create_3d_timelapse():
 </html>
     """
 
+    # The data array is streamed into the page in batches instead of one giant json.dumps
+    html_head, html_tail = html_template.split(DATA_PLACEHOLDER)
     with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write(html_template)
+        f.write(html_head)
+        f.write("[")
+        for start in range(0, len(selected), BATCH_SIZE):
+            batch = selected[start:start + BATCH_SIZE]
+            points = [
+                {
+                    'p': [lon, lat], # Position
+                    'i': peak,       # Intensity
+                    't': t           # Time
+                }
+                for lon, lat, peak, t in zip(
+                    strikes['lon'][batch].astype(float).tolist(),
+                    strikes['lat'][batch].astype(float).tolist(),
+                    strikes['peak'][batch].astype(float).tolist(),
+                    (strikes['time'][batch] * 1000).tolist(),
+                )
+            ]
+            if start:
+                f.write(", ")
+            f.write(json.dumps(points)[1:-1])
+        f.write("]")
+        f.write(html_tail)
         
     print(f"🎬 3D Timelapse generated: {os.path.abspath(OUTPUT_FILE)}")
     print("Ready to be shared!")
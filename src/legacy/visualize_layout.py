@@ -8,17 +8,17 @@ import folium
 import requests
 import json
 import os
+import sys
 from owslib.wms import WebMapService
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from config import GALICIA_CENTER, WMS_PARKS_URL as WMS_URL
+
 # Configuration
-WMS_URL = "https://ideg.xunta.gal/servizos/services/PBA/Afeccions_Enerxia/MapServer/WMSServer"
 LAYER_WIND_PARKS = "6"  # Eólica. Posición (Layer 6 from movida_de_energia.txt)
 LAYER_WIND_AREA = "5"   # Eólica. Área (Optional, likely exists)
 LAYER_POWER_LINES = "9" # Liñas eléctricas. Existentes (Layer 9 from movida_de_energia.txt)
 
-# Center of Galicia approximate
-GALICIA_CENTER = [42.8, -8.0]
-
 def create_wind_map(output_file="maps/mapa_eolico_galicia.html"):
 
     # Connect to WMS (OWSLib) - not strictly necessary for Folium but good for checking
@@ -0,0 +1,140 @@
+"""
+Green Energy Sentinel - MeteoGalicia Lightning API Client
+Concurrent, rate-limited downloader for the historical lightning endpoint.
+Date windows are fetched from a thread pool sharing one pooled HTTP session,
+with a token bucket capping the request rate and exponential backoff retries.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import API_LIGHTNING_URL
+from strike_stream import CHUNK_SIZE, iter_raios
+
+# Configuration
+WINDOW_DAYS = 6           # Days per request (inclusive range is WINDOW_DAYS + 1)
+MAX_CONCURRENCY = 4       # Parallel requests in flight
+REQUESTS_PER_SECOND = 5.0 # Token bucket refill rate
+MAX_RETRIES = 3           # Extra attempts per window after the first one
+BACKOFF_SECONDS = 0.5     # Base delay, doubled on each retry
+REQUEST_TIMEOUT = 10
+
+# HTTP statuses worth retrying (throttling and transient server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: at most `rate` acquisitions per second on average,
+    with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class WindowFetchError(Exception):
+    """A date window could not be downloaded after all retries."""
+
+
+def format_api_date(date):
+    """The API expects non-padded d/m/Y dates."""
+    return f"{date.day}/{date.month}/{date.year}"
+
+
+def make_session(pool_size=MAX_CONCURRENCY):
+    """A requests.Session whose connection pool can serve `pool_size` threads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_window(session, start, end, url=API_LIGHTNING_URL, bucket=None,
+                 retries=MAX_RETRIES, backoff=BACKOFF_SECONDS, timeout=REQUEST_TIMEOUT):
+    """Download one date window, retrying transient failures with exponential backoff."""
+    params = {"dataIni": format_api_date(start), "dataFin": format_api_date(end)}
+    last_error = None
+
+    for attempt in range(retries + 1):
+        if attempt:
+            # Full jitter keeps parallel workers from retrying in lockstep
+            time.sleep(random.uniform(0, backoff * 2 ** (attempt - 1)))
+        if bucket is not None:
+            bucket.acquire()
+        try:
+            r = session.get(url, params=params, timeout=timeout, stream=True)
+        except requests.RequestException as e:
+            last_error = e
+            continue
+
+        with r:
+            if r.status_code == 200:
+                try:
+                    # Parse the body incrementally instead of materializing the whole document
+                    return list(iter_raios(r.iter_content(CHUNK_SIZE)))
+                except (ValueError, requests.RequestException) as e:
+                    # Truncated/garbled body: retry like a transient failure
+                    last_error = e
+                    continue
+        last_error = f"HTTP {r.status_code}"
+        if r.status_code not in RETRY_STATUSES:
+            break
+
+    raise WindowFetchError(str(last_error))
+
+
+def fetch_windows(windows, url=API_LIGHTNING_URL, max_workers=MAX_CONCURRENCY,
+                  rate=REQUESTS_PER_SECOND, retries=MAX_RETRIES, backoff=BACKOFF_SECONDS,
+                  timeout=REQUEST_TIMEOUT, on_result=None):
+    """Fetch many date windows concurrently.
+
+    Returns (results, failures): `results` maps each successful window to its
+    strike list, `failures` maps each failed window to the error message.
+    `on_result(window, strikes, error)` is called from the main thread as each
+    window completes.
+    """
+    bucket = TokenBucket(rate) if rate else None
+    results = {}
+    failures = {}
+
+    with make_session(max_workers) as session, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(fetch_window, session, start, end, url, bucket, retries, backoff, timeout): (start, end)
+            for start, end in windows
+        }
+        for future in as_completed(futures):
+            window = futures[future]
+            try:
+                strikes = future.result()
+            except WindowFetchError as e:
+                failures[window] = str(e)
+                if on_result:
+                    on_result(window, None, str(e))
+                continue
+            results[window] = strikes
+            if on_result:
+                on_result(window, strikes, None)
+
+    return results, failures
@@ -2,11 +2,14 @@
 """
 Green Energy Sentinel - Optimal Wind Farm Placement (Real Data Version)
 Combines:
-- Lightning Density (Historical 2023 from strikes_2023.json)
+- Lightning Density (Historical 2023 from the partitioned strike archive)
 - Wind Speed (Real GeoTIFF from Global Wind Atlas - 100m height)
 - Land Mask (GeoJSON boundaries of Galicia)
 """
 
+import argparse
+import hashlib
+import heapq
 import json
 import pandas as pd
 import numpy as np
@@ -14,21 +17,36 @@ import folium
 from folium.plugins import HeatMap
 import os
 import rasterio
+from cog_export import write_cog
+from config import (END_DATE, GALICIA_BOUNDS, GALICIA_GEOJSON, GRID_RESOLUTION, LAYERS_COG, MIN_SITE_SPACING_M,
+                    NATIVE_BLOCK_ROWS, START_DATE, TILES_DIR, WIND_TIFF)
+from rasterio.windows import Window
 from scipy.ndimage import gaussian_filter
-from shapely.geometry import shape, Point
-import requests
+from land_mask import land_mask, land_mask_for_nodes, load_boundary, mask_key
+from pipeline import Pipeline, strike_archive_digest, turbine_inventory_digest
+from profiling import profile_run, span
+from site_selection import SiteSpacing, grid_locator, raster_locator, spaced_top_k
+from spatial_index import project
+from strike_density import latlon_risk_map, peak_weights, strike_density
+from strike_store import load_strikes
+from turbine_inventory import load_turbines
+from xyz_tiles import MAX_ZOOM, MIN_ZOOM, SCORE_GRADIENT, TILES_META, build_tiles
 
-# Configuration
-LIGHTNING_FILE = "data/strikes_2023.json"
-WIND_TIFF = "galicia_wind-speed_100m.tif"
-GALICIA_GEOJSON = "ESP.15_1.geojson"
+# Configuration (study period, area, input files and CLI defaults live in config.py)
 OUTPUT_MAP = "maps/wind_farm_suitability_map.html"
+TOP_K = 10            # Numbered candidate sites on the map
+RISK_BINS = 100       # Lightning histogram bins per axis
+RISK_SIGMA = 1.5      # Gaussian blur of the histogram (in bins)
+KDE_BINS = 400        # Lat/lon bins the meter-based KDE is resampled onto (~500 m)
 
-GALICIA_BOUNDS = {
-    "lat_min": 41.8, "lat_max": 43.8,
-    "lon_min": -9.3, "lon_max": -6.7
-}
-GRID_RESOLUTION = 80  # 80x80 grid for finer resolution
+# Native-resolution mode (every wind raster pixel)
+NATIVE_SCORE_FILE = "reports/suitability_score_native.npy"
+NATIVE_SITES_FILE = "reports/optimal_sites_native.csv"
+LAYER_BANDS = ("score", "risk", "wind_norm", "land")
+
+# Coarse-to-fine search (same top sites as --native without scoring every pixel)
+PYRAMID_LEAF = 16                  # Native pixels per side of the finest pyramid tile
+WIND_PYRAMID_DIR = "data/wind_pyramid"
 
 def load_wind_raster():
     """Load the wind speed GeoTIFF and return the data array + transform."""
@@ -41,43 +59,37 @@ def load_wind_raster():
     print(f"   Raster size: {wind_data.shape}, Bounds: {bounds}")
     return wind_data, transform, nodata
 
-def get_wind_at_coord(wind_data, transform, lat, lon, nodata):
-    """Sample wind speed at a specific lat/lon from the raster."""
-    try:
-        # Convert lat/lon to pixel coordinates
-        row, col = rasterio.transform.rowcol(transform, lon, lat)
-        
-        # Check bounds
-        if 0 <= row < wind_data.shape[0] and 0 <= col < wind_data.shape[1]:
-            value = wind_data[row, col]
-            if nodata is not None and value == nodata:
-                return None
-            return float(value)
-        return None
-    except:
-        return None
-
-def calculate_historical_risk_map():
-    """Calculate lightning risk density from historical data."""
-    print("⚡ Calculating Historical Lightning Density...")
-    
-    with open(LIGHTNING_FILE, 'r') as f:
-        data = json.load(f)
-    
-    df = pd.DataFrame(data)
-    lats = df['lat'].astype(float).values
-    lons = df['lon'].astype(float).values
-    
+def sample_wind(wind_data, transform, lons, lats, nodata):
+    """Sample wind speed at many lon/lat points at once (NaN outside the raster or on nodata)."""
+    lons, lats = np.broadcast_arrays(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+    # Inverse affine transform: geographic coordinates -> fractional pixel coordinates
+    cols, rows = ~transform * (lons, lats)
+    rows = np.floor(rows).astype(int)
+    cols = np.floor(cols).astype(int)
+    inside = (rows >= 0) & (rows < wind_data.shape[0]) & (cols >= 0) & (cols < wind_data.shape[1])
+
+    values = np.full(lons.shape, np.nan)
+    values[inside] = wind_data[rows[inside], cols[inside]]
+    if nodata is not None:
+        values[values == nodata] = np.nan
+    return values
+
+def risk_density(lats, lons, bins=RISK_BINS, sigma=RISK_SIGMA):
+    """Normalized (0-1) lightning density map of strike lat/lon arrays over GALICIA_BOUNDS.
+
+    Returns (risk, x_edges, y_edges): rows follow the latitude bins (x_edges),
+    columns the longitude bins (y_edges).
+    """
     # Create 2D histogram (density map)
     density, x_edges, y_edges = np.histogram2d(
         lats, lons, 
-        bins=100, 
+        bins=bins, 
         range=[[GALICIA_BOUNDS["lat_min"], GALICIA_BOUNDS["lat_max"]], 
                [GALICIA_BOUNDS["lon_min"], GALICIA_BOUNDS["lon_max"]]]
     )
     
     # Apply Gaussian blur to smooth
-    smoothed_density = gaussian_filter(density, sigma=1.5)
+    smoothed_density = gaussian_filter(density, sigma=sigma)
     
     # Normalize to 0-1
     risk_min = smoothed_density.min()
@@ -89,26 +101,345 @@ def calculate_historical_risk_map():
     
     return normalized_risk, x_edges, y_edges
 
-def get_risk_at_coord(risk_map, x_edges, y_edges, lat, lon):
-    """Get risk value from the density map."""
-    lat_idx = np.searchsorted(x_edges, lat) - 1
-    lon_idx = np.searchsorted(y_edges, lon) - 1
-    
-    lat_idx = max(0, min(lat_idx, risk_map.shape[0] - 1))
-    lon_idx = max(0, min(lon_idx, risk_map.shape[1] - 1))
+def calculate_historical_risk_map(bins=RISK_BINS, sigma=RISK_SIGMA, bandwidth_m=None, weight_by_current=False,
+                                  start=START_DATE, end=END_DATE):
+    """Calculate lightning risk density from historical data.
+
+    By default a blurred degree histogram (bins, sigma in bins). With
+    `bandwidth_m` a Gaussian KDE in EPSG:25829 meters instead (see
+    strike_density), optionally weighted by peak current, resampled onto
+    bins x bins lat/lon cells.
+    """
+    print("⚡ Calculating Historical Lightning Density...")
     
+    strikes = load_strikes(start, end, GALICIA_BOUNDS)
+    if bandwidth_m:
+        weights = peak_weights(strikes['peak']) if weight_by_current else None
+        density, transform = strike_density(strikes['lon'], strikes['lat'], weights, bandwidth_m, bbox=GALICIA_BOUNDS)
+        return latlon_risk_map(density, transform, GALICIA_BOUNDS, bins)
+    return risk_density(strikes['lat'], strikes['lon'], bins, sigma)
+
+def sample_risk(risk_map, x_edges, y_edges, lats, lons):
+    """Look up the risk bin of many lat/lon points at once (clamped to the map edges)."""
+    lat_idx = np.clip(np.searchsorted(x_edges, lats) - 1, 0, risk_map.shape[0] - 1)
+    lon_idx = np.clip(np.searchsorted(y_edges, lons) - 1, 0, risk_map.shape[1] - 1)
     return risk_map[lat_idx, lon_idx]
 
-def create_placement_map():
-    print("🌍 Generating Optimal Placement Map (Real Wind Data)...")
+def score_cells(wind_ms, on_land, risk, wind_min, wind_max):
+    """Suitability of cells given their wind speed, land flag and risk (arrays of one shape).
+
+    Returns (wind_norm, score, valid): cells off land, without wind data or
+    calm are invalid and get a NaN score.
+    """
+    with np.errstate(invalid='ignore'):
+        valid = on_land & np.isfinite(wind_ms) & (wind_ms > 0)
+    
+    # Normalize wind to 0-1, then Score = Wind * (1 - Risk)
+    wind_norm = (wind_ms - wind_min) / (wind_max - wind_min)
+    score = np.where(valid, wind_norm * (1 - risk), np.nan)
+    return wind_norm, score, valid
+
+def evaluate_grid(grid_lats, grid_lons, on_land, wind_data, transform, nodata,
+                  wind_min, wind_max, risk_map, x_edges, y_edges):
+    """Score every node of the lat/lon grid with array operations.
+
+    `on_land` is the boolean land mask of the grid (see land_mask_for_nodes).
+    Returns a dict of 2-D arrays (rows follow grid_lats, columns grid_lons):
+    lat, lon, wind_ms, wind_norm, risk, score and the boolean `valid` mask of
+    land cells with wind data. Invalid cells hold NaN scores.
+    """
+    lon_grid, lat_grid = np.meshgrid(grid_lons, grid_lats)
+    
+    # Real wind speed (NaN on ocean / outside raster)
+    wind_ms = sample_wind(wind_data, transform, lon_grid, lat_grid, nodata)
+    risk = sample_risk(risk_map, x_edges, y_edges, lat_grid, lon_grid)
+    wind_norm, score, valid = score_cells(wind_ms, on_land, risk, wind_min, wind_max)
+    
+    return {
+        'lat': lat_grid, 'lon': lon_grid, 'wind_ms': wind_ms, 'wind_norm': wind_norm,
+        'risk': risk, 'score': score, 'valid': valid
+    }
+
+def row_blocks(height, width, block_rows=NATIVE_BLOCK_ROWS):
+    """Full-width raster windows of at most `block_rows` rows, top to bottom."""
+    for row_off in range(0, height, block_rows):
+        yield Window(0, row_off, width, min(block_rows, height - row_off))
+
+def read_wind_block(src, window):
+    """Wind speed of one raster window as float64, NaN on nodata."""
+    wind = src.read(1, window=window).astype(np.float64)
+    if src.nodata is not None:
+        wind[wind == src.nodata] = np.nan
+    return wind
+
+def pixel_centers(transform, window):
+    """Lon/lat of the pixel centers of a raster window (2-D arrays)."""
+    cols = np.arange(window.col_off, window.col_off + window.width) + 0.5
+    rows = np.arange(window.row_off, window.row_off + window.height) + 0.5
+    return transform * tuple(np.meshgrid(cols, rows))
+
+def native_wind_range(src, block_rows=NATIVE_BLOCK_ROWS):
+    """Min/max valid wind speed over the whole raster, read block by block."""
+    wind_min, wind_max = np.inf, -np.inf
+    for window in row_blocks(src.height, src.width, block_rows):
+        wind = read_wind_block(src, window)
+        if np.isfinite(wind).any():
+            wind_min = min(wind_min, np.nanmin(wind))
+            wind_max = max(wind_max, np.nanmax(wind))
+    return wind_min, wind_max
+
+def empty_best():
+    """Empty running top-k: flat pixel index + the values reported per site."""
+    return {key: np.empty(0) for key in ['index', 'wind_ms', 'wind_norm', 'risk', 'score']}
+
+def merge_best(best, window, width, top_k, valid, **values):
+    """Merge the top_k valid pixels of a scored raster window into the running top-k."""
+    cells = np.flatnonzero(valid)
+    if not len(cells):
+        return best
+    k = min(top_k, len(cells))
+    cells = cells[np.argpartition(-values['score'].ravel()[cells], k - 1)[:k]]
+    rows, cols = np.divmod(cells, window.width)
+    merged = {'index': (rows + window.row_off) * width + cols + window.col_off,
+              **{key: array.ravel()[cells] for key, array in values.items()}}
+    merged = {key: np.concatenate((best[key], merged[key])) for key in best}
+    # Highest score first; ties go to the northernmost, then westernmost pixel
+    order = np.lexsort((merged['index'], -merged['score']))[:top_k]
+    return {key: array[order] for key, array in merged.items()}
+
+def sites_frame(best, transform, width):
+    """Running top-k -> DataFrame of sites indexed by rank (lat, lon, row, col + values)."""
+    best = dict(best)
+    rows, cols = np.divmod(best.pop('index').astype(np.int64), width)
+    site_lons, site_lats = transform * (cols + 0.5, rows + 0.5)
+    return pd.DataFrame({'lat': site_lats, 'lon': site_lons, 'row': rows, 'col': cols, **best},
+                        index=pd.RangeIndex(1, len(rows) + 1, name='rank'))
+
+def describe_pixels(src, on_land, indices, risk_map, x_edges, y_edges, wind_min, wind_max):
+    """Running top-k style values (index, wind_ms, wind_norm, risk, score) of given raster pixels."""
+    indices = np.asarray(indices, dtype=np.int64)
+    rows, cols = np.divmod(indices, src.width)
+    wind_ms = np.array([read_wind_block(src, Window(col, row, 1, 1))[0, 0]
+                        for row, col in zip(rows.tolist(), cols.tolist())], dtype=np.float64)
+    lons, lats = src.transform * (cols + 0.5, rows + 0.5)
+    risk = sample_risk(risk_map, x_edges, y_edges, lats, lons)
+    wind_norm, score, _ = score_cells(wind_ms, on_land[rows, cols], risk, wind_min, wind_max)
+    return {'index': indices, 'wind_ms': wind_ms, 'wind_norm': wind_norm, 'risk': risk, 'score': score}
+
+def score_native(galicia_shape, risk_map, x_edges, y_edges, block_rows=NATIVE_BLOCK_ROWS,
+                 top_k=TOP_K, out_path=None, min_spacing_m=0):
+    """Score every pixel of the wind raster, `block_rows` rows at a time.
+
+    The risk map is resampled onto the raster grid (nearest bin of each pixel
+    center) and the land mask is rasterized on the raster's own grid. Only one
+    block of wind/risk values is in memory at a time; with `out_path` the score
+    array itself is a .npy memmap on disk instead of an in-memory array.
+    Returns (score, sites, wind_min, wind_max): the float32 score array (NaN
+    where invalid) and a DataFrame of the top_k pixels by score, at least
+    min_spacing_m apart when a spacing is given (see spaced_top_k).
+    """
+    with rasterio.open(WIND_TIFF) as src:
+        height, width, transform = src.height, src.width, src.transform
+        on_land = land_mask(galicia_shape, transform, (height, width))
+        wind_min, wind_max = native_wind_range(src, block_rows)
+        
+        if out_path:
+            os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+            score = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float32, shape=(height, width))
+        else:
+            score = np.empty((height, width), dtype=np.float32)
+        
+        # Running top-k across blocks
+        best = empty_best()
+        for window in row_blocks(height, width, block_rows):
+            rows = slice(window.row_off, window.row_off + window.height)
+            wind_ms = read_wind_block(src, window)
+            lons, lats = pixel_centers(transform, window)
+            risk = sample_risk(risk_map, x_edges, y_edges, lats, lons)
+            wind_norm, block_score, valid = score_cells(wind_ms, on_land[rows], risk, wind_min, wind_max)
+            score[rows] = block_score
+            best = merge_best(best, window, width, top_k, wind_ms=wind_ms, wind_norm=wind_norm,
+                              risk=risk, score=block_score, valid=valid)
+        
+        if out_path:
+            score.flush()
+        
+        # Spacing needs the whole array: suppression is global, not per block
+        if min_spacing_m > 0:
+            indices = spaced_top_k(score, top_k, min_spacing_m, raster_locator(transform, width))
+            best = describe_pixels(src, on_land, indices, risk_map, x_edges, y_edges, wind_min, wind_max)
+    
+    sites = sites_frame(best, transform, width)
+    return score, sites, wind_min, wind_max
+
+def pyramid_key(src, galicia_shape, leaf):
+    """Cache key of a wind pyramid: raster file identity + land mask + leaf size."""
+    info = os.stat(src.name)
+    spec = json.dumps({"raster": os.path.abspath(src.name), "size": info.st_size, "mtime": info.st_mtime_ns,
+                       "mask": mask_key(galicia_shape, src.transform, src.shape), "leaf": leaf})
+    return hashlib.sha1(spec.encode("utf-8")).hexdigest()[:16]
+
+def build_wind_pyramid(src, on_land, leaf=PYRAMID_LEAF, block_rows=NATIVE_BLOCK_ROWS):
+    """Max-wind pyramid of the valid (land, windy) pixels, built in one pass over the raster.
+
+    Level 0 holds the maximum valid wind speed of each leaf x leaf pixel tile
+    (-inf where a tile has no valid pixel); each further level max-pools 2x2
+    tiles of the one below, up to a single tile. Also returns the raster-wide
+    wind range used to normalize scores (as native_wind_range).
+    """
+    height, width = src.height, src.width
+    tile_rows, tile_cols = -(-height // leaf), -(-width // leaf)
+    base = np.full((tile_rows, tile_cols), -np.inf, dtype=np.float32)
+    wind_min, wind_max = np.inf, -np.inf
     
-    # 0. Load Land Boundary (Definitive Fix for Sea/Ocean)
-    print("🗺️ Loading Galicia Land Boundary (GeoJSON)...")
-    with open(GALICIA_GEOJSON, 'r') as f:
-        geojson_data = json.load(f)
-    galicia_shape = shape(geojson_data['geometry'])
+    # Whole tiles per block so every block fills complete rows of level 0
+    for window in row_blocks(height, width, max(leaf, block_rows // leaf * leaf)):
+        wind = read_wind_block(src, window)
+        if np.isfinite(wind).any():
+            wind_min = min(wind_min, np.nanmin(wind))
+            wind_max = max(wind_max, np.nanmax(wind))
+        with np.errstate(invalid='ignore'):
+            valid = on_land[window.row_off:window.row_off + window.height] & np.isfinite(wind) & (wind > 0)
+        
+        padded = np.full((-(-window.height // leaf) * leaf, tile_cols * leaf), -np.inf, dtype=np.float32)
+        padded[:window.height, :width] = np.where(valid, wind, -np.inf)
+        tiles = padded.reshape(-1, leaf, tile_cols, leaf).max(axis=(1, 3))
+        base[window.row_off // leaf:window.row_off // leaf + len(tiles)] = tiles
     
-    # 1. Load Wind Raster
+    levels = [base]
+    while levels[-1].shape != (1, 1):
+        below = levels[-1]
+        padded = np.full((-(-below.shape[0] // 2) * 2, -(-below.shape[1] // 2) * 2), -np.inf, dtype=np.float32)
+        padded[:below.shape[0], :below.shape[1]] = below
+        levels.append(padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2).max(axis=(1, 3)))
+    return levels, wind_min, wind_max
+
+def wind_pyramid(src, galicia_shape, on_land, leaf=PYRAMID_LEAF, block_rows=NATIVE_BLOCK_ROWS,
+                 cache_dir=WIND_PYRAMID_DIR):
+    """build_wind_pyramid, cached on disk until the raster or the boundary changes."""
+    path = os.path.join(cache_dir, f"{pyramid_key(src, galicia_shape, leaf)}.npz")
+    if os.path.exists(path):
+        with np.load(path) as data:
+            levels = [data[f"level_{i}"] for i in range(int(data["n_levels"]))]
+            return levels, float(data["wind_min"]), float(data["wind_max"])
+    
+    levels, wind_min, wind_max = build_wind_pyramid(src, on_land, leaf, block_rows)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, n_levels=len(levels), wind_min=wind_min, wind_max=wind_max,
+             **{f"level_{i}": level for i, level in enumerate(levels)})
+    os.replace(tmp_path, path)
+    return levels, wind_min, wind_max
+
+def pyramid_search(galicia_shape, risk_map, x_edges, y_edges, top_k=TOP_K, leaf=PYRAMID_LEAF,
+                   block_rows=NATIVE_BLOCK_ROWS, cache_dir=WIND_PYRAMID_DIR, min_spacing_m=0):
+    """Top_k pixels of the wind raster by coarse-to-fine branch and bound.
+
+    Tiles of the max-wind pyramid are visited best bound first, where the
+    bound of a tile is its max normalized wind times (1 - the lowest risk bin
+    it overlaps): no pixel inside can score higher. Tiles are split 2x2 down
+    to leaf tiles, which are read and scored exactly at native resolution;
+    their pixels join the same queue, so pixels leave it in exact score
+    order (ties by pixel index) and the search stops after top_k of them
+    are kept. The sites are therefore exactly those of score_native, with the
+    same min_spacing_m suppression (see spaced_top_k).
+    Returns (sites, wind_min, wind_max, stats) with the site DataFrame of
+    score_native and counts of the leaf tiles and pixels actually scored.
+    """
+    with rasterio.open(WIND_TIFF) as src:
+        height, width, transform = src.height, src.width, src.transform
+        if transform.b or transform.d:
+            raise ValueError("Pyramid search needs a north-up raster without rotation")
+        on_land = land_mask(galicia_shape, transform, (height, width))
+        levels, wind_min, wind_max = wind_pyramid(src, galicia_shape, on_land, leaf, block_rows, cache_dir)
+        
+        # On a north-up raster the risk bin of a pixel is (bin of its row, bin of its column)
+        col_lons, _ = transform * (np.arange(width) + 0.5, np.full(width, 0.5))
+        _, row_lats = transform * (np.full(height, 0.5), np.arange(height) + 0.5)
+        lat_bins = np.clip(np.searchsorted(x_edges, row_lats) - 1, 0, risk_map.shape[0] - 1)
+        lon_bins = np.clip(np.searchsorted(y_edges, col_lons) - 1, 0, risk_map.shape[1] - 1)
+        
+        def bound(level, i, j):
+            wind = float(levels[level][i, j])
+            if wind == -np.inf:
+                return -np.inf
+            span = leaf << level
+            rows = lat_bins[i * span:(i + 1) * span]
+            cols = lon_bins[j * span:(j + 1) * span]
+            risk_min = risk_map[rows.min():rows.max() + 1, cols.min():cols.max() + 1].min()
+            return (wind - wind_min) / (wind_max - wind_min) * (1 - risk_min)
+        
+        # Queue entries: (-value, kind, key, payload). Tiles (kind 0) pop before pixels (kind 1)
+        # of equal value, since a tile bounded at a pixel's score may hold a tie with a lower index.
+        spacing = SiteSpacing(min_spacing_m)
+        sites = []
+        stats = {'tiles_scored': 0, 'pixels_scored': 0, 'pixels_total': height * width}
+        top = len(levels) - 1
+        heap = [(-bound(top, 0, 0), 0, (top, 0, 0), None)]
+        while heap and len(sites) < top_k:
+            neg_value, kind, key, payload = heapq.heappop(heap)
+            if neg_value == np.inf:
+                break
+            if kind:
+                if spacing.add(*payload[-2:]):
+                    sites.append((key, *payload[:-2], -neg_value))
+                continue
+            
+            level, i, j = key
+            if level:
+                below = levels[level - 1]
+                for ci in (2 * i, 2 * i + 1):
+                    for cj in (2 * j, 2 * j + 1):
+                        if ci < below.shape[0] and cj < below.shape[1]:
+                            child = bound(level - 1, ci, cj)
+                            if child != -np.inf:
+                                heapq.heappush(heap, (-child, 0, (level - 1, ci, cj), None))
+                continue
+            
+            window = Window(j * leaf, i * leaf, min(leaf, width - j * leaf), min(leaf, height - i * leaf))
+            rows = slice(window.row_off, window.row_off + window.height)
+            cols = slice(window.col_off, window.col_off + window.width)
+            wind_ms = read_wind_block(src, window)
+            lons, lats = pixel_centers(transform, window)
+            risk = sample_risk(risk_map, x_edges, y_edges, lats, lons)
+            wind_norm, tile_score, valid = score_cells(wind_ms, on_land[rows, cols], risk, wind_min, wind_max)
+            stats['tiles_scored'] += 1
+            stats['pixels_scored'] += window.width * window.height
+            
+            xs, ys = project(lons[valid], lats[valid]) if min_spacing_m > 0 else (lons[valid], lats[valid])
+            tile_rows, tile_cols = np.nonzero(valid)
+            indices = (tile_rows + window.row_off) * width + tile_cols + window.col_off
+            for entry in zip((-tile_score[valid]).tolist(), indices.tolist(), wind_ms[valid].tolist(),
+                             wind_norm[valid].tolist(), risk[valid].tolist(), xs.tolist(), ys.tolist()):
+                heapq.heappush(heap, (entry[0], 1, entry[1], entry[2:]))
+    
+    best = dict(zip(['index', 'wind_ms', 'wind_norm', 'risk', 'score'],
+                    (np.array(values) for values in zip(*sites)))) if sites else empty_best()
+    return sites_frame(best, transform, width), wind_min, wind_max, stats
+
+def native_layer_blocks(src, on_land, risk_map, x_edges, y_edges, wind_min, wind_max, block_rows=NATIVE_BLOCK_ROWS):
+    """(window, LAYER_BANDS stack) per block of the wind raster: score, risk, normalized wind, land (0/1)."""
+    for window in row_blocks(src.height, src.width, block_rows):
+        rows = slice(window.row_off, window.row_off + window.height)
+        wind_ms = read_wind_block(src, window)
+        lons, lats = pixel_centers(src.transform, window)
+        risk = sample_risk(risk_map, x_edges, y_edges, lats, lons)
+        wind_norm, score, _ = score_cells(wind_ms, on_land[rows], risk, wind_min, wind_max)
+        yield window, np.stack([score, risk, wind_norm, on_land[rows]])
+
+def export_layers(galicia_shape, risk, path=LAYERS_COG, block_rows=NATIVE_BLOCK_ROWS):
+    """Write the native-resolution layers (LAYER_BANDS) as a multi-band Cloud-Optimized GeoTIFF."""
+    print(f"🗂️ Exporting {', '.join(LAYER_BANDS)} layers (Cloud-Optimized GeoTIFF)...")
+    with rasterio.open(WIND_TIFF) as src:
+        on_land = land_mask(galicia_shape, src.transform, (src.height, src.width))
+        wind_min, wind_max = native_wind_range(src, block_rows)
+        write_cog(path, native_layer_blocks(src, on_land, *risk, wind_min, wind_max, block_rows),
+                  LAYER_BANDS, src.width, src.height, src.transform, src.crs)
+    print(f"   Layers saved to: {os.path.abspath(path)}")
+    return path
+
+def wind_layer():
+    """Wind raster with its valid range: {data, transform, nodata, wind_min, wind_max}."""
     wind_data, transform, nodata = load_wind_raster()
     
     # Normalize wind speed to 0-1 for scoring
@@ -116,50 +447,109 @@ def create_placement_map():
     wind_min = valid_wind.min()
     wind_max = valid_wind.max()
     print(f"   Wind range: {wind_min:.1f} - {wind_max:.1f} m/s")
+    return {'data': wind_data, 'transform': transform, 'nodata': nodata, 'wind_min': wind_min, 'wind_max': wind_max}
+
+def placement_grid(galicia_shape, wind, risk, resolution=GRID_RESOLUTION):
+    """Scored resolution x resolution lat/lon grid over GALICIA_BOUNDS (see evaluate_grid)."""
+    print(f"📍 Evaluating {resolution}x{resolution} candidate locations...")
+    grid_lats = np.linspace(GALICIA_BOUNDS["lat_min"], GALICIA_BOUNDS["lat_max"], resolution)
+    grid_lons = np.linspace(GALICIA_BOUNDS["lon_min"], GALICIA_BOUNDS["lon_max"], resolution)
     
-    # 2. Load Lightning Risk
-    risk_map, x_edges, y_edges = calculate_historical_risk_map()
+    # CHECK: Is the point on land? (boundary rasterized once per grid, cached on disk)
+    on_land = land_mask_for_nodes(galicia_shape, grid_lons, grid_lats)
+    return evaluate_grid(grid_lats, grid_lons, on_land, wind['data'], wind['transform'], wind['nodata'],
+                         wind['wind_min'], wind['wind_max'], *risk)
+
+def grid_sites(grid, top_k=TOP_K, min_spacing_m=MIN_SITE_SPACING_M):
+    """Best grid cells at least min_spacing_m apart (one marker per hill, not per grid cell)."""
+    top_cells = spaced_top_k(grid['score'], top_k, min_spacing_m, grid_locator(grid['lon'], grid['lat']))
+    return pd.DataFrame({key: grid[key].ravel()[top_cells]
+                         for key in ['lat', 'lon', 'wind_ms', 'wind_norm', 'risk', 'score']})
+
+def native_sites(galicia_shape, risk, top_k=TOP_K, min_spacing_m=MIN_SITE_SPACING_M, block_rows=NATIVE_BLOCK_ROWS):
+    """Every raster pixel scored, top sites taken from the full grid (saved with the score array)."""
+    print(f"🔬 Scoring every wind raster pixel ({block_rows}-row blocks)...")
+    score, sites, _, _ = score_native(galicia_shape, *risk, block_rows, top_k, NATIVE_SCORE_FILE, min_spacing_m)
+    print(f"   Valid pixels scored: {int(np.isfinite(score).sum())} of {score.size}")
+    sites.to_csv(NATIVE_SITES_FILE)
+    print(f"   Full-resolution score saved to: {os.path.abspath(NATIVE_SCORE_FILE)}")
+    print(f"   Top {top_k} sites saved to: {os.path.abspath(NATIVE_SITES_FILE)}")
+    return sites
+
+def pyramid_sites(galicia_shape, risk, top_k=TOP_K, min_spacing_m=MIN_SITE_SPACING_M, block_rows=NATIVE_BLOCK_ROWS):
+    """Same sites as native_sites by coarse-to-fine search (see pyramid_search)."""
+    print(f"🔬 Coarse-to-fine search for the top {top_k} raster pixels...")
+    sites, _, _, stats = pyramid_search(galicia_shape, *risk, top_k, block_rows=block_rows,
+                                        min_spacing_m=min_spacing_m)
+    print(f"   Pixels scored: {stats['pixels_scored']} of {stats['pixels_total']} "
+          f"({stats['tiles_scored']} tiles of {PYRAMID_LEAF}x{PYRAMID_LEAF})")
+    sites.to_csv(NATIVE_SITES_FILE)
+    print(f"   Top {top_k} sites saved to: {os.path.abspath(NATIVE_SITES_FILE)}")
+    return sites
+
+def placement_pipeline(native=False, block_rows=NATIVE_BLOCK_ROWS, pyramid=False, min_spacing_m=MIN_SITE_SPACING_M,
+                       kde_bandwidth_m=None, weight_by_current=False, force=False):
+    """Stages of the placement map (boundary, wind, risk, grid, sites, turbines), memoized on disk.
+
+    Each stage's `code` names the helpers it calls, so edits elsewhere in this
+    module (the map styling of create_placement_map) keep the cache valid.
+    """
+    pipeline = Pipeline(force=force)
+    scoring = [sample_risk, score_cells]
+    raster = [row_blocks, read_wind_block, pixel_centers]
+    pipeline.add('boundary', load_boundary, inputs=[GALICIA_GEOJSON], params={'path': GALICIA_GEOJSON},
+                 code=['land_mask'])
+    pipeline.add('wind', wind_layer, inputs=[WIND_TIFF], code=[load_wind_raster])
+    pipeline.add('risk', calculate_historical_risk_map, inputs=[strike_archive_digest],
+                 code=[risk_density, 'strike_density', 'strike_store', 'spatial_index'],
+                 params={'bins': KDE_BINS if kde_bandwidth_m else RISK_BINS, 'sigma': RISK_SIGMA,
+                         'bandwidth_m': kde_bandwidth_m, 'weight_by_current': weight_by_current,
+                         'start': START_DATE, 'end': END_DATE})
+    pipeline.add('grid', placement_grid, deps=['boundary', 'wind', 'risk'], params={'resolution': GRID_RESOLUTION},
+                 code=[evaluate_grid, sample_wind, *scoring, 'land_mask'])
     
-    # 3. Evaluate Grid
-    print(f"📍 Evaluating {GRID_RESOLUTION}x{GRID_RESOLUTION} candidate locations...")
-    grid_lats = np.linspace(GALICIA_BOUNDS["lat_min"], GALICIA_BOUNDS["lat_max"], GRID_RESOLUTION)
-    grid_lons = np.linspace(GALICIA_BOUNDS["lon_min"], GALICIA_BOUNDS["lon_max"], GRID_RESOLUTION)
+    site_params = {'top_k': TOP_K, 'min_spacing_m': min_spacing_m}
+    site_code = [*raster, *scoring, empty_best, sites_frame, 'land_mask', 'site_selection', 'spatial_index']
+    if native:
+        pipeline.add('sites', native_sites, deps=['boundary', 'risk'], inputs=[WIND_TIFF],
+                     params={**site_params, 'block_rows': block_rows}, outputs=[NATIVE_SCORE_FILE, NATIVE_SITES_FILE],
+                     code=[score_native, native_wind_range, merge_best, describe_pixels, *site_code])
+    elif pyramid:
+        pipeline.add('sites', pyramid_sites, deps=['boundary', 'risk'], inputs=[WIND_TIFF],
+                     params={**site_params, 'block_rows': block_rows}, outputs=[NATIVE_SITES_FILE],
+                     code=[pyramid_search, wind_pyramid, build_wind_pyramid, pyramid_key, *site_code])
+    else:
+        pipeline.add('sites', grid_sites, deps=['grid'], params=site_params, code=['site_selection', 'spatial_index'])
     
-    results = []
-    for lat in grid_lats:
-        for lon in grid_lons:
-            # CHECK: Is the point on land? (SHAPELY)
-            point = Point(lon, lat) # GeoJSON usually uses (lon, lat)
-            if not galicia_shape.contains(point):
-                continue
-                
-            # Get real wind speed
-            wind_speed = get_wind_at_coord(wind_data, transform, lat, lon, nodata)
-            
-            # Skip if no data (ocean, outside raster)
-            if wind_speed is None or wind_speed <= 0:
-                continue
-            
-            # Normalize wind to 0-1
-            wind_norm = (wind_speed - wind_min) / (wind_max - wind_min)
-            
-            # Get lightning risk
-            risk = get_risk_at_coord(risk_map, x_edges, y_edges, lat, lon)
-            
-            # Score = Wind * (1 - Risk)
-            optimal_score = wind_norm * (1 - risk)
-            
-            results.append({
-                'lat': lat,
-                'lon': lon,
-                'wind_ms': wind_speed,
-                'wind_norm': wind_norm,
-                'risk': risk,
-                'score': optimal_score
-            })
+    pipeline.add('layers', export_layers, deps=['boundary', 'risk'], inputs=[WIND_TIFF],
+                 params={'path': LAYERS_COG, 'block_rows': block_rows}, outputs=[LAYERS_COG],
+                 code=[native_layer_blocks, native_wind_range, *raster, *scoring, 'land_mask', 'cog_export'])
+    pipeline.add('tiles', build_tiles, deps=['layers'],
+                 params={'out_dir': TILES_DIR, 'min_zoom': MIN_ZOOM, 'max_zoom': MAX_ZOOM},
+                 outputs=[os.path.join(TILES_DIR, TILES_META)], code=['xyz_tiles'])
+    pipeline.add('turbines', load_turbines, inputs=[lambda: turbine_inventory_digest(GALICIA_BOUNDS)],
+                 params={'bbox': GALICIA_BOUNDS}, code=['turbine_inventory'])
+    return pipeline
+
+def create_placement_map(native=False, block_rows=NATIVE_BLOCK_ROWS, pyramid=False,
+                         min_spacing_m=MIN_SITE_SPACING_M, kde_bandwidth_m=None, weight_by_current=False,
+                         force=False, export_cog=False, tiles=False):
+    print("🌍 Generating Optimal Placement Map (Real Wind Data)...")
+    
+    # 0-3. Land boundary, wind raster, lightning risk, grid and top sites (only changed stages rerun)
+    pipeline = placement_pipeline(native, block_rows, pyramid, min_spacing_m, kde_bandwidth_m,
+                                  weight_by_current, force)
+    grid = pipeline.run('grid')
+    top_candidates = pipeline.run('sites')
+    wind = pipeline.run('wind')
+    wind_min, wind_max = wind['wind_min'], wind['wind_max']
+    if export_cog:
+        pipeline.run('layers')
     
-    df_results = pd.DataFrame(results)
-    print(f"   Valid land points evaluated: {len(df_results)}")
+    # Valid cells as a table (row-major, same order as a lat/lon double loop)
+    valid = grid['valid']
+    results = {key: grid[key][valid] for key in ['lat', 'lon', 'wind_ms', 'wind_norm', 'risk', 'score']}
+    print(f"   Valid land points evaluated: {len(results['score'])}")
     
     # 4. Create Map
     center_lat = (GALICIA_BOUNDS["lat_min"] + GALICIA_BOUNDS["lat_max"]) / 2
@@ -167,21 +557,37 @@ def create_placement_map():
     
     m = folium.Map(location=[center_lat, center_lon], zoom_start=8, tiles='CartoDB dark_matter')
     
-    # Heatmap of scores - SHARPER and CLEARER
-    heat_data = [[row['lat'], row['lon'], row['score']] for _, row in df_results.iterrows()]
-    HeatMap(
-        heat_data,
-        name='Optimal Placement Score',
-        min_opacity=0.4,
-        radius=12,  # Smaller for sharper focus
-        blur=8,     # Less blur for clarity
-        gradient={0.0: '#8B0000', 0.25: '#FF4500', 0.5: '#FFD700', 0.75: '#7CFC00', 1.0: '#00FF00'}
-    ).add_to(m)
+    if tiles:
+        # Pre-rendered native-resolution score tiles, loaded by the browser only where in view
+        tile_meta = pipeline.run('tiles')
+        west, south, east, north = tile_meta['bounds']
+        tile_url = os.path.relpath(TILES_DIR, os.path.dirname(OUTPUT_MAP)).replace(os.sep, '/') + '/{z}/{x}/{y}.png'
+        folium.TileLayer(
+            tiles=tile_url,
+            attr='Green Energy Sentinel',
+            name='Optimal Placement Score',
+            overlay=True,
+            max_native_zoom=tile_meta['max_zoom'],
+            min_zoom=tile_meta['min_zoom'],
+            bounds=[[south, west], [north, east]],
+            opacity=0.85
+        ).add_to(m)
+    else:
+        # Heatmap of scores - SHARPER and CLEARER
+        with span("map:heatmap") as s:
+            heat_data = np.column_stack((results['lat'], results['lon'], results['score'])).tolist()
+            HeatMap(
+                heat_data,
+                name='Optimal Placement Score',
+                min_opacity=0.4,
+                radius=12,  # Smaller for sharper focus
+                blur=8,     # Less blur for clarity
+                gradient=SCORE_GRADIENT
+            ).add_to(m)
+            s.count(len(heat_data))
     
     # Top 10 Numbered Markers with Icons
-    if not df_results.empty:
-        top_candidates = df_results.nlargest(10, 'score')
-        
+    if not top_candidates.empty:
         for rank, (_, row) in enumerate(top_candidates.iterrows(), 1):
             # Custom numbered marker using DivIcon
             icon_html = f'''
@@ -230,45 +636,31 @@ def create_placement_map():
             print(f"  {i+1}. ({row['lat']:.4f}, {row['lon']:.4f}) | Wind: {row['wind_ms']:.1f} m/s | Risk: {row['risk']:.0%} | Score: {row['score']:.2f}")
     
     # 5. Add REAL Existing Turbines (OpenStreetMap Data)
-    print("🏗️ Fetching real wind turbine locations from OpenStreetMap...")
-    try:
-        overpass_url = "http://overpass-api.de/api/interpreter"
-        overpass_query = f"""
-        [out:json];
-        (
-          node["generator:source"="wind"]({GALICIA_BOUNDS['lat_min']},{GALICIA_BOUNDS['lon_min']},{GALICIA_BOUNDS['lat_max']},{GALICIA_BOUNDS['lon_max']});
-        );
-        out center;
-        """
-        response = requests.get(overpass_url, params={'data': overpass_query}, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            turbines = data.get('elements', [])
-            print(f"   Found {len(turbines)} existing turbines in the area.")
-            
-            # Create a FeatureGroup for turbines so they can be toggled
+    print("🏗️ Loading real wind turbine locations (OpenStreetMap inventory)...")
+    turbines = pipeline.run('turbines')
+    if turbines is not None:
+        print(f"   Found {len(turbines['id'])} existing turbines in the area.")
+        
+        # Create a FeatureGroup for turbines so they can be toggled
+        with span("map:turbines") as s:
             turbine_layer = folium.FeatureGroup(name="Existing Turbines (OSM)")
             
-            for turbine in turbines:
-                lat = turbine.get('lat')
-                lon = turbine.get('lon')
-                if lat and lon:
-                    folium.CircleMarker(
-                        location=[lat, lon],
-                        radius=2,
-                        color='#888',
-                        fill=True,
-                        fill_color='#555',
-                        fill_opacity=0.6,
-                        popup="Existing Turbine",
-                        weight=0
-                    ).add_to(turbine_layer)
+            for lat, lon in zip(turbines['lat'].tolist(), turbines['lon'].tolist()):
+                folium.CircleMarker(
+                    location=[lat, lon],
+                    radius=2,
+                    color='#888',
+                    fill=True,
+                    fill_color='#555',
+                    fill_opacity=0.6,
+                    popup="Existing Turbine",
+                    weight=0
+                ).add_to(turbine_layer)
             
             turbine_layer.add_to(m)
-        else:
-            print("   ⚠️ Could not fetch existing turbines (API limits).")
-    except Exception as e:
-        print(f"   ⚠️ Error fetching turbines: {e}")
+            s.count(len(turbines['id']))
+    else:
+        print("   ⚠️ Could not load existing turbines.")
     
     # Title Header
     title_html = '''
@@ -311,8 +703,14 @@ def create_placement_map():
     
     folium.LayerControl().add_to(m)
     
-    m.save(OUTPUT_MAP)
+    with span("save html") as s:
+        m.save(OUTPUT_MAP)
+        s.set(bytes=os.path.getsize(OUTPUT_MAP))
     print(f"\n✅ Map saved to: {os.path.abspath(OUTPUT_MAP)}")
 
 if __name__ == "__main__":
-    create_placement_map()
+    from sentinel import add_score_arguments, score_options
+    parser = argparse.ArgumentParser(description="Build the wind farm suitability map.")
+    args = add_score_arguments(parser).parse_args()
+    with profile_run("optimal_placement", args.profile, profiler=args.profile_dump):
+        create_placement_map(**score_options(args))
@@ -0,0 +1,203 @@
+"""
+Green Energy Sentinel - Memoized Pipeline
+A small dependency graph of named stages whose results are cached on disk.
+A stage's cache key combines its name, a fingerprint of its code, its
+parameters, fingerprints of its external inputs (file contents, the strike
+archive, the turbine inventory) and the keys of the stages it depends on, so
+changing any of them reruns that stage and everything downstream while the
+rest is read back from the cache. A cached stage never loads its
+dependencies. Every stage run is a profiling span (see profiling.py).
+
+The code fingerprint hashes the stage function's own source plus the
+helpers listed in the stage's `code`: functions by their source, modules by
+their whole file. Editing a declared helper reruns the stages that use it,
+while edits elsewhere in the stage's module (e.g. map styling next to the
+stage functions) leave the cache valid.
+
+Layout:
+    data/pipeline/<stage>/<key>.pkl   pickled stage result
+    data/pipeline/file_digests.json   content hashes by (path, size, mtime)
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import time
+
+from profiling import span
+
+# Configuration
+PIPELINE_CACHE_DIR = "data/pipeline"
+DIGEST_INDEX = "file_digests.json"
+MAX_ENTRIES_PER_STAGE = 8   # Older results of a stage are pruned beyond this
+HASH_CHUNK = 1 << 20
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def file_digest(path, cache_dir=PIPELINE_CACHE_DIR):
+    """Content hash of a file, recomputed only when its size or mtime changes. None if missing."""
+    path = os.path.abspath(path)
+    if not os.path.exists(path):
+        return None
+    info = os.stat(path)
+    stamp = [info.st_size, info.st_mtime_ns]
+
+    index_path = os.path.join(cache_dir, DIGEST_INDEX)
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+    cached = index.get(path)
+    if cached and cached["stamp"] == stamp:
+        return cached["sha1"]
+
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            sha1.update(chunk)
+    index[path] = {"stamp": stamp, "sha1": sha1.hexdigest()}
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+    return index[path]["sha1"]
+
+
+def strike_archive_digest():
+    """Fingerprint of the strike archive, after ingesting any new or changed source files."""
+    from strike_store import INDEX_FILE, STORE_DIR, build_store
+    build_store()
+    return file_digest(os.path.join(STORE_DIR, INDEX_FILE))
+
+
+def turbine_inventory_digest(bbox):
+    """Fingerprint of the cached turbine inventory for `bbox`, or None when it needs a refresh."""
+    from turbine_inventory import (CACHE_TTL_SECONDS, FIXTURE_ENV, OFFLINE_ENV, build_query, cache_key,
+                                   read_cache)
+    fixture = os.environ.get(FIXTURE_ENV)
+    if fixture:
+        return file_digest(fixture)
+    _, meta = read_cache(cache_key(build_query(bbox)))
+    if meta is None:
+        return None
+    offline = os.environ.get(OFFLINE_ENV, "") not in ("", "0")
+    if not offline and time.time() - meta["fetched_at"] >= CACHE_TTL_SECONDS:
+        return None
+    return meta["fetched_at"]
+
+
+def code_digest(code, cache_dir=PIPELINE_CACHE_DIR):
+    """Fingerprint of a stage's code dependency.
+
+    A function (or class) is fingerprinted by its own source; a module
+    (object or importable name) by the content hash of its source file.
+    """
+    if isinstance(code, str):
+        code = importlib.import_module(code)
+    if not inspect.ismodule(code):
+        try:
+            return inspect.getsource(code)
+        except (OSError, TypeError):
+            return getattr(code, "__qualname__", repr(code))
+    try:
+        path = inspect.getsourcefile(code)
+    except TypeError:
+        path = None
+    digest = file_digest(path, cache_dir) if path else None
+    return digest or code.__name__
+
+
+class Pipeline:
+    """Named stages with dependencies, each memoized on disk (see module docstring).
+
+    With force=True every stage reruns (and its cache entry is rewritten).
+    """
+
+    def __init__(self, cache_dir=PIPELINE_CACHE_DIR, force=False):
+        self.cache_dir = cache_dir
+        self.force = force
+        self._stages = {}
+        self._keys = {}
+        self._values = {}
+
+    def add(self, name, fn, deps=(), inputs=(), params=None, outputs=(), code=(), version=1):
+        """Register stage `name`, computed as fn(*dep_results, **params).
+
+        `inputs` are file paths (hashed by content) or zero-argument callables
+        returning a JSON-serializable fingerprint; a None fingerprint means
+        the input cannot be trusted and the stage always reruns. `outputs`
+        are files the stage writes: the stage reruns when one is missing.
+        `code` lists the helpers fn calls whose source the result depends on:
+        functions (hashed by their source) or modules (objects or names,
+        hashed whole). fn's own source is always included.
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage {name!r} is already defined")
+        self._stages[name] = {"fn": fn, "deps": list(deps), "inputs": list(inputs),
+                              "params": dict(params or {}), "outputs": list(outputs), "code": list(code),
+                              "version": version}
+        return self
+
+    def key(self, name):
+        """Cache key of a stage, or None when one of its (upstream) inputs is volatile."""
+        if name not in self._keys:
+            stage = self._stages[name]
+            fingerprints = [file_digest(item, self.cache_dir) if isinstance(item, str) else item()
+                            for item in stage["inputs"]]
+            dep_keys = [self.key(dep) for dep in stage["deps"]]
+            if any(value is None for value in fingerprints + dep_keys):
+                self._keys[name] = None
+            else:
+                code = [code_digest(item, self.cache_dir) for item in [stage["fn"], *stage["code"]]]
+                self._keys[name] = _digest({"stage": name, "code": code, "version": stage["version"],
+                                            "params": stage["params"], "inputs": fingerprints,
+                                            "deps": dep_keys})[:16]
+        return self._keys[name]
+
+    def _path(self, name, key):
+        return os.path.join(self.cache_dir, name, f"{key}.pkl")
+
+    def run(self, name):
+        """Result of stage `name`, read from the cache when its key is unchanged."""
+        if name in self._values:
+            return self._values[name]
+        stage = self._stages[name]
+        key = self.key(name)
+        path = self._path(name, key) if key else None
+        outputs_exist = all(os.path.exists(output) for output in stage["outputs"])
+
+        if path and not self.force and outputs_exist and os.path.exists(path):
+            with span(f"stage:{name}", cached=True):
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+            print(f"   ♻️ {name}: cached")
+        else:
+            args = [self.run(dep) for dep in stage["deps"]]
+            start = time.perf_counter()
+            with span(f"stage:{name}", cached=False):
+                value = stage["fn"](*args, **stage["params"])
+                if path:
+                    self._store(name, path, value)
+            print(f"   ⚙️ {name}: computed in {time.perf_counter() - start:.2f}s")
+        self._values[name] = value
+        return value
+
+    def _store(self, name, path, value):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+        stage_dir = os.path.dirname(path)
+        entries = sorted((os.path.join(stage_dir, entry) for entry in os.listdir(stage_dir) if entry.endswith(".pkl")),
+                         key=os.path.getmtime, reverse=True)
+        for old in entries[MAX_ENTRIES_PER_STAGE:]:
+            os.remove(old)
@@ -0,0 +1,228 @@
+"""
+Green Energy Sentinel - Run Profiling
+Lightweight spans for the entry points: each records wall time, CPU time
+(own and of finished child processes), resident memory at start/end, the
+process's peak RSS so far and an optional item count, so a slow run can be
+pinned on JSON loading, shapely, Overpass or HTML serialization. Spans nest;
+pipeline stages are spans automatically (see pipeline.Pipeline.run).
+
+Off unless a script runs with --profile (or SENTINEL_PROFILE=1). When off,
+span() returns one shared no-op object and @traced calls straight through.
+
+    with span("load strikes") as s:
+        strikes = load_strikes(...)
+        s.count(strike_count(strikes))
+
+    with profile_run("optimal_placement", args.profile, profiler=args.profile_dump):
+        create_placement_map(...)
+
+Layout:
+    reports/profiles/<script>-<YYYYmmdd-HHMMSS>.json    run profile (spans in start order)
+    reports/profiles/<script>-<YYYYmmdd-HHMMSS>.prof    with --profile-dump cprofile (pstats)
+    reports/profiles/<script>-<YYYYmmdd-HHMMSS>.html    with --profile-dump pyinstrument
+"""
+
+import cProfile
+import functools
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Configuration
+PROFILE_DIR = "reports/profiles"
+PROFILE_ENV = "SENTINEL_PROFILE"
+PROFILERS = ("cprofile", "pyinstrument")
+
+_run = None  # active _Run while a profiled run is in progress, else None
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    """High-water resident set size of this process (or its finished children) in MB."""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10  # bytes on macOS, KB on Linux
+
+
+def _rss_mb():
+    """Current resident set size in MB (None where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _cpu_times():
+    times = os.times()
+    return times.user + times.system, times.children_user + times.children_system
+
+
+class _NullSpan:
+    """Span stand-in while profiling is off: every call is a no-op."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, n=1):
+        pass
+
+    def set(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Run:
+    def __init__(self, script):
+        self.script = script
+        self.started = datetime.now()
+        self.origin = time.perf_counter()
+        self.stack = []
+        self.spans = []
+
+
+class Span:
+    """One timed block of a profiled run (use span() or @traced rather than this class)."""
+
+    def __init__(self, run, name, fields):
+        self.run = run
+        self.name = name
+        self.fields = dict(fields)
+        self.items = None
+
+    def count(self, n=1):
+        """Add n to the span's item count (strikes loaded, features built...)."""
+        self.items = (self.items or 0) + int(n)
+
+    def set(self, **fields):
+        """Attach extra JSON-serializable fields to the span's record."""
+        self.fields.update(fields)
+
+    def __enter__(self):
+        self.path = "/".join([s.name for s in self.run.stack] + [self.name])
+        self.run.stack.append(self)
+        self.rss_start = _rss_mb()
+        self.cpu_start, self.child_cpu_start = _cpu_times()
+        self.wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall_end = time.perf_counter()
+        cpu_end, child_cpu_end = _cpu_times()
+        self.run.stack.pop()
+        record = {"name": self.name, "path": self.path, "depth": self.path.count("/"),
+                  "start_s": round(self.wall_start - self.run.origin, 4),
+                  "wall_s": round(wall_end - self.wall_start, 4),
+                  "cpu_s": round(cpu_end - self.cpu_start, 4),
+                  "child_cpu_s": round(child_cpu_end - self.child_cpu_start, 4),
+                  "rss_start_mb": self.rss_start, "rss_end_mb": _rss_mb(),
+                  "peak_rss_mb": _peak_rss_mb(), "items": self.items, **self.fields}
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        self.run.spans.append(record)
+        return False
+
+
+def span(name, **fields):
+    """Context manager timing the enclosed block as span `name` (a no-op when profiling is off)."""
+    if _run is None:
+        return _NULL_SPAN
+    return Span(_run, name, fields)
+
+
+def traced(name=None):
+    """Decorator running every call of a function inside span(name or its qualified name)."""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _run is None:
+                return fn(*args, **kwargs)
+            with Span(_run, label, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def add_profile_arguments(parser):
+    """Add --profile and --profile-dump to an entry point's argparse parser."""
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Record per-stage time and memory to a JSON profile in {PROFILE_DIR}/")
+    parser.add_argument("--profile-dump", choices=PROFILERS, default=None,
+                        help="Also dump a cProfile (.prof) or pyinstrument (.html) profile (implies --profile)")
+    return parser
+
+
+def _start_profiler(profiler):
+    if profiler == "cprofile":
+        dump = cProfile.Profile()
+        dump.enable()
+        return dump
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("   ⚠️ pyinstrument is not installed (pip install pyinstrument); skipping the dump.")
+            return None
+        dump = Profiler()
+        dump.start()
+        return dump
+    return None
+
+
+def _stop_profiler(dump, profiler, base_path):
+    if dump is None:
+        return None
+    if profiler == "cprofile":
+        dump.disable()
+        dump.dump_stats(f"{base_path}.prof")
+        return f"{base_path}.prof"
+    dump.stop()
+    with open(f"{base_path}.html", 'w') as f:
+        f.write(dump.output_html())
+    return f"{base_path}.html"
+
+
+@contextmanager
+def profile_run(script, enabled=False, out_dir=PROFILE_DIR, profiler=None):
+    """Profile the enclosed run of entry point `script` as one root span.
+
+    Enabled by `enabled`, a `profiler` dump ('cprofile' or 'pyinstrument')
+    or the SENTINEL_PROFILE environment variable. On exit, even after an
+    error, the run profile is written to out_dir and its path printed.
+    Yields the active run, or None when profiling is off.
+    """
+    global _run
+    enabled = enabled or profiler is not None or os.environ.get(PROFILE_ENV, "") not in ("", "0")
+    if not enabled or _run is not None:
+        yield _run
+        return
+
+    run = _run = _Run(script)
+    base_path = os.path.join(out_dir, f"{script}-{run.started:%Y%m%d-%H%M%S}")
+    dump = _start_profiler(profiler)
+    try:
+        with Span(run, script, {}):
+            yield run
+    finally:
+        _run = None
+        os.makedirs(out_dir, exist_ok=True)
+        dump_path = _stop_profiler(dump, profiler, base_path)
+        root = run.spans[-1]
+        profile = {"script": script, "argv": sys.argv, "started": run.started.isoformat(timespec="seconds"),
+                   "python": sys.version.split()[0], "wall_s": root["wall_s"], "cpu_s": root["cpu_s"],
+                   "child_cpu_s": root["child_cpu_s"], "peak_rss_mb": _peak_rss_mb(),
+                   "peak_child_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN), "dump": dump_path,
+                   "spans": sorted(run.spans, key=lambda record: record["start_s"])}
+        with open(f"{base_path}.json", 'w') as f:
+            json.dump(profile, f, indent=2)
+        print(f"⏱️ Run profile saved to: {os.path.abspath(base_path)}.json"
+              + (f" (+ {os.path.basename(dump_path)})" if dump_path else ""))
@@ -0,0 +1,82 @@
+"""
+Green Energy Sentinel - Offline Reverse Geocoding
+Names the municipality under each point with a local point-in-polygon lookup,
+replacing per-point Nominatim requests. Municipality boundaries are read once
+from a GeoJSON file and indexed with an STRtree; thousands of points are
+resolved in a single vectorized query.
+
+The boundaries default to MUNICIPALITIES_GEOJSON, built by
+fetch_municipalities.py from GADM level 4. Any GeoJSON of municipal
+boundaries works (e.g. the IGN "recintos municipales"); the name is taken
+from the first property in NAME_PROPERTIES that the features carry.
+"""
+
+import json
+import os
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+from config import MUNICIPALITIES_GEOJSON
+from profiling import traced
+
+# Configuration
+NAME_PROPERTIES = ["NAME_4", "NAMEUNIT", "NOMBRE", "NOME", "name", "NAME_3"]
+FALLBACK_NAME = "Galicia Rural"
+SNAP_DEGREES = 0.01   # Points this close to a boundary (e.g. coastal turbines) take the nearest municipality
+
+_loaded = {}  # path -> (names, geometries, STRtree), kept warm between lookups
+
+
+@traced("load municipalities")
+def load_municipalities(path=MUNICIPALITIES_GEOJSON):
+    """(names, geometries, STRtree) for a municipality GeoJSON (FeatureCollection or single Feature)."""
+    path = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, 'r') as f:
+        data = json.load(f)
+    features = data.get('features', [data])
+    properties = features[0].get('properties', {}) if features else {}
+    name_key = next((key for key in NAME_PROPERTIES if key in properties), None)
+    if name_key is None:
+        raise ValueError(f"{path}: no municipality name property (expected one of {NAME_PROPERTIES})")
+
+    names = np.array([feature['properties'].get(name_key) or FALLBACK_NAME for feature in features])
+    geometries = np.array([shape(feature['geometry']) for feature in features])
+    municipalities = (names, geometries, shapely.STRtree(geometries))
+    _loaded[path] = (mtime, municipalities)
+    return municipalities
+
+
+def reverse_geocode(lon, lat, path=MUNICIPALITIES_GEOJSON, fallback=FALLBACK_NAME):
+    """Municipality name for each lon/lat point (arrays), `fallback` where none applies.
+
+    Points outside every polygon but within SNAP_DEGREES of one get the
+    nearest municipality. Without a boundary file every point gets `fallback`.
+    """
+    lon = np.atleast_1d(np.asarray(lon, dtype="float64"))
+    lat = np.atleast_1d(np.asarray(lat, dtype="float64"))
+    labels = np.full(len(lon), fallback, dtype=object)
+    if not len(lon):
+        return labels
+    if not os.path.exists(path):
+        print(f"   ⚠️ Municipality boundaries not found ({path}), using '{fallback}'.")
+        return labels
+
+    names, geometries, tree = load_municipalities(path)
+    points = shapely.points(lon, lat)
+
+    # Points on a shared border match several polygons: the first one wins
+    point_idx, poly_idx = tree.query(points, predicate="intersects")
+    first = np.unique(point_idx, return_index=True)[1]
+    labels[point_idx[first]] = names[poly_idx[first]]
+
+    missing = np.flatnonzero(~np.isin(np.arange(len(lon)), point_idx))
+    if len(missing):
+        near_idx, near_poly = tree.query_nearest(points[missing], max_distance=SNAP_DEGREES, all_matches=False)
+        labels[missing[near_idx]] = names[near_poly]
+    return labels
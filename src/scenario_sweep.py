@@ -0,0 +1,206 @@
+"""
+Green Energy Sentinel - Scenario Sweep
+Evaluates many variants of the suitability model in one run. The expensive
+layers (wind raster sampled on the placement grid, land mask, strike
+coordinates) are loaded once; each scenario then only rebuilds its risk map
+and scores, and scenarios run in parallel across processes. No map is drawn
+and Overpass is never contacted.
+
+A scenario sets:
+    wind_weight, risk_weight  exponents of the two factors:
+                              score = wind_norm**wind_weight * (1 - risk**risk_exponent)**risk_weight
+    risk_exponent             shapes the risk penalty (>1 forgives low risk, <1 punishes it)
+    sigma, bins               Gaussian blur and histogram bins of the risk map
+    wind_threshold            minimum wind speed (m/s) for a cell to be a candidate
+The defaults (1, 1, 1, RISK_SIGMA, RISK_BINS, 0) reproduce optimal_placement.
+
+Outputs:
+    reports/scenario_sweep.csv        one row per scenario: parameters, best site and
+                                      rank stability against the baseline scenario
+    reports/scenario_sweep_sites.csv  top sites of every scenario, with the share of
+                                      scenarios that also rank each site in their top k
+"""
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata, spearmanr
+
+from config import END_DATE, GALICIA_BOUNDS, GALICIA_GEOJSON, GRID_RESOLUTION, MIN_SITE_SPACING_M, START_DATE
+from land_mask import land_mask_for_nodes, load_boundary
+from optimal_placement import (RISK_BINS, RISK_SIGMA, TOP_K, load_wind_raster, risk_density, sample_risk, sample_wind,
+                               score_cells)
+from site_selection import grid_locator, spaced_top_k
+from strike_store import load_strikes
+
+# Configuration
+SWEEP_FILE = "reports/scenario_sweep.csv"
+SWEEP_SITES_FILE = "reports/scenario_sweep_sites.csv"
+
+# Scenario parameter -> baseline value (the model of optimal_placement)
+BASELINE = {
+    "wind_weight": 1.0,
+    "risk_weight": 1.0,
+    "risk_exponent": 1.0,
+    "sigma": RISK_SIGMA,
+    "bins": RISK_BINS,
+    "wind_threshold": 0.0,
+}
+
+_layers = None  # set in each worker process by _init_worker
+
+
+def load_layers(resolution=GRID_RESOLUTION):
+    """Scenario-independent inputs on the resolution x resolution placement grid."""
+    galicia_shape = load_boundary(GALICIA_GEOJSON)
+    wind_data, transform, nodata = load_wind_raster()
+    valid_wind = wind_data[wind_data != nodata] if nodata else wind_data.flatten()
+
+    grid_lats = np.linspace(GALICIA_BOUNDS["lat_min"], GALICIA_BOUNDS["lat_max"], resolution)
+    grid_lons = np.linspace(GALICIA_BOUNDS["lon_min"], GALICIA_BOUNDS["lon_max"], resolution)
+    lon_grid, lat_grid = np.meshgrid(grid_lons, grid_lats)
+
+    print("⚡ Loading lightning strikes...")
+    strikes = load_strikes(START_DATE, END_DATE, GALICIA_BOUNDS)
+    return {
+        "lat": lat_grid, "lon": lon_grid,
+        "on_land": land_mask_for_nodes(galicia_shape, grid_lons, grid_lats),
+        "wind_ms": sample_wind(wind_data, transform, lon_grid, lat_grid, nodata),
+        "wind_min": valid_wind.min(), "wind_max": valid_wind.max(),
+        "strike_lat": np.asarray(strikes["lat"]), "strike_lon": np.asarray(strikes["lon"]),
+    }
+
+
+def scenario_grid(**values):
+    """Cartesian product of parameter values (lists keyed like BASELINE) as scenario dicts.
+
+    Parameters left out keep their baseline value. The baseline scenario is
+    always the first one, added if the product does not contain it.
+    """
+    names = list(BASELINE)
+    options = [values.get(name) or [BASELINE[name]] for name in names]
+    scenarios = [dict(zip(names, combo)) for combo in itertools.product(*options)]
+    if BASELINE in scenarios:
+        scenarios.remove(BASELINE)
+    return [dict(BASELINE)] + scenarios
+
+
+def score_scenario(layers, scenario, top_k=TOP_K, min_spacing_m=MIN_SITE_SPACING_M):
+    """(score grid, top-k flat indices, risk grid) of one scenario; NaN scores where invalid."""
+    risk_map, x_edges, y_edges = risk_density(layers["strike_lat"], layers["strike_lon"],
+                                              int(scenario["bins"]), scenario["sigma"])
+    risk = sample_risk(risk_map, x_edges, y_edges, layers["lat"], layers["lon"])
+    wind_norm, _, valid = score_cells(layers["wind_ms"], layers["on_land"], risk,
+                                      layers["wind_min"], layers["wind_max"])
+    with np.errstate(invalid='ignore'):
+        valid &= layers["wind_ms"] >= scenario["wind_threshold"]
+        score = np.where(valid, wind_norm ** scenario["wind_weight"]
+                         * (1 - risk ** scenario["risk_exponent"]) ** scenario["risk_weight"], np.nan)
+    top = spaced_top_k(score, top_k, min_spacing_m, grid_locator(layers["lon"], layers["lat"]))
+    return score, top, risk
+
+
+def _init_worker(layers):
+    global _layers
+    _layers = layers
+
+
+def _run_scenario(args):
+    scenario, top_k, min_spacing_m = args
+    return score_scenario(_layers, scenario, top_k, min_spacing_m)
+
+
+def score_ranks(score):
+    """Rank of every cell by descending score (1 = best); invalid cells rank after all valid ones."""
+    flat = score.ravel()
+    ranks = np.full(flat.shape, np.isfinite(flat).sum() + 1.0)
+    valid = np.isfinite(flat)
+    ranks[valid] = rankdata(-flat[valid], method="min")
+    return ranks
+
+
+def stability(base_score, base_top, score, top):
+    """Rank stability of a scenario against the baseline.
+
+    top_k_overlap: share of the baseline top sites that stay in the top k.
+    mean_rank_shift: mean absolute rank change of the baseline top sites.
+    spearman: rank correlation of the scores over cells valid in both.
+    """
+    base_ranks, ranks = score_ranks(base_score), score_ranks(score)
+    both = np.isfinite(base_score.ravel()) & np.isfinite(score.ravel())
+    rho = spearmanr(base_score.ravel()[both], score.ravel()[both])[0] if both.sum() > 1 else np.nan
+    return {
+        "top_k_overlap": len(np.intersect1d(base_top, top)) / len(base_top) if len(base_top) else np.nan,
+        "mean_rank_shift": float(np.abs(ranks[base_top] - base_ranks[base_top]).mean()) if len(base_top) else np.nan,
+        "spearman": float(rho),
+    }
+
+
+def run_sweep(scenarios, layers, top_k=TOP_K, min_spacing_m=MIN_SITE_SPACING_M, workers=None):
+    """Score every scenario (in `workers` processes; 1 = in this process).
+
+    Returns (summary, sites): one summary row per scenario and the long table
+    of top sites. The first scenario is the reference for rank stability.
+    """
+    jobs = [(scenario, top_k, min_spacing_m) for scenario in scenarios]
+    if workers == 1:
+        _init_worker(layers)
+        results = list(map(_run_scenario, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(layers,)) as pool:
+            results = list(pool.map(_run_scenario, jobs))
+
+    base_score, base_top, _ = results[0]
+    # How many scenarios place each grid cell in their top k
+    appearances = np.bincount(np.concatenate([top for _, top, _ in results]), minlength=base_score.size)
+
+    summary, sites = [], []
+    for number, (scenario, (score, top, risk)) in enumerate(zip(scenarios, results)):
+        row = {"scenario": number, **scenario, "valid_cells": int(np.isfinite(score).sum())}
+        if len(top):
+            row.update(top_lat=layers["lat"].ravel()[top[0]], top_lon=layers["lon"].ravel()[top[0]],
+                       top_score=score.ravel()[top[0]], mean_top_k_score=np.nanmean(score.ravel()[top]))
+        summary.append({**row, **stability(base_score, base_top, score, top)})
+        for rank, cell in enumerate(top.tolist(), 1):
+            sites.append({"scenario": number, "rank": rank,
+                          "lat": layers["lat"].ravel()[cell], "lon": layers["lon"].ravel()[cell],
+                          "wind_ms": layers["wind_ms"].ravel()[cell], "risk": risk.ravel()[cell],
+                          "score": score.ravel()[cell], "frequency": appearances[cell] / len(scenarios)})
+    return pd.DataFrame(summary).set_index("scenario"), pd.DataFrame(sites)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate a grid of suitability scenarios in parallel.")
+    parser.add_argument("--wind-weight", type=float, nargs="+", help="Exponent of the wind factor")
+    parser.add_argument("--risk-weight", type=float, nargs="+", help="Exponent of the (1 - risk) factor")
+    parser.add_argument("--risk-exponent", type=float, nargs="+", help="Exponent applied to the risk itself")
+    parser.add_argument("--sigma", type=float, nargs="+", help="Gaussian blur of the risk histogram (bins)")
+    parser.add_argument("--bins", type=int, nargs="+", help="Risk histogram bins per axis")
+    parser.add_argument("--wind-threshold", type=float, nargs="+", help="Minimum wind speed (m/s)")
+    parser.add_argument("--resolution", type=int, default=GRID_RESOLUTION, help="Placement grid nodes per axis")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--min-spacing", type=float, default=MIN_SITE_SPACING_M,
+                        help="Minimum distance in meters between top sites")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    scenarios = scenario_grid(**{name: getattr(args, name) for name in BASELINE})
+    print(f"🧪 Scenario sweep: {len(scenarios)} scenarios on a {args.resolution}x{args.resolution} grid")
+    layers = load_layers(args.resolution)
+
+    start = time.perf_counter()
+    summary, sites = run_sweep(scenarios, layers, args.top_k, args.min_spacing, args.workers)
+    print(f"   Scored in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(os.path.dirname(SWEEP_FILE), exist_ok=True)
+    summary.to_csv(SWEEP_FILE)
+    sites.to_csv(SWEEP_SITES_FILE, index=False)
+
+    with pd.option_context("display.width", 160, "display.max_columns", None, "display.precision", 3):
+        print(summary[list(BASELINE) + ["top_score", "top_k_overlap", "mean_rank_shift", "spearman"]])
+    print(f"\n✅ Scenario table saved to: {os.path.abspath(SWEEP_FILE)}")
+    print(f"✅ Top sites saved to: {os.path.abspath(SWEEP_SITES_FILE)}")
@@ -0,0 +1,285 @@
+"""
+Green Energy Sentinel - Site Scoring Service
+Local HTTP service that keeps the wind raster, lightning risk surface and
+land mask in memory and answers batched score queries with vectorized
+lookups, so GIS tools can ask "what is the score at these parcels?" without
+rerunning the map. Layers come from the placement pipeline cache (see
+optimal_placement.placement_pipeline), and the scores are those of
+score_native at the wind raster's native resolution.
+
+Built on asyncio streams (no extra dependencies): HTTP/1.1 with keep-alive,
+JSON in and out, NaN reported as null. Queries are scored on a thread pool
+(numpy releases the GIL in the heavy lookups), so a large batch never
+stalls the event loop or the other connections.
+
+Endpoints:
+    GET  /health           layer summary
+    POST /score/points     {"lon": [...], "lat": [...]} or {"points": [[lon, lat], ...]}
+                           -> columns score, wind_ms, wind_norm, risk, on_land, valid
+    POST /score/polygons   GeoJSON FeatureCollection, Feature list or geometry list
+                           -> per polygon: pixels, valid_pixels, land_fraction,
+                              mean_score, max_score, best_lon, best_lat
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from rasterio.features import geometry_mask
+from rasterio.windows import Window, transform as window_transform
+from shapely.geometry import shape
+
+from config import NATIVE_BLOCK_ROWS
+from land_mask import land_mask
+from optimal_placement import placement_pipeline, sample_risk, score_cells, score_native
+
+# Configuration
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_BODY_BYTES = 32 * 1024 * 1024   # Larger requests get 413
+MAX_POINTS = 1_000_000              # Points per /score/points request
+WORKERS = os.cpu_count() or 1       # Threads scoring queries concurrently
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    """A query the service cannot answer; carries the HTTP status to reply with."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _column(values):
+    """Float array -> JSON list with None for NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    return [None if v != v else v for v in values.tolist()]
+
+
+class ScoreService:
+    """Scoring layers loaded once, plus the HTTP request handling around them."""
+
+    def __init__(self, kde_bandwidth_m=None, weight_by_current=False, block_rows=NATIVE_BLOCK_ROWS,
+                 workers=WORKERS):
+        start = time.perf_counter()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="score")
+        pipeline = placement_pipeline(kde_bandwidth_m=kde_bandwidth_m, weight_by_current=weight_by_current)
+        galicia_shape = pipeline.run('boundary')
+        wind = pipeline.run('wind')
+        self.risk_map, self.x_edges, self.y_edges = pipeline.run('risk')
+
+        self.transform = wind['transform']
+        self.wind = wind['data'].astype(np.float64)
+        if wind['nodata'] is not None:
+            self.wind[self.wind == wind['nodata']] = np.nan
+        self.on_land = land_mask(galicia_shape, self.transform, self.wind.shape)
+        # Full-resolution score grid for polygon statistics (same values as --native)
+        self.score, _, self.wind_min, self.wind_max = score_native(
+            galicia_shape, self.risk_map, self.x_edges, self.y_edges, block_rows, top_k=1)
+        self.load_seconds = time.perf_counter() - start
+
+    # --- Queries -----------------------------------------------------------------
+
+    def _pixels(self, lons, lats):
+        """Raster row/col of each point and whether it falls inside the raster."""
+        cols, rows = ~self.transform * (lons, lats)
+        rows = np.floor(rows).astype(np.int64)
+        cols = np.floor(cols).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.wind.shape[0]) & (cols >= 0) & (cols < self.wind.shape[1])
+        return np.where(inside, rows, 0), np.where(inside, cols, 0), inside
+
+    def score_points(self, lons, lats):
+        """Columns of per-point values for the raster pixel under each point (NaN outside)."""
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        rows, cols, inside = self._pixels(lons, lats)
+
+        # Evaluated at the pixel center, exactly like score_native
+        center_lons, center_lats = self.transform * (cols + 0.5, rows + 0.5)
+        wind_ms = np.where(inside, self.wind[rows, cols], np.nan)
+        risk = np.where(inside, sample_risk(self.risk_map, self.x_edges, self.y_edges, center_lats, center_lons), np.nan)
+        on_land = inside & self.on_land[rows, cols]
+        wind_norm, score, valid = score_cells(wind_ms, on_land, risk, self.wind_min, self.wind_max)
+        return {"score": _column(score), "wind_ms": _column(wind_ms), "wind_norm": _column(wind_norm),
+                "risk": _column(risk), "on_land": on_land.tolist(), "valid": valid.tolist()}
+
+    def score_polygon(self, geometry):
+        """Score statistics over the raster pixels whose centers lie inside a lon/lat polygon.
+
+        A polygon smaller than a pixel (no center inside) uses the pixel under
+        its representative point.
+        """
+        height, width = self.score.shape
+        west, south, east, north = geometry.bounds
+        cols, rows = ~self.transform * (np.array([west, east]), np.array([north, south]))
+        row_off, col_off = max(int(np.floor(min(rows))), 0), max(int(np.floor(min(cols))), 0)
+        row_end, col_end = min(int(np.ceil(max(rows))), height), min(int(np.ceil(max(cols))), width)
+
+        inside = None
+        if row_end > row_off and col_end > col_off:
+            window = Window(col_off, row_off, col_end - col_off, row_end - row_off)
+            block = (slice(row_off, row_off + window.height), slice(col_off, col_off + window.width))
+            mask = geometry_mask([geometry], out_shape=(window.height, window.width),
+                                 transform=window_transform(window, self.transform), invert=True)
+            if mask.any():
+                r, c = np.nonzero(mask)
+                inside = (r + row_off, c + col_off)
+                scores, land = self.score[block][mask], self.on_land[block][mask]
+        if inside is None:
+            point = geometry.representative_point()
+            r, c, ok = self._pixels(np.array([point.x]), np.array([point.y]))
+            if not ok[0]:
+                return {"pixels": 0, "valid_pixels": 0, "land_fraction": None, "mean_score": None,
+                        "max_score": None, "best_lon": None, "best_lat": None}
+            inside = (r, c)
+            scores, land = self.score[r, c], self.on_land[r, c]
+
+        valid = np.isfinite(scores)
+        result = {"pixels": int(len(scores)), "valid_pixels": int(valid.sum()),
+                  "land_fraction": float(land.mean()), "mean_score": None, "max_score": None,
+                  "best_lon": None, "best_lat": None}
+        if valid.any():
+            best = int(np.nanargmax(scores))
+            best_lon, best_lat = self.transform * (inside[1][best] + 0.5, inside[0][best] + 0.5)
+            result.update(mean_score=float(scores[valid].mean()), max_score=float(scores[best]),
+                          best_lon=float(best_lon), best_lat=float(best_lat))
+        return result
+
+    # --- HTTP --------------------------------------------------------------------
+
+    def health(self):
+        return {"status": "ok", "raster_shape": list(self.score.shape),
+                "valid_pixels": int(np.isfinite(self.score).sum()),
+                "wind_range": [float(self.wind_min), float(self.wind_max)],
+                "load_seconds": round(self.load_seconds, 2)}
+
+    def route(self, method, path, body):
+        """(status, payload) for one request."""
+        path = path.split('?', 1)[0].rstrip('/') or '/'
+        routes = {'/health': ('GET', None), '/score/points': ('POST', self._points_request),
+                  '/score/polygons': ('POST', self._polygons_request)}
+        if path not in routes:
+            raise RequestError(404, f"Unknown endpoint {path}")
+        expected, handler = routes[path]
+        if method != expected:
+            raise RequestError(405, f"{path} expects {expected}")
+        if handler is None:
+            return 200, self.health()
+        try:
+            query = json.loads(body or b'{}')
+        except ValueError as e:
+            raise RequestError(400, f"Invalid JSON: {e}")
+        return 200, handler(query)
+
+    def respond(self, method, path, body):
+        """(status, payload) for one request, errors included (runs on the executor)."""
+        try:
+            return self.route(method, path, body)
+        except RequestError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:  # Never let one bad query take the service down
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    def _points_request(self, query):
+        if isinstance(query, dict) and 'points' in query:
+            points = np.asarray(query['points'], dtype=np.float64).reshape(-1, 2)
+            lons, lats = points[:, 0], points[:, 1]
+        elif isinstance(query, dict) and 'lon' in query and 'lat' in query:
+            lons = np.asarray(query['lon'], dtype=np.float64).ravel()
+            lats = np.asarray(query['lat'], dtype=np.float64).ravel()
+        else:
+            raise RequestError(400, "Expected {'lon': [...], 'lat': [...]} or {'points': [[lon, lat], ...]}")
+        if len(lons) != len(lats):
+            raise RequestError(400, "lon and lat must have the same length")
+        if len(lons) > MAX_POINTS:
+            raise RequestError(413, f"At most {MAX_POINTS} points per request")
+        return {"count": len(lons), **self.score_points(lons, lats)}
+
+    def _polygons_request(self, query):
+        if isinstance(query, dict) and query.get('type') == 'FeatureCollection':
+            items = query.get('features', [])
+        elif isinstance(query, dict) and 'geometries' in query:
+            items = query['geometries']
+        elif isinstance(query, list):
+            items = query
+        else:
+            raise RequestError(400, "Expected a FeatureCollection, {'geometries': [...]} or a list of geometries")
+        try:
+            geometries = [shape(item.get('geometry', item) if item.get('type') == 'Feature' else item)
+                          for item in items]
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise RequestError(400, f"Invalid geometry: {e}")
+        return {"count": len(geometries), "polygons": [self.score_polygon(g) for g in geometries]}
+
+    async def handle(self, reader, writer):
+        """Serve requests on one connection until the client closes it (HTTP/1.1 keep-alive)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                    length = int(headers.get('content-length') or 0)
+                except ValueError as e:
+                    method = path = None
+                    status, payload = 400, {"error": f"Malformed request: {e}"}
+                keep_alive = method is not None and version == 'HTTP/1.1' \
+                    and headers.get('connection', '').lower() != 'close'
+
+                if method is not None and length > MAX_BODY_BYTES:
+                    keep_alive = False   # The unread body would be parsed as the next request
+                    status, payload = 413, {"error": f"Body larger than {MAX_BODY_BYTES} bytes"}
+                elif method is not None:
+                    body = await reader.readexactly(length)
+                    status, payload = await asyncio.get_running_loop().run_in_executor(
+                        self.executor, self.respond, method, path, body)
+
+                data = json.dumps(payload).encode('utf-8')
+                writer.write((f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                              f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"🛰️ Scoring service listening on http://{host}:{port} (layers loaded in {self.load_seconds:.1f}s)")
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve batched site-score queries over HTTP.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--kde-bandwidth", type=float, default=None,
+                        help="Risk from a Gaussian KDE with this bandwidth in meters (as optimal_placement)")
+    parser.add_argument("--weight-by-current", action="store_true", help="Weight strikes by |peak current| in the KDE")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Threads scoring queries concurrently")
+    args = parser.parse_args()
+
+    service = ScoreService(args.kde_bandwidth, args.weight_by_current, workers=args.workers)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Scoring service stopped.")
+    finally:
+        service.executor.shutdown(wait=False)
@@ -0,0 +1,167 @@
+"""
+Green Energy Sentinel - Command Line Interface
+One entry point for the project's scripts. Each subcommand imports its
+heavy dependencies (folium, rasterio, geopandas, sklearn, matplotlib,
+pydeck...) only when it runs, and every default comes from config.py, so
+`sentinel --help` and quick queries start without loading the GIS stack.
+
+    python src/sentinel.py ingest [--fetch]        build the strike archive from data/strikes_*.json
+    python src/sentinel.py score [--native ...]    wind farm suitability map (optimal_placement.py)
+    python src/sentinel.py audit                   lightning attraction audit of the turbines
+    python src/sentinel.py municipalities          municipal boundaries that name the audited turbines
+    python src/sentinel.py propose                 new sites away from lightning clusters
+    python src/sentinel.py calendar                daily strike calendar (PNG)
+    python src/sentinel.py timelapse               animated strike map (HTML)
+    python src/sentinel.py 3d                      3D strike columns (HTML)
+    python src/sentinel.py max-strike              strongest strikes of the period
+
+Run from the repository root, like the scripts themselves.
+"""
+
+import argparse
+import os
+import sys
+
+from config import (END_DATE, LAYERS_COG, MIN_SITE_SPACING_M, MUNICIPALITIES_GEOJSON, NATIVE_BLOCK_ROWS, START_DATE,
+                    STORE_DIR, TILES_DIR)
+from profiling import add_profile_arguments, profile_run
+
+LEGACY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "legacy")
+
+
+def _use_legacy():
+    """Make the legacy scripts (and their sibling imports) importable."""
+    if LEGACY_DIR not in sys.path:
+        sys.path.insert(0, LEGACY_DIR)
+
+
+def add_score_arguments(parser):
+    """Options of the suitability map (shared with optimal_placement.py)."""
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--native", action="store_true",
+                      help="Score every wind raster pixel and take the top sites from the full-resolution grid")
+    mode.add_argument("--pyramid", action="store_true",
+                      help="Find the same top sites as --native by coarse-to-fine search, without the full score array")
+    parser.add_argument("--block-rows", type=int, default=NATIVE_BLOCK_ROWS,
+                        help="Raster rows per block in --native mode (and when building the wind pyramid)")
+    parser.add_argument("--min-spacing", type=float, default=MIN_SITE_SPACING_M,
+                        help="Minimum distance in meters between top sites (0 = plain top 10)")
+    parser.add_argument("--kde-bandwidth", type=float, default=None,
+                        help="Risk from a Gaussian KDE with this bandwidth in meters instead of the degree histogram")
+    parser.add_argument("--weight-by-current", action="store_true",
+                        help="Weight strikes by |peak current| in the KDE (with --kde-bandwidth)")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every pipeline stage")
+    parser.add_argument("--export-cog", action="store_true",
+                        help=f"Also write score/risk/wind/land layers as a Cloud-Optimized GeoTIFF ({LAYERS_COG})")
+    parser.add_argument("--tiles", action="store_true",
+                        help=f"Draw the score from pre-rendered XYZ tiles ({TILES_DIR}) instead of an embedded HeatMap")
+    return add_profile_arguments(parser)
+
+
+def score_options(args):
+    """create_placement_map keyword arguments of parsed add_score_arguments options."""
+    return dict(native=args.native, block_rows=args.block_rows, pyramid=args.pyramid,
+                min_spacing_m=args.min_spacing, kde_bandwidth_m=args.kde_bandwidth,
+                weight_by_current=args.weight_by_current, force=args.no_cache,
+                export_cog=args.export_cog, tiles=args.tiles)
+
+
+def run_ingest(args):
+    if args.fetch:
+        _use_legacy()
+        from analyze_risk import fetch_historical_data
+        fetch_historical_data(refresh=True)
+    from strike_store import build_archive
+    build_archive(STORE_DIR)
+
+
+def run_score(args):
+    from optimal_placement import create_placement_map
+    with profile_run("optimal_placement", args.profile, profiler=args.profile_dump):
+        create_placement_map(**score_options(args))
+
+
+def run_audit(args):
+    _use_legacy()
+    from final_audit import analyze_attraction_hypothesis
+    os.makedirs("reports", exist_ok=True)
+    with profile_run("final_audit", args.profile, profiler=args.profile_dump):
+        analyze_attraction_hypothesis(args.municipalities)
+
+
+def run_municipalities(args):
+    from fetch_municipalities import fetch_municipalities
+    fetch_municipalities(args.out, args.source)
+
+
+def run_propose(args):
+    _use_legacy()
+    from propose_sites import propose_sites
+    propose_sites()
+
+
+def run_calendar(args):
+    from visualize_calendar import create_premium_calendar
+    create_premium_calendar()
+
+
+def run_timelapse(args):
+    from create_timelapse import create_premium_timelapse
+    with profile_run("create_timelapse", args.profile, profiler=args.profile_dump):
+        create_premium_timelapse()
+
+
+def run_3d(args):
+    from visualize_3d import create_3d_viz
+    create_3d_viz()
+
+
+def run_max_strike(args):
+    _use_legacy()
+    from find_max_strike import find_max_strike
+    find_max_strike()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="sentinel", description=f"Green Energy Sentinel: lightning risk and wind farm siting ({START_DATE}-{END_DATE}).")
+    commands = parser.add_subparsers(dest="command", metavar="command", required=True)
+
+    ingest = commands.add_parser("ingest", help=f"Build the partitioned strike archive ({STORE_DIR})")
+    ingest.add_argument("--fetch", action="store_true",
+                        help="First download the date windows missing from the MeteoGalicia cache")
+    ingest.set_defaults(run=run_ingest)
+
+    score = commands.add_parser("score", help="Wind farm suitability map and top candidate sites")
+    add_score_arguments(score).set_defaults(run=run_score)
+
+    audit = commands.add_parser("audit", help="Lightning attraction audit of the existing turbines")
+    audit.add_argument("--municipalities", default=MUNICIPALITIES_GEOJSON,
+                       help="Municipal boundary GeoJSON used to name turbines (see the municipalities command)")
+    add_profile_arguments(audit).set_defaults(run=run_audit)
+
+    municipalities = commands.add_parser("municipalities",
+                                         help=f"Build the municipal boundaries that name turbines ({MUNICIPALITIES_GEOJSON})")
+    municipalities.add_argument("--source", default=None,
+                                help="Local GADM .zip/.json (or any municipality GeoJSON) instead of downloading")
+    municipalities.add_argument("--out", default=MUNICIPALITIES_GEOJSON)
+    municipalities.set_defaults(run=run_municipalities)
+
+    commands.add_parser("propose", help="Propose new sites away from lightning clusters").set_defaults(run=run_propose)
+    commands.add_parser("calendar", help="Daily strike count calendar (PNG)").set_defaults(run=run_calendar)
+
+    timelapse = commands.add_parser("timelapse", help="Animated timelapse map of the strikes (HTML)")
+    add_profile_arguments(timelapse).set_defaults(run=run_timelapse)
+
+    commands.add_parser("3d", help="3D map of strikes as columns by peak current (HTML)").set_defaults(run=run_3d)
+    commands.add_parser("max-strike", help="Strongest strikes of the period").set_defaults(run=run_max_strike)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
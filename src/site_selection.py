@@ -0,0 +1,101 @@
+"""
+Green Energy Sentinel - Spaced Top-k Site Selection
+Picks the k best-scoring cells of a score array such that no two picked sites
+are closer than a minimum spacing in meters (greedy non-maximum suppression),
+so the top sites are distinct hills rather than neighbouring cells of one
+ridge. Only the best candidates are ever sorted: they are taken from the flat
+score array with argpartition, and the candidate pool grows only when
+suppression leaves fewer than k sites. Distances are measured in EPSG:25829
+meters (see spatial_index.project), checked against a spatial hash of the
+sites accepted so far.
+"""
+
+import numpy as np
+
+from spatial_index import project
+
+# Configuration
+CANDIDATE_FACTOR = 16   # Initial candidate pool: k * CANDIDATE_FACTOR best cells
+POOL_GROWTH = 4         # Pool multiplier when suppression leaves fewer than k sites
+
+
+class SiteSpacing:
+    """Accepted sites in a spatial hash of min_spacing_m cells.
+
+    add() accepts a site unless an accepted one lies closer than
+    min_spacing_m, so only the 3x3 neighbouring cells are ever checked. A
+    spacing of 0 accepts every site.
+    """
+
+    def __init__(self, min_spacing_m):
+        self.min_spacing_m = float(min_spacing_m)
+        self._cells = {}
+
+    def add(self, x, y):
+        """Accept the site at x/y (meters) if it is far enough from every accepted site."""
+        spacing = self.min_spacing_m
+        if spacing <= 0:
+            return True
+        cx, cy = int(x // spacing), int(y // spacing)
+        for nx in (cx - 1, cx, cx + 1):
+            for ny in (cy - 1, cy, cy + 1):
+                for px, py in self._cells.get((nx, ny), ()):
+                    if (px - x) ** 2 + (py - y) ** 2 < spacing ** 2:
+                        return False
+        self._cells.setdefault((cx, cy), []).append((x, y))
+        return True
+
+
+def raster_locator(transform, width):
+    """locate() for a raster score array: flat pixel indices -> lon/lat of the pixel centers."""
+    def locate(indices):
+        rows, cols = np.divmod(np.asarray(indices, dtype=np.int64), width)
+        return transform * (cols + 0.5, rows + 0.5)
+    return locate
+
+
+def grid_locator(lon_grid, lat_grid):
+    """locate() for a score array on a lon/lat node grid of the same shape."""
+    lon_flat, lat_flat = np.ravel(lon_grid), np.ravel(lat_grid)
+    return lambda indices: (lon_flat[indices], lat_flat[indices])
+
+
+def spaced_top_k(score, k, min_spacing_m, locate):
+    """Flat indices of up to k cells of `score`, best first, at least min_spacing_m apart.
+
+    `score` is an array of any shape (NaN = not a candidate) and `locate`
+    maps flat indices to lon/lat arrays (see raster_locator, grid_locator).
+    Cells are visited by descending score, ties by flat index, and a cell is
+    kept unless a kept cell lies closer than min_spacing_m, so with a spacing
+    of 0 this is the plain top k. Fewer than k indices are returned only when
+    the array has no more cells that far apart.
+    """
+    flat = np.ravel(score)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.flatnonzero(np.isfinite(flat))
+    values = flat[candidates]
+    pool = k if min_spacing_m <= 0 else k * CANDIDATE_FACTOR
+
+    while True:
+        if pool < len(values):
+            # Every cell scoring at least the pool-th best, so ties at the cut are all kept
+            threshold = values[np.argpartition(-values, pool - 1)[pool - 1]]
+            chosen = candidates[values >= threshold]
+        else:
+            chosen = candidates
+        chosen = chosen[np.lexsort((chosen, -flat[chosen]))]
+
+        if min_spacing_m <= 0:
+            return chosen[:k]
+        xs, ys = project(*locate(chosen))
+        spacing = SiteSpacing(min_spacing_m)
+        kept = []
+        for i, (x, y) in enumerate(zip(xs.tolist(), ys.tolist())):
+            if spacing.add(x, y):
+                kept.append(i)
+                if len(kept) == k:
+                    break
+        if len(kept) == k or len(chosen) == len(candidates):
+            return chosen[kept]
+        pool *= POOL_GROWTH
@@ -0,0 +1,303 @@
+"""
+Green Energy Sentinel - Persistent Spatial Index
+Uniform grid buckets over the strike archive in projected EPSG:25829 meters.
+Each archive partition gets its own index, built on first use and stored
+next to its columns, so radius and bounding-box queries only read the strikes
+of the grid cells they touch. Re-ingesting a partition deletes its directory,
+and with it the index, so a stale index is never read.
+
+Layout (per partition):
+    data/strike_store/YYYY/MM/<source>/spatial.json   grid spec + projected bounds
+    data/strike_store/YYYY/MM/<source>/spatial_x.npy  strike x (m), sorted by cell
+    data/strike_store/YYYY/MM/<source>/spatial_y.npy  strike y (m), sorted by cell
+    data/strike_store/YYYY/MM/<source>/spatial_row.npy  partition row of each entry
+    data/strike_store/YYYY/MM/<source>/spatial_offsets.npy  cell -> first entry (CSR)
+"""
+
+import json
+import os
+import numpy as np
+from pyproj import Transformer
+
+from strike_store import (COLUMNS, STORE_DIR, build_store, empty_columns, open_partition,
+                          select_partitions, to_epoch)
+
+# Configuration
+PROJECTED_CRS = "EPSG:25829"  # ETRS89 / UTM 29N, meters
+CELL_SIZE = 1000.0            # Grid bucket edge (m)
+POINT_CHUNK = 256             # Query points processed per vectorized step
+INDEX_META = "spatial.json"
+INDEX_ARRAYS = ("x", "y", "row", "offsets")
+
+_transformer = None
+_loaded = {}  # partition dir -> memory-mapped index, kept warm between queries
+
+
+def project(lon, lat):
+    """WGS84 lon/lat arrays -> EPSG:25829 x/y arrays (meters)."""
+    global _transformer
+    if _transformer is None:
+        _transformer = Transformer.from_crs("EPSG:4326", PROJECTED_CRS, always_xy=True)
+    x, y = _transformer.transform(np.asarray(lon, dtype="float64"), np.asarray(lat, dtype="float64"))
+    return np.asarray(x, dtype="float64"), np.asarray(y, dtype="float64")
+
+
+def build_partition_index(entry, store_dir=STORE_DIR, cell_size=CELL_SIZE):
+    """Bucket one partition's strikes into grid cells and persist the index. Returns its metadata."""
+    part_dir = os.path.join(store_dir, entry["path"])
+    part = open_partition(entry, store_dir)
+    x, y = project(part["lon"], part["lat"])
+
+    if len(x):
+        ix, iy = np.floor(x / cell_size).astype("int64"), np.floor(y / cell_size).astype("int64")
+        ix0, iy0 = int(ix.min()), int(iy.min())
+        nx, ny = int(ix.max()) - ix0 + 1, int(iy.max()) - iy0 + 1
+        cell = (iy - iy0) * nx + (ix - ix0)
+    else:
+        ix0 = iy0 = 0
+        nx = ny = 0
+        cell = np.empty(0, dtype="int64")
+
+    # Stable sort keeps strikes of one cell in partition (time) order
+    row = np.argsort(cell, kind="stable")
+    offsets = np.zeros(nx * ny + 1, dtype="int64")
+    np.cumsum(np.bincount(cell, minlength=nx * ny), out=offsets[1:])
+
+    arrays = {"x": x[row], "y": y[row], "row": row.astype("int64"), "offsets": offsets}
+    for name, values in arrays.items():
+        np.save(os.path.join(part_dir, f"spatial_{name}.npy"), values)
+    meta = {
+        "crs": PROJECTED_CRS, "cell_size": cell_size, "count": len(x),
+        "ix0": ix0, "iy0": iy0, "nx": nx, "ny": ny,
+        "x_min": float(x.min()) if len(x) else 0.0, "x_max": float(x.max()) if len(x) else 0.0,
+        "y_min": float(y.min()) if len(y) else 0.0, "y_max": float(y.max()) if len(y) else 0.0,
+    }
+    # Metadata is written last: an index without it is rebuilt on the next query
+    tmp_path = os.path.join(part_dir, f"{INDEX_META}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(part_dir, INDEX_META))
+    return meta
+
+
+def open_partition_index(entry, store_dir=STORE_DIR, cell_size=CELL_SIZE):
+    """Memory-map the spatial index of one partition, building it if it is missing or stale."""
+    part_dir = os.path.join(store_dir, entry["path"])
+    meta_path = os.path.join(part_dir, INDEX_META)
+    meta = None
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        if meta["count"] != entry["count"] or meta["cell_size"] != cell_size or meta["crs"] != PROJECTED_CRS:
+            meta = None
+    if meta is None:
+        _loaded.pop(part_dir, None)
+        meta = build_partition_index(entry, store_dir, cell_size)
+
+    key = (part_dir, os.stat(meta_path).st_mtime_ns)
+    index = _loaded.get(part_dir)
+    if index is None or index["key"] != key:
+        index = {"key": key, "meta": meta}
+        for name in INDEX_ARRAYS:
+            index[name] = np.load(os.path.join(part_dir, f"spatial_{name}.npy"), mmap_mode='r')
+        _loaded[part_dir] = index
+    return index
+
+
+def _query_partitions(start, end, bbox, store_dir):
+    """Partitions that may match, after ingesting new or changed source files."""
+    build_store(store_dir=store_dir)
+    return select_partitions(start, end, bbox, store_dir)
+
+
+def _ranges_to_indices(starts, ends):
+    """Concatenate np.arange(s, e) for every (s, e) pair without a Python loop."""
+    lengths = ends - starts
+    keep = lengths > 0
+    starts, lengths = starts[keep], lengths[keep]
+    if not len(lengths):
+        return np.empty(0, dtype="int64"), keep
+    # Running index inside the output, shifted to restart at each range's start
+    shifts = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return np.arange(lengths.sum(), dtype="int64") + shifts, keep
+
+
+def _cell_candidates(index, x_lo, x_hi, y_lo, y_hi):
+    """Index entries of the cells overlapping each query box.
+
+    Boxes are given as arrays (one per query); returns (entries, owner) where
+    owner[i] is the query that entries[i] belongs to.
+    """
+    meta = index["meta"]
+    cell_size, nx, ny = meta["cell_size"], meta["nx"], meta["ny"]
+    cx0 = np.clip(np.floor(x_lo / cell_size).astype("int64") - meta["ix0"], 0, nx - 1)
+    cx1 = np.clip(np.floor(x_hi / cell_size).astype("int64") - meta["ix0"], 0, nx - 1)
+    cy0 = np.clip(np.floor(y_lo / cell_size).astype("int64") - meta["iy0"], 0, ny - 1)
+    cy1 = np.clip(np.floor(y_hi / cell_size).astype("int64") - meta["iy0"], 0, ny - 1)
+
+    # One contiguous run of cells per grid row covered by each box
+    n_rows = cy1 - cy0 + 1
+    owner_rows = np.repeat(np.arange(len(x_lo)), n_rows)
+    grid_rows = np.repeat(cy0, n_rows) + _ranges_to_indices(np.zeros_like(n_rows), n_rows)[0]
+    first_cell = grid_rows * nx + cx0[owner_rows]
+    last_cell = grid_rows * nx + cx1[owner_rows]
+
+    offsets = index["offsets"]
+    starts, ends = offsets[first_cell], offsets[last_cell + 1]
+    entries, kept = _ranges_to_indices(starts, ends)
+    owner = np.repeat(owner_rows[kept], (ends - starts)[kept])
+    return entries, owner
+
+
+def _time_filter(entry, rows, store_dir, t0, t1):
+    """Boolean mask of partition rows inside [t0, t1] (all True when the partition is inside)."""
+    if (t0 is None or entry["time_min"] >= t0) and (t1 is None or entry["time_max"] <= t1):
+        return np.ones(len(rows), dtype=bool)
+    times = open_partition(entry, store_dir)["time"][rows]
+    keep = np.ones(len(rows), dtype=bool)
+    if t0 is not None:
+        keep &= times >= t0
+    if t1 is not None:
+        keep &= times <= t1
+    return keep
+
+
+def _as_xy(points, projected):
+    points = np.asarray(points, dtype="float64").reshape(-1, 2)
+    if projected:
+        return points[:, 0], points[:, 1]
+    return project(points[:, 0], points[:, 1])
+
+
+def _within(radius, points, start, end, projected, store_dir):
+    """Yield (entry, rows, owner) for every strike within `radius` of a query point, per partition."""
+    px, py = _as_xy(points, projected)
+    t0, t1 = to_epoch(start), to_epoch(end, end_of_day=True)
+    r2 = float(radius) ** 2
+
+    for entry in _query_partitions(start, end, None, store_dir):
+        index = open_partition_index(entry, store_dir)
+        meta = index["meta"]
+        if not meta["count"]:
+            continue
+        # Points whose circle cannot reach the partition's extent are skipped
+        near = np.flatnonzero((px + radius >= meta["x_min"]) & (px - radius <= meta["x_max"]) &
+                              (py + radius >= meta["y_min"]) & (py - radius <= meta["y_max"]))
+        for chunk in np.array_split(near, max(1, int(np.ceil(len(near) / POINT_CHUNK)))):
+            if not len(chunk):
+                continue
+            cx, cy = px[chunk], py[chunk]
+            entries, owner = _cell_candidates(index, cx - radius, cx + radius, cy - radius, cy + radius)
+            dx = index["x"][entries] - cx[owner]
+            dy = index["y"][entries] - cy[owner]
+            hit = dx * dx + dy * dy <= r2
+            rows = index["row"][entries[hit]]
+            owner = chunk[owner[hit]]
+            keep = _time_filter(entry, rows, store_dir, t0, t1)
+            yield entry, rows[keep], owner[keep]
+
+
+def _gather(selected, store_dir):
+    """Column dict of the given rows of each partition ([(entry, rows), ...])."""
+    parts = []
+    for entry, rows in selected:
+        if len(rows):
+            part = open_partition(entry, store_dir)
+            parts.append({name: np.asarray(values[np.sort(rows)]) for name, values in part.items()})
+    if not parts:
+        return empty_columns()
+    return {name: np.concatenate([p[name] for p in parts]) for name in COLUMNS}
+
+
+def count_within(radius, points, start=None, end=None, projected=False, store_dir=STORE_DIR):
+    """Number of strikes within `radius` meters of each point.
+
+    `points` is an (N, 2) array of lon/lat (or EPSG:25829 x/y with
+    projected=True); `start`/`end` restrict the time range like load_strikes.
+    A strike near several points is counted once for each of them.
+    """
+    n_points = len(np.asarray(points, dtype="float64").reshape(-1, 2))
+    counts = np.zeros(n_points, dtype="int64")
+    for _, _, owner in _within(radius, points, start, end, projected, store_dir):
+        counts += np.bincount(owner, minlength=n_points)
+    return counts
+
+
+def strikes_within(radius, points, start=None, end=None, projected=False, store_dir=STORE_DIR):
+    """Strikes within `radius` meters of any of the points, each returned once.
+
+    Same arguments as count_within; returns a column dict like load_strikes.
+    """
+    selected = {}
+    for entry, rows, _ in _within(radius, points, start, end, projected, store_dir):
+        path = entry["path"]
+        selected[path] = (entry, np.union1d(selected[path][1], rows) if path in selected else np.unique(rows))
+    return _gather(selected.values(), store_dir)
+
+
+def in_bbox(bbox, start=None, end=None, store_dir=STORE_DIR):
+    """Strikes inside a lat/lon bounding box (dict like GALICIA_BOUNDS), read through the index.
+
+    Only the grid cells overlapping the box are scanned; candidates are then
+    tested exactly against the geographic bounds.
+    """
+    # The projected envelope of a lat/lon box is found from its densified edges
+    edge = np.linspace(0.0, 1.0, 33)
+    lons = bbox["lon_min"] + edge * (bbox["lon_max"] - bbox["lon_min"])
+    lats = bbox["lat_min"] + edge * (bbox["lat_max"] - bbox["lat_min"])
+    ring_lon = np.concatenate([lons, np.full_like(lats, bbox["lon_max"]), lons, np.full_like(lats, bbox["lon_min"])])
+    ring_lat = np.concatenate([np.full_like(lons, bbox["lat_min"]), lats, np.full_like(lons, bbox["lat_max"]), lats])
+    ring_x, ring_y = project(ring_lon, ring_lat)
+    box_x = (np.array([ring_x.min()]), np.array([ring_x.max()]))
+    box_y = (np.array([ring_y.min()]), np.array([ring_y.max()]))
+
+    t0, t1 = to_epoch(start), to_epoch(end, end_of_day=True)
+    selected = []
+    for entry in _query_partitions(start, end, bbox, store_dir):
+        index = open_partition_index(entry, store_dir)
+        if not index["meta"]["count"]:
+            continue
+        entries, _ = _cell_candidates(index, box_x[0], box_x[1], box_y[0], box_y[1])
+        rows = index["row"][entries]
+        part = open_partition(entry, store_dir)
+        lat, lon = part["lat"][rows], part["lon"][rows]
+        keep = ((lat >= bbox["lat_min"]) & (lat <= bbox["lat_max"]) &
+                (lon >= bbox["lon_min"]) & (lon <= bbox["lon_max"]))
+        keep &= _time_filter(entry, rows, store_dir, t0, t1)
+        selected.append((entry, rows[keep]))
+    return _gather(selected, store_dir)
+
+
+def in_rect(x_min, y_min, x_max, y_max, start=None, end=None, store_dir=STORE_DIR):
+    """Strikes inside an EPSG:25829 rectangle (meters, bounds included), read through the index.
+
+    Partitions whose projected extent misses the rectangle are skipped
+    without touching their columns.
+    """
+    t0, t1 = to_epoch(start), to_epoch(end, end_of_day=True)
+    selected = []
+    for entry in _query_partitions(start, end, None, store_dir):
+        index = open_partition_index(entry, store_dir)
+        meta = index["meta"]
+        if (not meta["count"] or meta["x_max"] < x_min or meta["x_min"] > x_max or
+                meta["y_max"] < y_min or meta["y_min"] > y_max):
+            continue
+        entries, _ = _cell_candidates(index, np.array([x_min]), np.array([x_max]),
+                                      np.array([y_min]), np.array([y_max]))
+        x, y = index["x"][entries], index["y"][entries]
+        rows = index["row"][entries[(x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)]]
+        selected.append((entry, rows[_time_filter(entry, rows, store_dir, t0, t1)]))
+    return _gather(selected, store_dir)
+
+
+def build_index(store_dir=STORE_DIR):
+    """Build (or refresh) the spatial index of every archive partition. Returns the partition count."""
+    entries = _query_partitions(None, None, None, store_dir)
+    for entry in entries:
+        open_partition_index(entry, store_dir)
+    return len(entries)
+
+
+if __name__ == "__main__":
+    built = build_index()
+    print(f"✅ Spatial index ready for {built} partitions ({CELL_SIZE:.0f} m cells, {PROJECTED_CRS})")
@@ -0,0 +1,177 @@
+"""
+Green Energy Sentinel - Lightning Density Surface (FFT Gaussian KDE)
+Gaussian kernel density of strikes on a regular EPSG:25829 grid, so the
+bandwidth is a true distance in meters, the same north-south and east-west,
+instead of a number of degree bins. Strikes are binned onto the grid with a
+single bincount and the kernel is applied by FFT convolution: the cost
+depends on the grid size, not on the number of strikes. Strikes can be
+weighted by their absolute peak current (kA).
+
+The density is in strikes (or kA) per km². latlon_risk_map resamples it onto
+lat/lon bins normalized to 0-1, the (risk, x_edges, y_edges) layout used by
+optimal_placement.sample_risk.
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import rasterio
+from rasterio.transform import Affine
+from scipy import fft
+
+from config import END_DATE, GALICIA_BOUNDS, START_DATE
+from spatial_index import PROJECTED_CRS, project
+from strike_store import load_strikes
+
+# Configuration
+CELL_SIZE_M = 250.0      # Density grid cell edge (m)
+BANDWIDTH_M = 3000.0     # Gaussian kernel sigma (m), about the old 1.5-bin blur
+KERNEL_TRUNCATE = 4.0    # Kernel radius in bandwidths
+EDGE_SAMPLES = 64        # Points per bbox edge when projecting its outline
+OUTPUT_TIFF = "reports/lightning_density.tif"
+
+
+def grid_spec(bbox=GALICIA_BOUNDS, cell_size_m=CELL_SIZE_M):
+    """(transform, (height, width)) of a north-up EPSG:25829 grid covering a lon/lat bbox.
+
+    The bbox outline is projected densely (its edges are curves in UTM) and
+    the grid is snapped to whole cells.
+    """
+    t = np.linspace(0.0, 1.0, EDGE_SAMPLES)
+    lon_span = bbox["lon_min"] + t * (bbox["lon_max"] - bbox["lon_min"])
+    lat_span = bbox["lat_min"] + t * (bbox["lat_max"] - bbox["lat_min"])
+    lons = np.concatenate([lon_span, lon_span, np.full_like(t, bbox["lon_min"]), np.full_like(t, bbox["lon_max"])])
+    lats = np.concatenate([np.full_like(t, bbox["lat_min"]), np.full_like(t, bbox["lat_max"]), lat_span, lat_span])
+    x, y = project(lons, lats)
+
+    west = np.floor(x.min() / cell_size_m) * cell_size_m
+    north = np.ceil(y.max() / cell_size_m) * cell_size_m
+    width = int(np.ceil((x.max() - west) / cell_size_m))
+    height = int(np.ceil((north - y.min()) / cell_size_m))
+    return Affine(cell_size_m, 0.0, west, 0.0, -cell_size_m, north), (height, width)
+
+
+def kernel_radius(bandwidth_m, cell_size_m, truncate=KERNEL_TRUNCATE):
+    """Half-width in cells of the gaussian_kernel: how far one strike's mass reaches."""
+    return max(1, int(np.ceil(truncate * bandwidth_m / cell_size_m)))
+
+
+def gaussian_kernel(bandwidth_m, cell_size_m, truncate=KERNEL_TRUNCATE):
+    """Normalized 2-D Gaussian kernel (sums to 1) sampled on the grid cells."""
+    radius = kernel_radius(bandwidth_m, cell_size_m, truncate)
+    offsets = np.arange(-radius, radius + 1) * cell_size_m
+    profile = np.exp(-0.5 * (offsets / bandwidth_m) ** 2)
+    kernel = np.outer(profile, profile)
+    return kernel / kernel.sum()
+
+
+def peak_weights(peak, fill=None):
+    """Absolute peak current per strike (kA); strikes without one get `fill` (default: the mean)."""
+    weights = np.abs(np.asarray(peak, dtype=np.float64))
+    missing = ~np.isfinite(weights)
+    if missing.any():
+        if fill is None:
+            fill = weights[~missing].mean() if (~missing).any() else 1.0
+        weights[missing] = fill
+    return weights
+
+
+def strike_density(lons, lats, weights=None, bandwidth_m=BANDWIDTH_M, cell_size_m=CELL_SIZE_M,
+                   bbox=GALICIA_BOUNDS):
+    """Gaussian KDE of strikes on the grid_spec grid, per km². Returns (density, transform).
+
+    `weights` (e.g. peak_weights) gives each strike a mass other than 1.
+    Strikes outside the grid are ignored; mass the kernel spreads beyond
+    the grid edges is lost rather than folded back.
+    """
+    transform, shape = grid_spec(bbox, cell_size_m)
+    x, y = project(lons, lats)
+    return density_on_grid(x, y, transform, shape, weights, bandwidth_m), transform
+
+
+def density_on_grid(x, y, transform, shape, weights=None, bandwidth_m=BANDWIDTH_M):
+    """Gaussian KDE per km² of projected strikes x/y on a north-up (transform, shape) grid.
+
+    Any window of a larger grid can be computed on its own: extend it by
+    kernel_radius cells on each side (the halo), pass the strikes inside the
+    extended grid and crop the halo off again.
+    """
+    height, width = shape
+    cell_size_m = transform.a
+    cols, rows = ~transform * (x, y)
+    rows = np.floor(rows).astype(np.int64)
+    cols = np.floor(cols).astype(np.int64)
+    inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)[inside]
+    counts = np.bincount(rows[inside] * width + cols[inside], weights=weights,
+                         minlength=height * width).reshape(height, width)
+
+    kernel = gaussian_kernel(bandwidth_m, cell_size_m)
+    radius = kernel.shape[0] // 2
+    # Linear (zero-padded) convolution via real FFTs, cropped back to the grid
+    fft_shape = [fft.next_fast_len(n + 2 * radius, real=True) for n in (height, width)]
+    spectrum = fft.rfft2(counts, fft_shape) * fft.rfft2(kernel, fft_shape)
+    density = fft.irfft2(spectrum, fft_shape)[radius:radius + height, radius:radius + width]
+    # FFT round-off leaves tiny negative values where there are no strikes
+    np.maximum(density, 0.0, out=density)
+    density /= (cell_size_m / 1000.0) ** 2
+    return density
+
+
+def sample_density(density, transform, lons, lats):
+    """Density of the cell under each lon/lat point (NaN outside the grid)."""
+    x, y = project(lons, lats)
+    cols, rows = ~transform * (x, y)
+    rows = np.floor(rows).astype(np.int64)
+    cols = np.floor(cols).astype(np.int64)
+    inside = (rows >= 0) & (rows < density.shape[0]) & (cols >= 0) & (cols < density.shape[1])
+    values = np.full(rows.shape, np.nan)
+    values[inside] = density[rows[inside], cols[inside]]
+    return values
+
+
+def latlon_risk_map(density, transform, bbox=GALICIA_BOUNDS, bins=100):
+    """Density resampled at the centers of bins x bins lat/lon cells and normalized to 0-1.
+
+    Returns (risk, x_edges, y_edges) like np.histogram2d(lats, lons): rows
+    follow the latitude edges, columns the longitude edges.
+    """
+    x_edges = np.linspace(bbox["lat_min"], bbox["lat_max"], bins + 1)
+    y_edges = np.linspace(bbox["lon_min"], bbox["lon_max"], bins + 1)
+    lon_grid, lat_grid = np.meshgrid((y_edges[:-1] + y_edges[1:]) / 2, (x_edges[:-1] + x_edges[1:]) / 2)
+    values = np.nan_to_num(sample_density(density, transform, lon_grid, lat_grid))
+
+    risk_min, risk_max = values.min(), values.max()
+    risk = (values - risk_min) / (risk_max - risk_min) if risk_max > risk_min else values * 0
+    return risk, x_edges, y_edges
+
+
+def write_density_tiff(path, density, transform):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with rasterio.open(path, "w", driver="GTiff", height=density.shape[0], width=density.shape[1], count=1,
+                       dtype="float32", crs=PROJECTED_CRS, transform=transform, compress="deflate") as dst:
+        dst.write(density.astype(np.float32), 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lightning density surface (Gaussian KDE in meters).")
+    parser.add_argument("--bandwidth", type=float, default=BANDWIDTH_M, help="Kernel sigma in meters")
+    parser.add_argument("--cell-size", type=float, default=CELL_SIZE_M, help="Grid cell edge in meters")
+    parser.add_argument("--weight-by-current", action="store_true", help="Weight strikes by |peak current|")
+    parser.add_argument("--output", default=OUTPUT_TIFF, help="GeoTIFF to write (EPSG:25829)")
+    args = parser.parse_args()
+
+    strikes = load_strikes(START_DATE, END_DATE, GALICIA_BOUNDS)
+    start = time.perf_counter()
+    weights = peak_weights(strikes["peak"]) if args.weight_by_current else None
+    density, transform = strike_density(strikes["lon"], strikes["lat"], weights, args.bandwidth, args.cell_size)
+    elapsed = time.perf_counter() - start
+
+    unit = "kA" if args.weight_by_current else "strikes"
+    print(f"⚡ {len(strikes['lat'])} strikes -> {density.shape[1]}x{density.shape[0]} grid of "
+          f"{args.cell_size:.0f} m cells, bandwidth {args.bandwidth:.0f} m ({elapsed:.2f}s)")
+    print(f"   Peak density: {density.max():.2f} {unit}/km²")
+    write_density_tiff(args.output, density, transform)
+    print(f"✅ Density surface saved to: {os.path.abspath(args.output)}")
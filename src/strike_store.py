@@ -0,0 +1,513 @@
+"""
+Green Energy Sentinel - Columnar Strike Store
+Converts the raw lightning caches (JSON lists of dicts, one per year) into a
+time-partitioned archive of typed .npy columns. Each year/month partition keeps
+min/max lat/lon/time statistics, so date and bounding-box queries only touch
+the partitions that can match.
+
+Rows of every partition are sorted by time, with per-day row offsets, so time
+windows are located by binary search instead of scanning the columns.
+
+Layout:
+    data/strike_store/index.json                        sources + partition stats
+    data/strike_store/YYYY/MM/<source>/<col>.npy        memory-mappable columns
+    data/strike_store/YYYY/MM/<source>/day_offsets.npy  first row of each day
+"""
+
+import glob
+import json
+import os
+import shutil
+from datetime import date, datetime, timezone
+import numpy as np
+
+from config import LIGHTNING_GLOB, STORE_DIR
+from strike_stream import BATCH_SIZE, iter_json_array, iter_record_batches
+from strike_validation import REASONS, VALID_BOUNDS, duplicate_mask, empty_report, merge_reports, validate_records
+
+# Configuration
+INDEX_FILE = "index.json"
+DAY_OFFSETS = "day_offsets.npy"
+SECONDS_PER_DAY = 86400
+QUARANTINE_DIR = "quarantine"             # Rejected raw rows, one .jsonl per source
+
+# Column name -> on-disk dtype
+COLUMNS = {
+    "lat": "float32",
+    "lon": "float32",
+    "time": "int64",       # Epoch seconds (UTC)
+    "peak": "float32",     # peakCurrent in kA (NaN when missing)
+    "polarity": "int8",    # -1 negative, +1 positive, 0 unknown
+}
+
+
+def records_to_columns(records, bounds=VALID_BOUNDS):
+    """Validate raw strike dicts ({fecha, lat, lon, peakCurrent}) and cast them to store dtypes.
+
+    Returns (columns, report, quarantined) as described in strike_validation.validate_records.
+    """
+    clean, report, quarantined = validate_records(records, bounds)
+    columns = dict(clean)
+    columns["polarity"] = np.sign(np.nan_to_num(clean["peak"]))
+    columns = {name: columns[name].astype(dtype) for name, dtype in COLUMNS.items()}
+    return columns, report, quarantined
+
+
+def empty_columns():
+    return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+
+def _source_signature(source):
+    stat = os.stat(source)
+    return {"path": os.path.abspath(source), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _source_name(source):
+    return os.path.splitext(os.path.basename(source))[0]
+
+
+def _read_index(store_dir):
+    index_path = os.path.join(store_dir, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return {"sources": {}, "partitions": []}
+    with open(index_path, 'r') as f:
+        return json.load(f)
+
+
+def _write_index(index, store_dir):
+    os.makedirs(store_dir, exist_ok=True)
+    tmp_path = os.path.join(store_dir, f"{INDEX_FILE}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, os.path.join(store_dir, INDEX_FILE))
+
+
+def partition_stats(columns):
+    """Min/max statistics used to prune partitions at query time."""
+    return {
+        "count": len(columns["time"]),
+        "lat_min": float(columns["lat"].min()), "lat_max": float(columns["lat"].max()),
+        "lon_min": float(columns["lon"].min()), "lon_max": float(columns["lon"].max()),
+        "time_min": int(columns["time"].min()), "time_max": int(columns["time"].max()),
+    }
+
+
+def iter_column_batches(source, batch_size=BATCH_SIZE):
+    """Stream a JSON cache (path or binary file object) as typed column batches.
+
+    Yields (columns, report, quarantined) tuples covering at most `batch_size`
+    records each, so peak memory is bounded by the batch size rather than the
+    file size.
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            yield from iter_column_batches(f, batch_size)
+        return
+    for records in iter_record_batches(iter_json_array(source), batch_size):
+        yield records_to_columns(records)
+
+
+def _merge_stats(stats, update):
+    if stats is None:
+        return update
+    merged = {"count": stats["count"] + update["count"]}
+    for key in ("lat", "lon", "time"):
+        merged[f"{key}_min"] = min(stats[f"{key}_min"], update[f"{key}_min"])
+        merged[f"{key}_max"] = max(stats[f"{key}_max"], update[f"{key}_max"])
+    return merged
+
+
+def _append_columns(part_dir, columns):
+    """Append a batch to the raw spill files of a partition."""
+    for name, values in columns.items():
+        with open(os.path.join(part_dir, f"{name}.raw"), 'ab') as f:
+            f.write(np.ascontiguousarray(values, dtype=COLUMNS[name]).tobytes())
+
+
+def day_offsets(times):
+    """Row offsets of each day in a time-sorted column: day d spans rows [off[d], off[d+1]).
+
+    Day 0 is the day of the first strike (epoch day = time // SECONDS_PER_DAY).
+    """
+    if not len(times):
+        return np.zeros(1, dtype="int64")
+    days = np.asarray(times) // SECONDS_PER_DAY
+    bounds = np.arange(days[0], days[-1] + 2) * SECONDS_PER_DAY
+    return np.searchsorted(times, bounds, side="left").astype("int64")
+
+
+def _finalize_columns(part_dir):
+    """Turn raw spill files into time-sorted .npy files, dropping duplicate strikes.
+
+    Also writes the per-day row offsets. Returns the duplicate count. Only one
+    month of one source is held in memory at a time.
+    """
+    columns = {}
+    for name, dtype in COLUMNS.items():
+        raw_path = os.path.join(part_dir, f"{name}.raw")
+        columns[name] = np.fromfile(raw_path, dtype=dtype)
+        os.remove(raw_path)
+
+    duplicates = duplicate_mask(columns)
+    keep = np.flatnonzero(~duplicates)
+    # Stable sort keeps same-second strikes in arrival order
+    order = keep[np.argsort(columns["time"][keep], kind="stable")]
+    for name, values in columns.items():
+        np.save(os.path.join(part_dir, f"{name}.npy"), values[order])
+    np.save(os.path.join(part_dir, DAY_OFFSETS), day_offsets(columns["time"][order]))
+    return int(duplicates.sum())
+
+
+def _quarantine(quarantined, source_name, store_dir):
+    """Append rejected rows (with their reason) to the source's quarantine file."""
+    quarantine_dir = os.path.join(store_dir, QUARANTINE_DIR)
+    os.makedirs(quarantine_dir, exist_ok=True)
+    with open(os.path.join(quarantine_dir, f"{source_name}.jsonl"), 'a') as f:
+        for row in quarantined:
+            f.write(json.dumps(row, default=str) + "\n")
+
+
+def write_partitions(batches, source_name, store_dir=STORE_DIR):
+    """Split validated column batches by year/month into partitions.
+
+    Returns (index entries, validation report).
+    """
+    stats = {}
+    report = empty_report()
+    quarantine_path = os.path.join(store_dir, QUARANTINE_DIR, f"{source_name}.jsonl")
+    if os.path.exists(quarantine_path):
+        os.remove(quarantine_path)
+
+    for columns, batch_report, quarantined in batches:
+        report = merge_reports(report, batch_report)
+        if quarantined:
+            _quarantine(quarantined, source_name, store_dir)
+        months = columns["time"].astype("datetime64[s]").astype("datetime64[M]")
+        for month in np.unique(months):
+            in_month = months == month
+            part = {name: values[in_month] for name, values in columns.items()}
+            year, month_num = str(month).split("-")
+            rel_path = os.path.join(year, month_num, source_name)
+            part_dir = os.path.join(store_dir, rel_path)
+            if rel_path not in stats:
+                # Clear leftovers of an interrupted ingest
+                shutil.rmtree(part_dir, ignore_errors=True)
+                os.makedirs(part_dir)
+                stats[rel_path] = None
+            _append_columns(part_dir, part)
+            stats[rel_path] = _merge_stats(stats[rel_path], partition_stats(part))
+
+    entries = []
+    for rel_path, part_stats in stats.items():
+        duplicates = _finalize_columns(os.path.join(store_dir, rel_path))
+        report["duplicates"] += duplicates
+        report["kept"] -= duplicates
+        # Min/max stats stay valid: duplicates never extend the range
+        part_stats["count"] -= duplicates
+        entries.append({"path": rel_path, "source": source_name, "sorted": True, **part_stats})
+    return entries, report
+
+
+def _drop_source(index, source_name, store_dir):
+    for entry in [p for p in index["partitions"] if p["source"] == source_name]:
+        shutil.rmtree(os.path.join(store_dir, entry["path"]), ignore_errors=True)
+    index["partitions"] = [p for p in index["partitions"] if p["source"] != source_name]
+    index["sources"].pop(source_name, None)
+
+
+def ingest_source(source, store_dir=STORE_DIR, batch_size=BATCH_SIZE):
+    """(Re)convert one JSON cache into archive partitions. Returns the source's index record.
+
+    The file is streamed in batches straight into per-month spill files, so
+    memory use does not grow with the size of the source.
+    """
+    print(f"🗄️ Ingesting {source} into the strike archive...")
+    name = _source_name(source)
+    index = _read_index(store_dir)
+    _drop_source(index, name, store_dir)
+    # Persist the removal first: an interrupted ingest leaves the source stale, not half-listed
+    _write_index(index, store_dir)
+
+    entries, report = write_partitions(iter_column_batches(source, batch_size), name, store_dir)
+    index["partitions"].extend(entries)
+    index["partitions"].sort(key=lambda p: (p["time_min"], p["source"]))
+    index["sources"][name] = {**_source_signature(source), "count": report["kept"], "validation": report}
+    # Index is written last: partitions not listed in it are never read
+    _write_index(index, store_dir)
+
+    rejected = sum(report[reason] for reason in REASONS)
+    print(f"   Stored {report['kept']} of {report['input']} strikes "
+          f"({rejected} quarantined, {report['duplicates']} duplicates removed).")
+    return index["sources"][name]
+
+
+def stale_sources(sources=None, store_dir=STORE_DIR):
+    """Source files that are new or changed since they were last ingested."""
+    sources = sorted(glob.glob(LIGHTNING_GLOB)) if sources is None else sources
+    index = _read_index(store_dir)
+    known = index["sources"]
+    # Partitions written before rows were time-sorted are rebuilt
+    unsorted = {p["source"] for p in index["partitions"] if not p.get("sorted")}
+    stale = []
+    for source in sources:
+        name = _source_name(source)
+        record = known.get(name)
+        signature = _source_signature(source)
+        if record is None or name in unsorted or any(record[k] != signature[k] for k in signature):
+            stale.append(source)
+    return stale
+
+
+def build_store(sources=None, store_dir=STORE_DIR):
+    """Ingest every new or changed source file. Returns the number of sources ingested."""
+    stale = stale_sources(sources, store_dir)
+    for source in stale:
+        ingest_source(source, store_dir)
+    return len(stale)
+
+
+def to_epoch(value, end_of_day=False):
+    """'dd/mm/YYYY' string, date, datetime or epoch seconds -> epoch seconds (UTC).
+
+    Plain dates are whole days: with end_of_day=True they map to 23:59:59.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.strptime(value, "%d/%m/%Y").date()
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    if isinstance(value, date):
+        midnight = int(datetime(value.year, value.month, value.day, tzinfo=timezone.utc).timestamp())
+        return midnight + 86399 if end_of_day else midnight
+    raise TypeError(f"Unsupported time value: {value!r}")
+
+
+def _partition_matches(entry, t0, t1, bbox):
+    if t0 is not None and entry["time_max"] < t0:
+        return False
+    if t1 is not None and entry["time_min"] > t1:
+        return False
+    if bbox is not None:
+        if entry["lat_max"] < bbox["lat_min"] or entry["lat_min"] > bbox["lat_max"]:
+            return False
+        if entry["lon_max"] < bbox["lon_min"] or entry["lon_min"] > bbox["lon_max"]:
+            return False
+    return True
+
+
+def _partition_inside(entry, t0, t1, bbox):
+    """True when every row of the partition satisfies the query (no row filtering needed)."""
+    if t0 is not None and entry["time_min"] < t0:
+        return False
+    if t1 is not None and entry["time_max"] > t1:
+        return False
+    if bbox is not None:
+        if entry["lat_min"] < bbox["lat_min"] or entry["lat_max"] > bbox["lat_max"]:
+            return False
+        if entry["lon_min"] < bbox["lon_min"] or entry["lon_max"] > bbox["lon_max"]:
+            return False
+    return True
+
+
+def open_partition(entry, store_dir=STORE_DIR):
+    """Memory-map the columns of one partition (read-only, zero-copy)."""
+    part_dir = os.path.join(store_dir, entry["path"])
+    return {name: np.load(os.path.join(part_dir, f"{name}.npy"), mmap_mode='r') for name in COLUMNS}
+
+
+def open_day_offsets(entry, store_dir=STORE_DIR):
+    """Per-day row offsets of a time-sorted partition (see day_offsets)."""
+    return np.load(os.path.join(store_dir, entry["path"], DAY_OFFSETS), mmap_mode='r')
+
+
+def time_rows(entry, part, t0, t1, store_dir=STORE_DIR):
+    """Rows of an open partition with t0 <= time <= t1 (either bound may be None).
+
+    Time-sorted partitions answer with a slice found by binary search inside
+    the bounding days; partitions from older archives fall back to a mask.
+    """
+    if not entry.get("sorted"):
+        keep = np.ones(entry["count"], dtype=bool)
+        if t0 is not None:
+            keep &= part["time"] >= t0
+        if t1 is not None:
+            keep &= part["time"] <= t1
+        return keep
+
+    offsets = open_day_offsets(entry, store_dir)
+    day0, n_days = entry["time_min"] // SECONDS_PER_DAY, len(offsets) - 1
+
+    def bound(t, side):
+        # Day offsets narrow the search to one day's rows
+        day = min(max(t // SECONDS_PER_DAY - day0, 0), n_days - 1)
+        lo, hi = int(offsets[day]), int(offsets[day + 1])
+        return lo + int(np.searchsorted(part["time"][lo:hi], t, side=side))
+
+    lo = 0 if t0 is None or t0 <= entry["time_min"] else bound(t0, "left")
+    hi = entry["count"] if t1 is None or t1 >= entry["time_max"] else bound(t1, "right")
+    return slice(lo, max(lo, hi))
+
+
+def select_partitions(start=None, end=None, bbox=None, store_dir=STORE_DIR):
+    """Index entries of the partitions that may hold strikes matching the query."""
+    t0, t1 = to_epoch(start), to_epoch(end, end_of_day=True)
+    return [p for p in _read_index(store_dir)["partitions"] if _partition_matches(p, t0, t1, bbox)]
+
+
+def _ensure_store(store_dir):
+    """Ingest new or changed sources; raise FileNotFoundError when there is no data at all."""
+    build_store(store_dir=store_dir)
+    if not _read_index(store_dir)["partitions"] and not glob.glob(LIGHTNING_GLOB):
+        raise FileNotFoundError(f"No strike archive in {store_dir} and no source files matching {LIGHTNING_GLOB}")
+
+
+def load_strikes(start=None, end=None, bbox=None, store_dir=STORE_DIR):
+    """Load strikes in [start, end] inside `bbox` as a dict of column arrays.
+
+    `start`/`end` accept 'dd/mm/YYYY' strings (inclusive days), dates,
+    datetimes or epoch seconds; `bbox` is a dict with lat_min/lat_max/
+    lon_min/lon_max like GALICIA_BOUNDS. Partitions whose statistics cannot
+    match are never opened. New or changed JSON caches are ingested first.
+    """
+    _ensure_store(store_dir)
+
+    t0, t1 = to_epoch(start), to_epoch(end, end_of_day=True)
+    parts = []
+    for entry in select_partitions(start, end, bbox, store_dir):
+        part = open_partition(entry, store_dir)
+        if not _partition_inside(entry, t0, t1, bbox):
+            rows = time_rows(entry, part, t0, t1, store_dir)
+            part = {name: values[rows] for name, values in part.items()}
+            if bbox is not None:
+                keep = (part["lat"] >= bbox["lat_min"]) & (part["lat"] <= bbox["lat_max"])
+                keep &= (part["lon"] >= bbox["lon_min"]) & (part["lon"] <= bbox["lon_max"])
+                part = {name: values[keep] for name, values in part.items()}
+        parts.append(part)
+
+    if not parts:
+        return empty_columns()
+    if len(parts) == 1:
+        return parts[0]
+    return {name: np.concatenate([p[name] for p in parts]) for name in COLUMNS}
+
+
+def _window_end(end):
+    """Exclusive upper bound: whole days for 'dd/mm/YYYY' strings and dates, exact otherwise."""
+    if end is None:
+        return None
+    if isinstance(end, str) or (isinstance(end, date) and not isinstance(end, datetime)):
+        return to_epoch(end, end_of_day=True) + 1
+    return to_epoch(end)
+
+
+def strikes_between(t0=None, t1=None, bbox=None, store_dir=STORE_DIR):
+    """Strikes with t0 <= time < t1, sorted by time, as a dict of column arrays.
+
+    Bounds accept the same values as load_strikes. Epoch seconds and datetimes
+    are exact and the window is half-open, so consecutive hourly or daily
+    windows never share a strike; 'dd/mm/YYYY' strings and dates cover the
+    whole end day. Rows are located by binary search in the time-sorted
+    partitions. New or changed JSON caches are ingested first.
+    """
+    _ensure_store(store_dir)
+    lo, hi = to_epoch(t0), _window_end(t1)
+    if lo is not None and hi is not None and hi <= lo:
+        return empty_columns()
+    last = None if hi is None else hi - 1
+
+    parts = []
+    for entry in select_partitions(lo, last, bbox, store_dir):
+        part = open_partition(entry, store_dir)
+        rows = time_rows(entry, part, lo, last, store_dir)
+        part = {name: values[rows] for name, values in part.items()}
+        if bbox is not None and not _partition_inside(entry, None, None, bbox):
+            keep = (part["lat"] >= bbox["lat_min"]) & (part["lat"] <= bbox["lat_max"])
+            keep &= (part["lon"] >= bbox["lon_min"]) & (part["lon"] <= bbox["lon_max"])
+            part = {name: values[keep] for name, values in part.items()}
+        if not entry.get("sorted"):
+            order = np.argsort(part["time"], kind="stable")
+            part = {name: values[order] for name, values in part.items()}
+        parts.append(part)
+
+    if not parts:
+        return empty_columns()
+    if len(parts) == 1:
+        return parts[0]
+    strikes = {name: np.concatenate([p[name] for p in parts]) for name in COLUMNS}
+    # Partitions of different sources may overlap in time: merge them
+    if np.any(np.diff(strikes["time"]) < 0):
+        order = np.argsort(strikes["time"], kind="stable")
+        strikes = {name: values[order] for name, values in strikes.items()}
+    return strikes
+
+
+def daily_counts(start, end, store_dir=STORE_DIR):
+    """Strikes per day over [start, end] (whole days) from the per-day offsets alone.
+
+    Returns (days, counts): a datetime64[D] array covering every day of the
+    range and the matching int64 counts. Strike columns are only read for
+    partitions of older archives that lack day offsets.
+    """
+    _ensure_store(store_dir)
+    first = to_epoch(start) // SECONDS_PER_DAY
+    last = to_epoch(end, end_of_day=True) // SECONDS_PER_DAY
+    counts = np.zeros(max(0, last - first + 1), dtype="int64")
+
+    for entry in select_partitions(start, end, None, store_dir):
+        if entry.get("sorted"):
+            per_day = np.diff(open_day_offsets(entry, store_dir))
+            day0 = entry["time_min"] // SECONDS_PER_DAY
+        else:
+            days = np.asarray(open_partition(entry, store_dir)["time"]) // SECONDS_PER_DAY
+            day0 = int(days.min())
+            per_day = np.bincount(days - day0)
+        # Clip the partition's days to the requested range
+        lo, hi = max(day0, first), min(day0 + len(per_day) - 1, last)
+        if lo <= hi:
+            counts[lo - first:hi - first + 1] += per_day[lo - day0:hi - day0 + 1]
+
+    days = np.arange(first, last + 1).astype("datetime64[D]")
+    return days, counts
+
+
+def strike_count(strikes):
+    """Number of strikes in a column dict."""
+    return 0 if strikes is None else len(strikes["time"])
+
+
+def format_fecha(times):
+    """Epoch seconds -> ISO 8601 strings in the API's `fecha` format."""
+    return np.datetime_as_string(np.asarray(times).astype("datetime64[s]"), unit='s')
+
+
+def strikes_to_frame(strikes, fecha_as_string=False):
+    """Build a pandas DataFrame with the API field names (fecha, lat, lon, peakCurrent)."""
+    import pandas as pd
+
+    fecha = pd.to_datetime(np.asarray(strikes["time"]), unit='s')
+    if fecha_as_string:
+        fecha = format_fecha(strikes["time"])
+    return pd.DataFrame({
+        "fecha": fecha,
+        "lat": np.asarray(strikes["lat"], dtype="float64"),
+        "lon": np.asarray(strikes["lon"], dtype="float64"),
+        "peakCurrent": np.asarray(strikes["peak"], dtype="float64"),
+    })
+
+
+def build_archive(store_dir=STORE_DIR):
+    """build_store() and print a summary of the archive."""
+    ingested = build_store(store_dir=store_dir)
+    index = _read_index(store_dir)
+    total = sum(p["count"] for p in index["partitions"])
+    print(f"✅ Strike archive ready in {os.path.abspath(store_dir)}: {ingested} sources ingested, "
+          f"{len(index['partitions'])} partitions, {total} strikes")
+
+
+if __name__ == "__main__":
+    build_archive()
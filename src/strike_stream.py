@@ -0,0 +1,152 @@
+"""
+Green Energy Sentinel - Streaming Strike Parser
+Incremental readers for the raw lightning JSON (API payloads and the yearly
+caches) that never hold the whole document in memory. Strikes are decoded one
+object at a time from a sliding text buffer and grouped into fixed-size
+batches, which strike_store turns into typed column batches.
+"""
+
+import codecs
+import json
+
+# Configuration
+CHUNK_SIZE = 1 << 16     # Bytes read from the source per refill
+BATCH_SIZE = 50000       # Strikes per batch
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+class _StreamReader:
+    """Sliding window over a byte stream (file object or iterable of byte chunks)."""
+
+    def __init__(self, source, chunk_size=CHUNK_SIZE):
+        if hasattr(source, "read"):
+            self._chunks = iter(lambda: source.read(chunk_size), b"")
+        else:
+            self._chunks = iter(source)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _refill(self):
+        """Append the next chunk to the buffer. Returns False at end of stream."""
+        if self.eof:
+            return False
+        # Drop the consumed prefix so the buffer stays around one chunk long
+        if self.pos > self._chunk_size:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.buffer += self._utf8.decode(b"", final=True)
+            self.eof = True
+            return False
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        self.buffer += self._utf8.decode(chunk)
+        return True
+
+    def peek(self):
+        """Next non-whitespace character (without consuming it), or '' at the end."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._refill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, found {self.peek()!r}")
+        self.pos += 1
+
+    def decode_value(self):
+        """Decode one complete JSON value starting at the current position."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._refill():
+                    continue
+                raise
+            # A scalar ending exactly at the buffer edge may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and not isinstance(value, (dict, list)):
+                if self._refill():
+                    continue
+            self.pos = end
+            return value
+
+    def find(self, token):
+        """Advance past the next occurrence of `token`. Returns False if it never occurs."""
+        while True:
+            idx = self.buffer.find(token, self.pos)
+            if idx >= 0:
+                self.pos = idx + len(token)
+                return True
+            # Keep a tail in case the token straddles two chunks
+            self.pos = max(self.pos, len(self.buffer) - len(token) + 1)
+            if not self._refill():
+                return False
+
+    def iter_array(self):
+        """Yield the items of the JSON array starting at the current position."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.decode_value()
+            sep = self.peek()
+            self.pos += 1
+            if sep == "]":
+                return
+            if sep != ",":
+                raise ValueError(f"Malformed array near offset {self.pos}")
+
+
+def iter_json_array(source, chunk_size=CHUNK_SIZE):
+    """Yield the items of a top-level JSON array (e.g. data/strikes_2023.json) one by one."""
+    yield from _StreamReader(source, chunk_size).iter_array()
+
+
+def iter_raios(source, chunk_size=CHUNK_SIZE):
+    """Yield the strikes of an API payload {"raios": [{"listaRaios": [...]}, ...]} one by one.
+
+    Every "listaRaios" array in the document is streamed in order; the
+    surrounding day objects are never materialized.
+    """
+    reader = _StreamReader(source, chunk_size)
+    while reader.find('"listaRaios"'):
+        reader.expect(":")
+        yield from reader.iter_array()
+
+
+def iter_record_batches(records, batch_size=BATCH_SIZE):
+    """Group any iterable of strike dicts into lists of at most `batch_size` records."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_json_array(path, records):
+    """Write an iterable of records as a JSON array without materializing it. Returns the count."""
+    count = 0
+    with open(path, 'w') as f:
+        f.write("[")
+        for record in records:
+            if count:
+                f.write(", ")
+            json.dump(record, f)
+            count += 1
+        f.write("]")
+    return count
@@ -0,0 +1,104 @@
+"""
+Green Energy Sentinel - Strike Validation
+Vectorized clean-up of raw lightning records, run once at ingest: numeric
+coercion, timestamp parsing, bounding-box filtering and duplicate removal.
+Rejected rows are quarantined with a reason instead of being silently dropped
+by per-record try/except blocks in every script.
+"""
+
+import numpy as np
+
+# Configuration
+# Accepted area (the API sometimes returns strikes well outside Galicia)
+VALID_BOUNDS = {
+    "lat_min": 41.5, "lat_max": 44.5,
+    "lon_min": -9.5, "lon_max": -6.5
+}
+RAW_FIELDS = ["fecha", "lat", "lon", "peakCurrent"]
+
+# Quarantine reasons, in the order they are checked
+REASONS = ["bad_position", "bad_time", "out_of_bounds"]
+
+
+def empty_report():
+    return {"input": 0, "kept": 0, "missing_peak": 0, "duplicates": 0, **{reason: 0 for reason in REASONS}}
+
+
+def merge_reports(report, update):
+    return {key: report.get(key, 0) + update.get(key, 0) for key in empty_report()}
+
+
+def validate_records(records, bounds=VALID_BOUNDS):
+    """Validate a batch of raw strike dicts ({fecha, lat, lon, peakCurrent}).
+
+    Returns (columns, report, quarantined):
+      - columns: dict of clean float64 lat/lon/peak and int64 epoch-second time arrays
+      - report: row counts per outcome (see empty_report)
+      - quarantined: [{"reason": ..., "record": ...}] for every rejected row
+    A missing or non-numeric peakCurrent does not reject the row; it becomes NaN.
+    """
+    import pandas as pd  # Only needed at ingest; keeps store reads free of the pandas import
+
+    df = pd.DataFrame.from_records(records, columns=RAW_FIELDS)
+
+    lat = pd.to_numeric(df["lat"], errors="coerce").to_numpy(dtype="float64")
+    lon = pd.to_numeric(df["lon"], errors="coerce").to_numpy(dtype="float64")
+    peak = pd.to_numeric(df["peakCurrent"], errors="coerce").to_numpy(dtype="float64")
+    fecha = pd.to_datetime(df["fecha"], errors="coerce", utc=True)
+    time = ((fecha - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).to_numpy(dtype="float64", na_value=np.nan)
+
+    bad_position = ~(np.isfinite(lat) & np.isfinite(lon))
+    bad_time = ~bad_position & ~np.isfinite(time)
+    out_of_bounds = np.zeros(len(df), dtype=bool)
+    if bounds is not None:
+        with np.errstate(invalid="ignore"):
+            in_bounds = ((lat >= bounds["lat_min"]) & (lat <= bounds["lat_max"]) &
+                         (lon >= bounds["lon_min"]) & (lon <= bounds["lon_max"]))
+        out_of_bounds = ~bad_position & ~bad_time & ~in_bounds
+
+    masks = {"bad_position": bad_position, "bad_time": bad_time, "out_of_bounds": out_of_bounds}
+    rejected = bad_position | bad_time | out_of_bounds
+    valid = ~rejected
+
+    quarantined = []
+    if rejected.any():
+        reason = np.select([masks[r] for r in REASONS], REASONS, default="")
+        quarantined = [{"reason": str(reason[i]), "record": records[i]} for i in np.flatnonzero(rejected)]
+
+    columns = {
+        "lat": lat[valid],
+        "lon": lon[valid],
+        "time": time[valid].astype("int64"),
+        "peak": peak[valid],
+    }
+    report = empty_report()
+    report.update({reason: int(mask.sum()) for reason, mask in masks.items()})
+    report["input"] = len(df)
+    report["kept"] = int(valid.sum())
+    report["missing_peak"] = int(np.isnan(columns["peak"]).sum())
+    return columns, report, quarantined
+
+
+def duplicate_mask(columns):
+    """True for rows identical (time, lat, lon, peak) to an earlier row.
+
+    Overlapping download windows return the same strike twice; the first
+    occurrence is kept.
+    """
+    n = len(columns["time"])
+    if n < 2:
+        return np.zeros(n, dtype=bool)
+    keys = [columns["peak"], columns["lon"], columns["lat"], columns["time"]]
+    order = np.lexsort(keys)
+    same_as_prev = np.ones(n - 1, dtype=bool)
+    for key in keys:
+        sorted_key = np.asarray(key)[order]
+        equal = sorted_key[1:] == sorted_key[:-1]
+        if sorted_key.dtype.kind == "f":
+            # Missing peaks (NaN) compare equal to each other for deduplication purposes
+            equal |= np.isnan(sorted_key[1:]) & np.isnan(sorted_key[:-1])
+        same_as_prev &= equal
+    duplicates = np.zeros(n, dtype=bool)
+    # lexsort is stable, so within a group of equal rows the original first one sorts first
+    duplicates[order[1:][same_as_prev]] = True
+    return duplicates
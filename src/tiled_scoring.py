@@ -0,0 +1,280 @@
+"""
+Green Energy Sentinel - Tiled Parallel Scoring
+Scores a wind raster of any extent (e.g. all of peninsular Spain from a
+larger wind GeoTIFF) in square tiles spread over a process pool, so the
+memory a worker needs is bounded by the tile size rather than the region.
+The lightning risk is the meter-based Gaussian KDE of strike_density: each
+tile computes it on its window of one region-wide EPSG:25829 grid, extended
+by a halo of kernel_radius cells and fed only the strikes inside it (read
+through the spatial index). Every strike whose kernel reaches the tile is
+included, so the stitched surface is the single-pass KDE and tile edges
+leave no seams.
+
+Two passes over the tiles:
+    1. density  KDE at the pixel centers, land mask, wind range -> scratch memmaps
+    2. score    risk normalized by the region-wide density range, score_cells
+
+Tiles write disjoint windows of .npy memmaps. The stitched layers are
+exported as a COG with the bands of optimal_placement --export-cog, and the
+top sites are picked tile by tile with the same result spaced_top_k gives on
+the whole array.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
+import rasterio
+from rasterio.features import geometry_mask
+from rasterio.transform import Affine
+from rasterio.windows import Window, transform as window_transform
+
+from cog_export import write_cog
+from config import END_DATE, GALICIA_GEOJSON, MIN_SITE_SPACING_M, NATIVE_BLOCK_ROWS, START_DATE, WIND_TIFF
+from land_mask import load_boundary
+from optimal_placement import LAYER_BANDS, TOP_K, pixel_centers, read_wind_block, row_blocks, score_cells, sites_frame
+from site_selection import CANDIDATE_FACTOR, POOL_GROWTH, SiteSpacing, raster_locator
+from spatial_index import build_index, in_rect, project
+from strike_density import BANDWIDTH_M, CELL_SIZE_M, density_on_grid, grid_spec, kernel_radius, peak_weights
+from strike_store import build_store, open_partition, select_partitions, time_rows, to_epoch
+
+# Configuration
+TILE_SIZE = 1024        # Wind raster pixels per tile edge (bounds worker memory)
+TILED_LAYERS_COG = "reports/suitability_layers_tiled.tif"
+TILED_SITES_FILE = "reports/optimal_sites_tiled.csv"
+
+_worker = {}  # per process: open wind raster, boundary, KDE grid, scratch memmaps
+
+
+def raster_bbox(src):
+    """Lon/lat bounds of a raster as a bbox dict like GALICIA_BOUNDS."""
+    return {"lat_min": src.bounds.bottom, "lat_max": src.bounds.top,
+            "lon_min": src.bounds.left, "lon_max": src.bounds.right}
+
+
+def tile_windows(height, width, tile_size=TILE_SIZE):
+    """Square raster windows of at most tile_size pixels, row-major."""
+    return [Window(col_off, row_off, min(tile_size, width - col_off), min(tile_size, height - row_off))
+            for row_off in range(0, height, tile_size) for col_off in range(0, width, tile_size)]
+
+
+def mean_abs_peak(start, end, bbox):
+    """Mean |peak current| of the strikes in bbox, read one partition at a time (1.0 if none)."""
+    t0, t1 = to_epoch(start), to_epoch(end, end_of_day=True)
+    total, count = 0.0, 0
+    for entry in select_partitions(start, end, bbox):
+        part = open_partition(entry)
+        rows = time_rows(entry, part, t0, t1)
+        lat, lon, peak = part["lat"][rows], part["lon"][rows], part["peak"][rows]
+        keep = ((lat >= bbox["lat_min"]) & (lat <= bbox["lat_max"]) &
+                (lon >= bbox["lon_min"]) & (lon <= bbox["lon_max"]) & np.isfinite(peak))
+        total += float(np.abs(peak[keep].astype(np.float64)).sum())
+        count += int(keep.sum())
+    return total / count if count else 1.0
+
+
+def _init_worker(spec):
+    _worker.update(spec, src=rasterio.open(spec["wind_path"]),
+                   density=np.load(spec["density_path"], mmap_mode='r+'),
+                   land=np.load(spec["land_path"], mmap_mode='r+'),
+                   layers=np.load(spec["layers_path"], mmap_mode='r+'))
+
+
+def density_tile(window):
+    """Pass 1: KDE at the tile's pixel centers and its land mask. Returns the tile's wind and density ranges."""
+    src, block = _worker["src"], window.toslices()
+    wind_ms = read_wind_block(src, window)
+    x, y = project(*pixel_centers(src.transform, window))
+
+    # The tile's cells of the region KDE grid, plus a halo as wide as the kernel
+    grid_transform, (grid_height, grid_width) = _worker["grid"]
+    cols, rows = ~grid_transform * (x, y)
+    rows = np.floor(rows).astype(np.int64)
+    cols = np.floor(cols).astype(np.int64)
+    radius = kernel_radius(_worker["bandwidth_m"], grid_transform.a)
+    row0, row1 = max(rows.min() - radius, 0), min(rows.max() + radius + 1, grid_height)
+    col0, col1 = max(cols.min() - radius, 0), min(cols.max() + radius + 1, grid_width)
+
+    density = np.full(rows.shape, np.nan)
+    if row1 > row0 and col1 > col0:
+        halo_transform = grid_transform * Affine.translation(col0, row0)
+        west, north = halo_transform * (0, 0)
+        east, south = halo_transform * (col1 - col0, row1 - row0)
+        strikes = in_rect(west, south, east, north, _worker["start"], _worker["end"])
+        weights = peak_weights(strikes["peak"], _worker["peak_fill"]) if _worker["weight_by_current"] else None
+        halo = density_on_grid(*project(strikes["lon"], strikes["lat"]), halo_transform,
+                               (row1 - row0, col1 - col0), weights, _worker["bandwidth_m"])
+        inside = (rows >= row0) & (rows < row1) & (cols >= col0) & (cols < col1)
+        density[inside] = halo[rows[inside] - row0, cols[inside] - col0]
+
+    _worker["density"][block] = density
+    # Rasterized per tile rather than through land_mask, whose in-process cache would grow with every tile
+    _worker["land"][block] = geometry_mask([_worker["boundary"]], out_shape=density.shape, invert=True,
+                                           transform=window_transform(window, src.transform))
+    return _value_range(wind_ms) + _value_range(density)
+
+
+def score_tile(window, norm):
+    """Pass 2: score a tile from its wind, density and land mask. Returns its valid pixel count."""
+    wind_min, wind_max, density_min, density_max = norm
+    block = window.toslices()
+    wind_ms = read_wind_block(_worker["src"], window)
+    density, on_land = _worker["density"][block], _worker["land"][block]
+    if density_max > density_min:
+        risk = np.nan_to_num((density - density_min) / (density_max - density_min))
+    else:
+        risk = np.zeros(density.shape)
+    wind_norm, score, valid = score_cells(wind_ms, on_land, risk, wind_min, wind_max)
+    _worker["layers"][(slice(None),) + block] = np.stack([score, risk, wind_norm, on_land])
+    return int(valid.sum())
+
+
+def _value_range(values):
+    finite = values[np.isfinite(values)]
+    return (float(finite.min()), float(finite.max())) if len(finite) else (np.inf, -np.inf)
+
+
+def tiled_top_k(score, windows, k, min_spacing_m, transform):
+    """Flat indices of up to k pixels of a (memmapped) score raster, best first, min_spacing_m apart.
+
+    Same result as site_selection.spaced_top_k on the whole array, reading one
+    tile at a time: each tile contributes its best `pool` pixels (ties at
+    the cut included). Every pixel left out scores below the highest tile
+    cut, so the greedy pass over the candidates is exact once the k-th
+    kept site scores at least that cut; otherwise the pool grows.
+    """
+    height, width = score.shape
+    pool = k if min_spacing_m <= 0 else k * CANDIDATE_FACTOR
+    while True:
+        indices, values, cut = [], [], -np.inf
+        for window in windows:
+            block = np.asarray(score[window.toslices()]).ravel()
+            cells = np.flatnonzero(np.isfinite(block))
+            cell_values = block[cells]
+            if pool < len(cells):
+                threshold = cell_values[np.argpartition(-cell_values, pool - 1)[pool - 1]]
+                cut = max(cut, float(threshold))
+                cells, cell_values = cells[cell_values >= threshold], cell_values[cell_values >= threshold]
+            rows, cols = np.divmod(cells, window.width)
+            indices.append((rows + window.row_off) * width + cols + window.col_off)
+            values.append(cell_values)
+        indices, values = np.concatenate(indices), np.concatenate(values)
+        order = np.lexsort((indices, -values))
+        indices, values = indices[order], values[order]
+
+        if min_spacing_m <= 0:
+            return indices[:k]
+        xs, ys = project(*raster_locator(transform, width)(indices))
+        spacing = SiteSpacing(min_spacing_m)
+        kept = []
+        for i, (x, y) in enumerate(zip(xs.tolist(), ys.tolist())):
+            if spacing.add(x, y):
+                kept.append(i)
+                if len(kept) == k:
+                    break
+        if (len(kept) == k and values[kept[-1]] >= cut) or cut == -np.inf:
+            return indices[kept]
+        pool *= POOL_GROWTH
+
+
+def score_tiled(wind_path=WIND_TIFF, boundary_path=GALICIA_GEOJSON, tile_size=TILE_SIZE, bandwidth_m=BANDWIDTH_M,
+                cell_size_m=CELL_SIZE_M, weight_by_current=False, start=START_DATE, end=END_DATE, top_k=TOP_K,
+                min_spacing_m=MIN_SITE_SPACING_M, workers=None, out_path=TILED_LAYERS_COG,
+                sites_path=TILED_SITES_FILE):
+    """Score a wind raster tile by tile in parallel. Returns (sites DataFrame, run stats).
+
+    The stitched LAYER_BANDS are written to out_path as a COG and the top
+    sites to sites_path. Scratch memmaps live next to out_path while the
+    tiles run and are removed afterwards.
+    """
+    with rasterio.open(wind_path) as src:
+        if not (src.crs and src.crs.is_geographic):
+            raise ValueError(f"{wind_path}: expected a lon/lat wind raster, got CRS {src.crs}")
+        height, width, transform, crs = src.height, src.width, src.transform, src.crs
+        bbox = raster_bbox(src)
+    windows = tile_windows(height, width, tile_size)
+
+    # Ingest and index the archive once, before the workers query it concurrently
+    build_store()
+    build_index()
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    os.makedirs(out_dir, exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix="tiled_scoring_", dir=out_dir)
+    spec = {"wind_path": wind_path, "boundary": load_boundary(boundary_path),
+            "grid": grid_spec(bbox, cell_size_m), "bandwidth_m": bandwidth_m,
+            "weight_by_current": weight_by_current, "start": start, "end": end,
+            "peak_fill": mean_abs_peak(start, end, bbox) if weight_by_current else None,
+            "density_path": os.path.join(scratch, "density.npy"),
+            "land_path": os.path.join(scratch, "land.npy"),
+            "layers_path": os.path.join(scratch, "layers.npy")}
+    stats = {"tiles": len(windows), "tile_size": tile_size, "raster": [width, height]}
+    try:
+        np.lib.format.open_memmap(spec["density_path"], mode='w+', dtype=np.float64, shape=(height, width))
+        np.lib.format.open_memmap(spec["land_path"], mode='w+', dtype=bool, shape=(height, width))
+        np.lib.format.open_memmap(spec["layers_path"], mode='w+', dtype=np.float32,
+                                  shape=(len(LAYER_BANDS), height, width))
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(spec,)) as pool:
+            t0 = time.perf_counter()
+            ranges = np.array(list(pool.map(density_tile, windows)))
+            norm = (ranges[:, 0].min(), ranges[:, 1].max(), ranges[:, 2].min(), ranges[:, 3].max())
+            t1 = time.perf_counter()
+            stats["valid_pixels"] = sum(pool.map(score_tile, windows, repeat(norm)))
+            t2 = time.perf_counter()
+        stats.update(density_seconds=round(t1 - t0, 2), score_seconds=round(t2 - t1, 2),
+                     wind_range=[float(norm[0]), float(norm[1])])
+
+        layers = np.load(spec["layers_path"], mmap_mode='r')
+        write_cog(out_path, ((window, layers[(slice(None),) + window.toslices()])
+                             for window in row_blocks(height, width, NATIVE_BLOCK_ROWS)),
+                  LAYER_BANDS, width, height, transform, crs)
+
+        score = layers[LAYER_BANDS.index("score")]
+        indices = tiled_top_k(score, windows, top_k, min_spacing_m, transform)
+        rows, cols = np.divmod(indices, width)
+        with rasterio.open(wind_path) as src:
+            wind_ms = np.array([read_wind_block(src, Window(col, row, 1, 1))[0, 0]
+                                for row, col in zip(rows.tolist(), cols.tolist())], dtype=np.float64)
+        best = {'index': indices, 'wind_ms': wind_ms,
+                **{band: layers[LAYER_BANDS.index(band)][rows, cols].astype(np.float64)
+                   for band in ('wind_norm', 'risk', 'score')}}
+        sites = sites_frame(best, transform, width)
+        del layers, score
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(sites_path)), exist_ok=True)
+    sites.to_csv(sites_path)
+    return sites, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a large wind raster in parallel tiles with halo overlap.")
+    parser.add_argument("--wind", default=WIND_TIFF, help="Wind speed GeoTIFF in lon/lat (any extent)")
+    parser.add_argument("--boundary", default=GALICIA_GEOJSON, help="GeoJSON of the land to score")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE, help="Pixels per tile edge")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--bandwidth", type=float, default=BANDWIDTH_M, help="Risk KDE sigma in meters")
+    parser.add_argument("--cell-size", type=float, default=CELL_SIZE_M, help="Risk KDE cell edge in meters")
+    parser.add_argument("--weight-by-current", action="store_true", help="Weight strikes by |peak current|")
+    parser.add_argument("--start", default=START_DATE)
+    parser.add_argument("--end", default=END_DATE)
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--min-spacing", type=float, default=MIN_SITE_SPACING_M, help="Meters between top sites")
+    parser.add_argument("--out", default=TILED_LAYERS_COG, help="Layers COG to write")
+    parser.add_argument("--sites-out", default=TILED_SITES_FILE, help="Top sites CSV to write")
+    args = parser.parse_args()
+
+    sites, stats = score_tiled(args.wind, args.boundary, args.tile_size, args.bandwidth, args.cell_size,
+                               args.weight_by_current, args.start, args.end, args.top_k, args.min_spacing,
+                               args.workers, args.out, args.sites_out)
+    print(f"🧩 {stats['raster'][0]}x{stats['raster'][1]} raster in {stats['tiles']} tiles of {stats['tile_size']} px: "
+          f"density {stats['density_seconds']}s, score {stats['score_seconds']}s, "
+          f"{stats['valid_pixels']} valid pixels")
+    print(sites[['lat', 'lon', 'wind_ms', 'risk', 'score']].to_string())
+    print(f"✅ Layers saved to: {os.path.abspath(args.out)}")
+    print(f"✅ Sites saved to: {os.path.abspath(args.sites_out)}")
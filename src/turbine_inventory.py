@@ -0,0 +1,195 @@
+"""
+Green Energy Sentinel - Wind Turbine Inventory
+Single entry point for the OpenStreetMap wind turbine layer. Overpass results
+are cached on disk per query + bounding box as compact arrays (lon, lat, id,
+name, wind farm) and reused until they expire, so runs only contact Overpass
+when the cache is missing or stale.
+
+Offline mode (offline=True or SENTINEL_OFFLINE=1) never touches the network and
+serves the cache whatever its age. A saved Overpass response can be loaded
+instead of the API with fixture=<path> (or SENTINEL_TURBINE_FIXTURE=<path>).
+
+Layout:
+    data/turbines/<key>.npz   lon/lat/id/kind/name/wind_farm arrays
+    data/turbines/<key>.json  query, bbox, fetch time and count
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+import numpy as np
+import requests
+
+from config import GALICIA_BOUNDS, OVERPASS_URL
+from profiling import traced
+
+# Configuration
+TURBINE_CACHE_DIR = "data/turbines"
+CACHE_TTL_SECONDS = 7 * 24 * 3600   # OSM turbines change slowly
+REQUEST_TIMEOUT = 30
+OFFLINE_ENV = "SENTINEL_OFFLINE"
+FIXTURE_ENV = "SENTINEL_TURBINE_FIXTURE"
+
+# Area covered by the audits (south, west, north, east in the Overpass query)
+TURBINE_BOUNDS = GALICIA_BOUNDS
+
+# Array name -> dtype of the cached inventory
+FIELDS = {
+    "lon": "float64",
+    "lat": "float64",
+    "id": "int64",
+    "kind": "U8",        # node / way / relation (ids are only unique per kind)
+    "name": "U",         # OSM name tag ('' when missing)
+    "wind_farm": "U",    # OSM wind_farm tag ('' when missing)
+}
+
+
+def build_query(bbox=TURBINE_BOUNDS):
+    """Overpass QL for wind generators (nodes, and the centers of ways/relations) in `bbox`."""
+    area = f"({bbox['lat_min']},{bbox['lon_min']},{bbox['lat_max']},{bbox['lon_max']})"
+    return f"""
+    [out:json];
+    (
+      node["power"="generator"]["generator:source"="wind"]{area};
+      way["power"="generator"]["generator:source"="wind"]{area};
+      relation["power"="generator"]["generator:source"="wind"]{area};
+    );
+    out center;
+    """
+
+
+def cache_key(query):
+    return hashlib.sha1(" ".join(query.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def parse_elements(elements):
+    """Overpass elements -> inventory arrays. Elements without a position are skipped."""
+    rows = []
+    for el in elements:
+        if 'lat' in el and 'lon' in el:
+            lat, lon = el['lat'], el['lon']
+        elif 'center' in el:
+            lat, lon = el['center']['lat'], el['center']['lon']
+        else:
+            continue
+        tags = el.get('tags', {})
+        rows.append((lon, lat, el.get('id', 0), el.get('type', 'node'),
+                     tags.get('name', ''), tags.get('wind_farm', '')))
+
+    columns = list(zip(*rows)) if rows else [[] for _ in FIELDS]
+    return {name: np.asarray(values, dtype=dtype) for (name, dtype), values in zip(FIELDS.items(), columns)}
+
+
+def _cache_paths(key, cache_dir):
+    return os.path.join(cache_dir, f"{key}.npz"), os.path.join(cache_dir, f"{key}.json")
+
+
+def read_cache(key, cache_dir=TURBINE_CACHE_DIR):
+    """(turbines, meta) from the cache, or (None, None) when it has no entry for `key`."""
+    data_path, meta_path = _cache_paths(key, cache_dir)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None, None
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    with np.load(data_path, allow_pickle=False) as data:
+        turbines = {name: data[name] for name in FIELDS}
+    return turbines, meta
+
+
+def write_cache(key, turbines, meta, cache_dir=TURBINE_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    data_path, meta_path = _cache_paths(key, cache_dir)
+    tmp_data = f"{data_path}.tmp.npz"
+    np.savez(tmp_data, **turbines)
+    os.replace(tmp_data, data_path)
+    # Metadata is written last: it is what marks the entry as complete
+    tmp_meta = f"{meta_path}.tmp"
+    with open(tmp_meta, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_meta, meta_path)
+
+
+@traced("overpass query")
+def fetch_turbines(query, url=OVERPASS_URL, timeout=REQUEST_TIMEOUT):
+    """Run the query against Overpass and parse the result."""
+    r = requests.post(url, data=query, timeout=timeout)
+    r.raise_for_status()
+    return parse_elements(r.json().get('elements', []))
+
+
+def load_fixture(path):
+    """Inventory arrays from a saved Overpass JSON response."""
+    with open(path, 'r') as f:
+        return parse_elements(json.load(f).get('elements', []))
+
+
+def load_turbines(bbox=TURBINE_BOUNDS, ttl=CACHE_TTL_SECONDS, offline=None, refresh=False,
+                  fixture=None, cache_dir=TURBINE_CACHE_DIR, url=OVERPASS_URL):
+    """Wind turbines in `bbox` as a dict of arrays (see FIELDS), or None if none are available.
+
+    A cache entry younger than `ttl` seconds is returned without any network
+    access. A stale or missing entry is refreshed from Overpass; if that fails
+    the stale entry is served instead. Offline mode only reads the cache.
+    """
+    fixture = fixture or os.environ.get(FIXTURE_ENV)
+    if fixture:
+        return load_fixture(fixture)
+    if offline is None:
+        offline = os.environ.get(OFFLINE_ENV, "") not in ("", "0")
+
+    query = build_query(bbox)
+    key = cache_key(query)
+    turbines, meta = read_cache(key, cache_dir)
+    age = time.time() - meta["fetched_at"] if meta else None
+
+    if turbines is not None and (offline or (not refresh and age < ttl)):
+        return turbines
+    if offline:
+        print(f"   ⚠️ Offline mode and no cached turbine inventory in {cache_dir}.")
+        return None
+
+    try:
+        fetched = fetch_turbines(query, url)
+    except (requests.RequestException, ValueError) as e:
+        if turbines is not None:
+            print(f"   ⚠️ Overpass unavailable ({e}), using cached inventory from "
+                  f"{datetime.fromtimestamp(meta['fetched_at']).isoformat(timespec='seconds')}.")
+            return turbines
+        print(f"   ⚠️ Error fetching turbines: {e}")
+        return None
+
+    write_cache(key, fetched, {"query": query, "bbox": bbox, "fetched_at": time.time(),
+                               "count": len(fetched["id"])}, cache_dir)
+    return fetched
+
+
+def turbine_names(turbines, fallback):
+    """Display name per turbine: OSM name, else wind farm name, else `fallback`."""
+    names = np.where(turbines["name"] != "", turbines["name"], turbines["wind_farm"])
+    return np.where(names != "", names, fallback)
+
+
+def turbines_to_gdf(turbines, crs="EPSG:4326"):
+    """GeoDataFrame with id/name/wind_farm columns and point geometries."""
+    import geopandas as gpd
+    return gpd.GeoDataFrame(
+        {"id": turbines["id"], "name": turbines["name"], "wind_farm": turbines["wind_farm"]},
+        geometry=gpd.points_from_xy(turbines["lon"], turbines["lat"]),
+        crs=crs,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch or inspect the cached OSM wind turbine inventory.")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the TTL and query Overpass")
+    parser.add_argument("--offline", action="store_true", help="Only read the cache")
+    args = parser.parse_args()
+
+    turbines = load_turbines(offline=args.offline or None, refresh=args.refresh)
+    if turbines is None:
+        print("❌ No turbine inventory available.")
+    else:
+        print(f"✅ {len(turbines['id'])} wind turbines in the inventory ({os.path.abspath(TURBINE_CACHE_DIR)})")
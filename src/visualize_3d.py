@@ -5,13 +5,13 @@ Generates an interactive 3D map using pydeck (deck.gl) where lightning strikes
 are represented as vertical columns with height proportional to their intensity (kA).
 """
 
-import json
 import pydeck as pdk
-import pandas as pd
+import numpy as np
 import os
+from config import END_DATE, START_DATE
+from strike_store import load_strikes, strikes_to_frame
 
 # Configuration
-LIGHTNING_FILE = "data/strikes_2023.json"
 OUTPUT_FILE = "maps/lightning_risk_3d_map.html"
 GALICIA_CENTER = {"lat": 42.7, "lon": -7.8} # Adjusted slightly for better view
 
@@ -19,29 +19,27 @@ def create_3d_viz():
     print("🌍 Generating 3D Lightning Globe...")
     
     # 1. Load Data
-    if not os.path.exists(LIGHTNING_FILE):
+    try:
+        strikes = load_strikes(START_DATE, END_DATE)
+    except FileNotFoundError:
         print("❌ Data file not found.")
         return
-        
-    with open(LIGHTNING_FILE, 'r') as f:
-        raw_data = json.load(f)
     
     # 2. Process Data
-    df = pd.DataFrame(raw_data)
+    df = strikes_to_frame(strikes, fecha_as_string=True)
     
     # Clean and conversion
-    df['lat'] = df['lat'].astype(float)
-    df['lon'] = df['lon'].astype(float)
-    df['peakCurrent'] = df['peakCurrent'].fillna(0).astype(float)
+    df['peakCurrent'] = df['peakCurrent'].fillna(0)
     df['abs_current'] = df['peakCurrent'].abs()
     
     # Color logic for columns: 
     # Positive (>0) -> Gold [255, 215, 0]
     # Negative (<0) -> Electric Blue [0, 191, 255] or Vivid Red [255, 45, 0]
     # Let's use Red for Negative and Gold for Positive for high contrast.
-    df['color_r'] = df['peakCurrent'].apply(lambda x: 255 if x < 0 else 255)
-    df['color_g'] = df['peakCurrent'].apply(lambda x: 45 if x < 0 else 215)
-    df['color_b'] = df['peakCurrent'].apply(lambda x: 0 if x < 0 else 0)
+    negative = df['peakCurrent'] < 0
+    df['color_r'] = 255
+    df['color_g'] = np.where(negative, 45, 215)
+    df['color_b'] = 0
     df['color_a'] = 200 # Transparency
     
     print(f"⚡ Processing {len(df)} strikes...")
@@ -3,18 +3,18 @@ Green Energy Sentinel - Premium Lightning Calendar
 GitHub-style contribution calendar with rounded cells and premium styling.
 """
 
-import json
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch
 import numpy as np
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from config import YEAR
+from strike_store import daily_counts as archive_daily_counts
 
 # Configuration
-LIGHTNING_FILE = "data/strikes_2023.json"
-OUTPUT_FILE = "reports/lightning_calendar_2023.png"
+OUTPUT_FILE = f"reports/lightning_calendar_{YEAR}.png"
 
 def get_color(value, max_val):
     """Get color based on value using log scale."""
@@ -41,27 +41,15 @@ def get_color(value, max_val):
 def create_premium_calendar():
     print("📅 Generating Premium Lightning Calendar...")
     
-    # Load Data
-    if not os.path.exists(LIGHTNING_FILE):
+    # Load Data (per-day counts come straight from the archive's day offsets)
+    try:
+        days, counts = archive_daily_counts(date(YEAR, 1, 1), date(YEAR, 12, 31))
+    except FileNotFoundError:
         print("❌ Data file not found.")
         return
-        
-    with open(LIGHTNING_FILE, 'r') as f:
-        data = json.load(f)
     
-    # Process Data
-    df = pd.DataFrame(data)
-    df['fecha'] = pd.to_datetime(df['fecha'])
-    df['date'] = df['fecha'].dt.date
-    
-    # Aggregate daily counts
-    daily_counts = df.groupby('date').size().reset_index(name='counts')
-    daily_counts['date'] = pd.to_datetime(daily_counts['date'])
-    
-    # Create full year index
-    full_idx = pd.date_range(start='2023-01-01', end='2023-12-31', freq='D')
-    daily_counts = daily_counts.set_index('date').reindex(full_idx, fill_value=0).reset_index()
-    daily_counts.columns = ['date', 'counts']
+    # Full year index, one row per day
+    daily_counts = pd.DataFrame({'date': pd.to_datetime(days), 'counts': counts})
     
     # Calculate continuous week number from start of year
     first_day = daily_counts['date'].min()
@@ -121,8 +109,8 @@ def create_premium_calendar():
     month_positions = []
     
     for month in range(1, 13):
-        first_day_of_month = datetime(2023, month, 1)
-        week_num = ((first_day_of_month - datetime(2023, 1, 1)).days + datetime(2023, 1, 1).weekday()) // 7
+        first_day_of_month = datetime(YEAR, month, 1)
+        week_num = ((first_day_of_month - datetime(YEAR, 1, 1)).days + datetime(YEAR, 1, 1).weekday()) // 7
         month_positions.append(week_num + 2)  # Offset for better centering
     
     ax.set_xticks(month_positions)
@@ -134,7 +122,7 @@ def create_premium_calendar():
         spine.set_visible(False)
     
     # Title (emojis removed)
-    ax.set_title('LIGHTNING ACTIVITY CALENDAR 2023 | GALICIA', 
+    ax.set_title(f'LIGHTNING ACTIVITY CALENDAR {YEAR} | GALICIA', 
                  fontsize=22, color='#ffd700', fontweight='bold', pad=30,
                  fontfamily='sans-serif')
     
@@ -166,7 +154,7 @@ def create_premium_calendar():
     max_day = int(matrix.max())
     active_days = int((matrix > 0).sum())
     
-    stats_text = f"Total: {total_strikes:,} strikes  |  Peak: {max_day:,} strikes/day  |  Active days: {active_days}/365"
+    stats_text = f"Total: {total_strikes:,} strikes  |  Peak: {max_day:,} strikes/day  |  Active days: {active_days}/{len(daily_counts)}"
     fig.text(0.5, 0.05, stats_text, ha='center', fontsize=12, color='#8b949e', fontweight='medium')
     
     # Background
@@ -0,0 +1,172 @@
+"""
+Green Energy Sentinel - Resumable Window Cache
+Stores every downloaded date window as its own partition file and keeps a
+manifest of completed and failed windows. Interrupted downloads resume where
+they stopped, failed windows are retried, and extending the date range only
+fetches the days that are not cached yet.
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+
+from lightning_api import MAX_CONCURRENCY, WINDOW_DAYS, fetch_windows, format_api_date
+from strike_stream import iter_json_array
+
+# Configuration
+WINDOW_CACHE_DIR = "data/windows"
+MANIFEST_FILE = "manifest.json"
+DATE_KEY = "%Y-%m-%d"
+
+
+def _parse_date(date):
+    if isinstance(date, str):
+        return datetime.strptime(date, "%d/%m/%Y")
+    return datetime(date.year, date.month, date.day)
+
+
+def window_key(start, end):
+    return f"{start.strftime(DATE_KEY)}_{end.strftime(DATE_KEY)}"
+
+
+def _key_to_window(key):
+    start, end = key.split("_")
+    return datetime.strptime(start, DATE_KEY), datetime.strptime(end, DATE_KEY)
+
+
+def _write_json_atomic(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(cache_dir=WINDOW_CACHE_DIR):
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"windows": {}, "failed": {}}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, cache_dir=WINDOW_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_json_atomic(os.path.join(cache_dir, MANIFEST_FILE), manifest)
+
+
+def covered_days(manifest):
+    """Set of dates (datetime) held by completed, final windows."""
+    days = set()
+    for key, entry in manifest["windows"].items():
+        if not entry.get("final", True):
+            continue
+        start, end = _key_to_window(key)
+        day = start
+        while day <= end:
+            days.add(day)
+            day += timedelta(days=1)
+    return days
+
+
+def missing_windows(start, end, manifest, days=WINDOW_DAYS):
+    """Windows (at most days+1 long) covering every day of [start, end] not cached yet."""
+    start, end = _parse_date(start), _parse_date(end)
+    covered = covered_days(manifest)
+
+    windows = []
+    run_start = None
+    day = start
+    while day <= end + timedelta(days=1):
+        missing = day <= end and day not in covered
+        if missing and run_start is None:
+            run_start = day
+        elif not missing and run_start is not None:
+            run_end = day - timedelta(days=1)
+            # Split each contiguous run of missing days into API-sized windows,
+            # never crossing a year boundary so yearly caches do not overlap
+            current = run_start
+            while current <= run_end:
+                window_end = min(current + timedelta(days=days), run_end, datetime(current.year, 12, 31))
+                windows.append((current, window_end))
+                current = window_end + timedelta(days=1)
+            run_start = None
+        day += timedelta(days=1)
+    return windows
+
+
+def sync_windows(start, end, cache_dir=WINDOW_CACHE_DIR, today=None, **fetch_kwargs):
+    """Download every missing window in [start, end] into the cache.
+
+    Each window is persisted as soon as it arrives, so an interrupted run loses
+    at most the requests in flight. Windows reaching `today` are stored but not
+    marked final, because the API may still add strikes for the current day.
+    Returns (fetched, failed) window counts.
+    """
+    today = _parse_date(today or datetime.now())
+    manifest = load_manifest(cache_dir)
+    manifest["failed"] = {}
+
+    # Drop non-final windows: their days are refetched below
+    for key in [k for k, entry in manifest["windows"].items() if not entry.get("final", True)]:
+        del manifest["windows"][key]
+        partition = os.path.join(cache_dir, f"{key}.json")
+        if os.path.exists(partition):
+            os.remove(partition)
+
+    windows = missing_windows(start, end, manifest)
+    if not windows:
+        print(f"   Window cache is up to date ({len(manifest['windows'])} windows).")
+        save_manifest(manifest, cache_dir)
+        return 0, 0
+
+    print(f"   {len(windows)} windows missing from the cache, fetching...")
+    os.makedirs(cache_dir, exist_ok=True)
+
+    def store(window, strikes, error):
+        key = window_key(*window)
+        d_ini, d_fin = format_api_date(window[0]), format_api_date(window[1])
+        if error:
+            print(f"  {d_ini} - {d_fin}: Failed ({error})")
+            manifest["failed"][key] = error
+        else:
+            print(f"  {d_ini} - {d_fin}: Found {len(strikes)} strikes.")
+            _write_json_atomic(os.path.join(cache_dir, f"{key}.json"), strikes)
+            manifest["windows"][key] = {
+                "count": len(strikes),
+                "fetched_at": datetime.now().isoformat(timespec='seconds'),
+                "final": window[1] < today,
+            }
+        save_manifest(manifest, cache_dir)
+
+    results, failures = fetch_windows(windows, on_result=store, **fetch_kwargs)
+    return len(results), len(failures)
+
+
+def iter_window_strikes(start, end, cache_dir=WINDOW_CACHE_DIR):
+    """Stream the strikes of cached partitions overlapping [start, end] in chronological order."""
+    start, end = _parse_date(start), _parse_date(end)
+    manifest = load_manifest(cache_dir)
+
+    for key in sorted(manifest["windows"]):
+        w_start, w_end = _key_to_window(key)
+        if w_end < start or w_start > end:
+            continue
+        with open(os.path.join(cache_dir, f"{key}.json"), 'rb') as f:
+            yield from iter_json_array(f)
+
+
+def read_window_strikes(start, end, cache_dir=WINDOW_CACHE_DIR):
+    """Concatenate cached partitions overlapping [start, end] in chronological order."""
+    return list(iter_window_strikes(start, end, cache_dir))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch missing lightning windows into the local cache.")
+    parser.add_argument("start", help="First day (dd/mm/YYYY)")
+    parser.add_argument("end", help="Last day (dd/mm/YYYY)")
+    parser.add_argument("--workers", type=int, default=MAX_CONCURRENCY, help="Concurrent requests")
+    args = parser.parse_args()
+
+    fetched, failed = sync_windows(args.start, args.end, max_workers=args.workers)
+    print(f"✅ Fetched {fetched} windows ({failed} failed, will be retried on the next run).")
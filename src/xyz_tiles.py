@@ -0,0 +1,171 @@
+"""
+Green Energy Sentinel - XYZ Tile Pyramid
+Renders the suitability score layer (the Cloud-Optimized GeoTIFF written by
+optimal_placement --export-cog) into 256x256 PNG tiles in the standard XYZ
+Web Mercator scheme, so the map only loads the tiles in view instead of
+embedding every scored point in the HTML. Only tiles containing land are
+rendered: the land band of the COG selects them before any tile is drawn.
+Tiles are rendered in parallel processes.
+
+Layout:
+    maps/tiles/{z}/{x}/{y}.png
+    maps/tiles/tiles.json       zoom range, bounds, color scale and tile count
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import rasterio
+from PIL import Image
+from rasterio.enums import Resampling
+from rasterio.transform import Affine
+from rasterio.warp import reproject
+
+from config import LAYERS_COG, TILES_DIR
+
+# Configuration
+TILES_META = "tiles.json"
+TILE_SIZE = 256
+MIN_ZOOM = 6
+MAX_ZOOM = 11            # ~75 m tile pixels at Galicia's latitude, finer than the wind raster
+TILE_ALPHA = 200         # Opacity of scored pixels (0-255); invalid pixels are transparent
+WEB_MERCATOR = "EPSG:3857"
+MERCATOR_HALF_WORLD = 20037508.342789244  # Web Mercator x/y of the world edge (m)
+
+# Same color ramp as the score HeatMap (0 = low suitability, 1 = best score)
+SCORE_GRADIENT = {0.0: '#8B0000', 0.25: '#FF4500', 0.5: '#FFD700', 0.75: '#7CFC00', 1.0: '#00FF00'}
+
+_worker = {}  # per process: open COG, score band index, color scale, output dir
+
+
+def tile_index(lon, lat, zoom):
+    """XYZ tile column/row containing each lon/lat point at `zoom` (arrays)."""
+    n = 2 ** zoom
+    lat_rad = np.radians(np.clip(lat, -85.0511, 85.0511))
+    x = np.floor((np.asarray(lon) + 180.0) / 360.0 * n)
+    y = np.floor((1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0 * n)
+    return np.clip(x, 0, n - 1).astype(np.int64), np.clip(y, 0, n - 1).astype(np.int64)
+
+
+def tile_transform(x, y, zoom, size=TILE_SIZE):
+    """Web Mercator transform of the size x size pixels of tile (x, y, zoom)."""
+    tile_m = 2 * MERCATOR_HALF_WORLD / 2 ** zoom
+    return Affine(tile_m / size, 0.0, -MERCATOR_HALF_WORLD + x * tile_m,
+                  0.0, -tile_m / size, MERCATOR_HALF_WORLD - y * tile_m)
+
+
+def land_tiles(land, transform, zoom):
+    """Sorted (x, y) tiles at `zoom` that overlap at least one land pixel.
+
+    `land` is a boolean grid in lon/lat with its affine transform; every
+    corner of each land pixel is mapped to its tile, so tiles smaller than a
+    pixel are still found.
+    """
+    rows, cols = np.nonzero(land)
+    tiles = []
+    for d_col, d_row in ((0, 0), (1, 0), (0, 1), (1, 1)):
+        lons, lats = transform * (cols + d_col, rows + d_row)
+        x, y = tile_index(lons, lats, zoom)
+        tiles.append(x * 2 ** zoom + y)
+    keys = np.unique(np.concatenate(tiles)) if tiles else np.empty(0, dtype=np.int64)
+    return list(zip((keys // 2 ** zoom).tolist(), (keys % 2 ** zoom).tolist()))
+
+
+def colorize(score, vmax, gradient=SCORE_GRADIENT, alpha=TILE_ALPHA):
+    """RGBA uint8 image of a score array on the gradient scaled to [0, vmax]; NaN is transparent."""
+    stops = np.array(sorted(gradient))
+    colors = np.array([[int(gradient[s][i:i + 2], 16) for i in (1, 3, 5)] for s in stops], dtype=float)
+    valid = np.isfinite(score)
+    t = np.clip(np.where(valid, score, 0.0) / vmax, 0.0, 1.0) if vmax > 0 else np.zeros(score.shape)
+
+    rgba = np.zeros(score.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        rgba[..., channel] = np.round(np.interp(t, stops, colors[:, channel]))
+    rgba[..., 3] = np.where(valid, alpha, 0)
+    return rgba
+
+
+def band_index(src, name):
+    """1-based index of the band described as `name`."""
+    if name not in src.descriptions:
+        raise ValueError(f"{src.name}: no band named {name!r} (bands: {src.descriptions})")
+    return src.descriptions.index(name) + 1
+
+
+def _init_worker(cog_path, band, vmax, out_dir):
+    _worker.update(src=rasterio.open(cog_path), band=band, vmax=vmax, out_dir=out_dir)
+
+
+def render_tile(tile):
+    """Render one (zoom, x, y) tile to PNG. Returns its path, or None when it has no scored pixel."""
+    zoom, x, y = tile
+    score = np.full((TILE_SIZE, TILE_SIZE), np.nan, dtype=np.float32)
+    reproject(source=rasterio.band(_worker["src"], _worker["band"]), destination=score,
+              dst_transform=tile_transform(x, y, zoom), dst_crs=WEB_MERCATOR, dst_nodata=np.nan,
+              resampling=Resampling.nearest)
+    if not np.isfinite(score).any():
+        return None
+
+    path = os.path.join(_worker["out_dir"], str(zoom), str(x), f"{y}.png")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.fromarray(colorize(score, _worker["vmax"]), "RGBA").save(path)
+    return path
+
+
+def score_max(src, band):
+    """Largest finite value of a band, read block by block."""
+    vmax = -np.inf
+    for _, window in src.block_windows(band):
+        values = src.read(band, window=window)
+        if np.isfinite(values).any():
+            vmax = max(vmax, float(np.nanmax(values)))
+    return vmax if np.isfinite(vmax) else 0.0
+
+
+def build_tiles(cog_path=LAYERS_COG, out_dir=TILES_DIR, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM,
+                band="score", land_band="land", workers=None):
+    """Render the land tiles of zooms min_zoom..max_zoom in parallel. Returns the tiles.json metadata.
+
+    Tiles from an earlier run are removed first, so the pyramid always
+    matches the COG.
+    """
+    start = time.perf_counter()
+    with rasterio.open(cog_path) as src:
+        score_band = band_index(src, band)
+        land = src.read(band_index(src, land_band)) > 0
+        vmax = score_max(src, score_band)
+        transform, bounds = src.transform, src.bounds
+    jobs = [(zoom, x, y) for zoom in range(min_zoom, max_zoom + 1) for x, y in land_tiles(land, transform, zoom)]
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(cog_path, score_band, vmax, out_dir)) as pool:
+        written = [path for path in pool.map(render_tile, jobs, chunksize=16) if path]
+
+    meta = {"min_zoom": min_zoom, "max_zoom": max_zoom, "tile_size": TILE_SIZE, "band": band,
+            "bounds": [bounds.left, bounds.bottom, bounds.right, bounds.top],
+            "vmin": 0.0, "vmax": vmax, "gradient": SCORE_GRADIENT,
+            "candidate_tiles": len(jobs), "tiles": len(written),
+            "seconds": round(time.perf_counter() - start, 2)}
+    with open(os.path.join(out_dir, TILES_META), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the suitability score COG into XYZ PNG tiles.")
+    parser.add_argument("--cog", default=LAYERS_COG, help="Layers COG from optimal_placement --export-cog")
+    parser.add_argument("--out", default=TILES_DIR)
+    parser.add_argument("--min-zoom", type=int, default=MIN_ZOOM)
+    parser.add_argument("--max-zoom", type=int, default=MAX_ZOOM)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    meta = build_tiles(args.cog, args.out, args.min_zoom, args.max_zoom, workers=args.workers)
+    print(f"✅ {meta['tiles']} tiles (of {meta['candidate_tiles']} land tiles, zoom {meta['min_zoom']}-"
+          f"{meta['max_zoom']}) rendered in {meta['seconds']}s to {os.path.abspath(args.out)}")
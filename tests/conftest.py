@@ -0,0 +1,30 @@
+"""
+Green Energy Sentinel - Test Configuration
+Makes the src/ modules importable, as the scripts see them when run from the
+repository root.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+
+@pytest.fixture
+def strike_source(tmp_path, monkeypatch):
+    """Write raw API records as data/strikes_test.json in a scratch working directory.
+
+    Returns write(records) -> store directory; the store ingests the file on
+    its first query, like the real yearly caches.
+    """
+    monkeypatch.chdir(tmp_path)
+
+    def write(records):
+        os.makedirs("data", exist_ok=True)
+        with open(os.path.join("data", "strikes_test.json"), 'w') as f:
+            json.dump(records, f)
+        return str(tmp_path / "store")
+    return write
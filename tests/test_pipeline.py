@@ -0,0 +1,65 @@
+import importlib
+import sys
+
+import pytest
+
+from pipeline import Pipeline
+
+STAGE_MODULE = '''
+def helper(x):
+    return x * 2
+
+
+def stage(x=1):
+    return helper(x)
+
+
+def styling():
+    return "font-size: 14px"
+'''
+
+
+@pytest.fixture
+def stage_module(tmp_path, monkeypatch):
+    """A scratch module holding a stage, the helper it calls and unrelated styling code."""
+    path = tmp_path / "scratch_stages.py"
+    path.write_text(STAGE_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module("scratch_stages")
+    yield path, module
+    sys.modules.pop("scratch_stages", None)
+
+
+def stage_key(module, cache_dir):
+    pipeline = Pipeline(cache_dir=str(cache_dir))
+    pipeline.add('stage', module.stage, params={'x': 3}, code=[module.helper])
+    return pipeline.key('stage')
+
+
+def edit(path, module, old, new):
+    path.write_text(path.read_text().replace(old, new))
+    return importlib.reload(module)
+
+
+def test_styling_edit_keeps_stage_key(stage_module, tmp_path):
+    path, module = stage_module
+    key = stage_key(module, tmp_path / "cache")
+
+    module = edit(path, module, "font-size: 14px", "font-size: 16px; color: #333")
+    assert stage_key(module, tmp_path / "cache") == key
+
+
+def test_declared_helper_edit_changes_stage_key(stage_module, tmp_path):
+    path, module = stage_module
+    key = stage_key(module, tmp_path / "cache")
+
+    module = edit(path, module, "return x * 2", "return x * 3")
+    assert stage_key(module, tmp_path / "cache") != key
+
+
+def test_stage_edit_changes_stage_key(stage_module, tmp_path):
+    path, module = stage_module
+    key = stage_key(module, tmp_path / "cache")
+
+    module = edit(path, module, "def stage(x=1):", "def stage(x=2):")
+    assert stage_key(module, tmp_path / "cache") != key
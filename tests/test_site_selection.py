@@ -0,0 +1,46 @@
+import numpy as np
+
+from site_selection import grid_locator, spaced_top_k
+from spatial_index import project
+
+
+def score_grid(seed=0, size=60):
+    """Smooth random score on a lon/lat node grid over central Galicia (NaN at a few cells)."""
+    rng = np.random.default_rng(seed)
+    lon_grid, lat_grid = np.meshgrid(np.linspace(-8.6, -7.4, size), np.linspace(42.4, 43.2, size))
+    score = np.sin(lon_grid * 9) * np.cos(lat_grid * 7) + rng.normal(0, 0.05, lon_grid.shape)
+    score[rng.random(score.shape) < 0.05] = np.nan
+    return score, lon_grid, lat_grid
+
+
+def greedy_reference(score, k, min_spacing_m, lon_grid, lat_grid):
+    """Brute-force greedy suppression over every cell, for comparison."""
+    flat = score.ravel()
+    order = np.flatnonzero(np.isfinite(flat))
+    order = order[np.lexsort((order, -flat[order]))]
+    xs, ys = project(lon_grid.ravel()[order], lat_grid.ravel()[order])
+    kept = []
+    for i in range(len(order)):
+        if all(np.hypot(xs[i] - xs[j], ys[i] - ys[j]) >= min_spacing_m for j in kept):
+            kept.append(i)
+            if len(kept) == k:
+                break
+    return order[kept]
+
+
+def test_sites_keep_min_spacing():
+    score, lon_grid, lat_grid = score_grid()
+    for min_spacing_m in (2000, 5000, 20000):
+        sites = spaced_top_k(score, 10, min_spacing_m, grid_locator(lon_grid, lat_grid))
+        assert len(sites) == 10
+        xs, ys = project(lon_grid.ravel()[sites], lat_grid.ravel()[sites])
+        distances = np.hypot(xs[:, None] - xs[None, :], ys[:, None] - ys[None, :])
+        assert distances[np.triu_indices(len(sites), 1)].min() >= min_spacing_m
+        assert sites.tolist() == greedy_reference(score, 10, min_spacing_m, lon_grid, lat_grid).tolist()
+
+
+def test_zero_spacing_is_plain_top_k():
+    score, lon_grid, lat_grid = score_grid(seed=1)
+    flat = score.ravel()
+    expected = np.argsort(np.where(np.isnan(flat), np.inf, -flat), kind="stable")[:10]
+    assert spaced_top_k(score, 10, 0, grid_locator(lon_grid, lat_grid)).tolist() == expected.tolist()
@@ -0,0 +1,36 @@
+import numpy as np
+
+from spatial_index import count_within
+from strike_store import format_fecha, to_epoch
+
+EARTH_RADIUS_M = 6_371_008.8
+RADIUS_M = 5000
+TOLERANCE = 0.01   # UTM scale error over Galicia is well under 1%: only strikes this close to the edge may differ
+
+
+def haversine_m(lon1, lat1, lon2, lat2):
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def test_count_within_matches_brute_force_haversine(strike_source):
+    rng = np.random.default_rng(0)
+    n = 5000
+    lats = rng.uniform(42.5, 43.1, n)
+    lons = rng.uniform(-8.4, -7.6, n)
+    times = to_epoch("01/06/2023") + rng.integers(0, 86400 * 30, n)
+    store_dir = strike_source([{"fecha": fecha, "lat": lat, "lon": lon, "peakCurrent": -10.0}
+                               for fecha, lat, lon in zip(format_fecha(times).tolist(), lats.tolist(),
+                                                          lons.tolist())])
+    # Stored coordinates are float32: measure from the same values
+    lats, lons = lats.astype(np.float32).astype(float), lons.astype(np.float32).astype(float)
+
+    points = np.column_stack([rng.uniform(-8.3, -7.7, 40), rng.uniform(42.6, 43.0, 40)])
+    counts = count_within(RADIUS_M, points, store_dir=store_dir)
+
+    distances = haversine_m(points[:, :1], points[:, 1:], lons[None, :], lats[None, :])
+    inside = (distances <= RADIUS_M * (1 - TOLERANCE)).sum(axis=1)
+    near = (distances <= RADIUS_M * (1 + TOLERANCE)).sum(axis=1)
+    assert inside.sum() > 1000
+    assert np.all((inside <= counts) & (counts <= near))
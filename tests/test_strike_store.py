@@ -0,0 +1,38 @@
+import numpy as np
+
+from strike_store import format_fecha, strikes_between, to_epoch
+
+T0 = to_epoch("01/06/2023")   # Midnight UTC
+
+
+def record(t, lat=42.8, lon=-8.0, peak=-12.5):
+    return {"fecha": str(format_fecha(t)), "lat": lat, "lon": lon, "peakCurrent": peak}
+
+
+def test_windows_are_half_open(strike_source):
+    times = [T0, T0 + 1800, T0 + 3600, T0 + 7199, T0 + 7200]
+    store_dir = strike_source([record(t) for t in times])
+
+    assert strikes_between(T0, T0 + 3600, store_dir=store_dir)["time"].tolist() == [T0, T0 + 1800]
+    assert strikes_between(T0 + 3600, T0 + 7200, store_dir=store_dir)["time"].tolist() == [T0 + 3600, T0 + 7199]
+    assert not len(strikes_between(T0 + 3600, T0 + 3600, store_dir=store_dir)["time"])
+
+    # Consecutive windows cover every strike exactly once
+    hourly = [strikes_between(T0 + h * 3600, T0 + (h + 1) * 3600, store_dir=store_dir)["time"] for h in range(3)]
+    assert np.concatenate(hourly).tolist() == times
+
+
+def test_day_strings_cover_the_whole_end_day(strike_source):
+    store_dir = strike_source([record(T0 - 1), record(T0), record(T0 + 86399), record(T0 + 86400)])
+
+    strikes = strikes_between("01/06/2023", "01/06/2023", store_dir=store_dir)
+    assert strikes["time"].tolist() == [T0, T0 + 86399]
+
+
+def test_duplicate_records_are_stored_once(strike_source):
+    records = [record(T0), record(T0 + 60), record(T0), record(T0 + 60, peak=None), record(T0 + 60, peak=None)]
+    store_dir = strike_source(records)
+
+    strikes = strikes_between(T0, T0 + 3600, store_dir=store_dir)
+    assert strikes["time"].tolist() == [T0, T0 + 60, T0 + 60]
+    assert np.isnan(strikes["peak"]).sum() == 1